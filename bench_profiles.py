@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+'''
+ZeroSoC core profile benchmark
+
+Builds the benchmark firmware in sw/bench.c for each Ibex core profile, runs
+it on the simulation model configured with that profile, and reports the
+cycles each benchmark took, appending the results to a history file.
+'''
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import profiles
+import simulate
+
+HISTORY_FILE = os.path.join('build', 'bench', 'profiles.jsonl')
+BENCH_DIR = os.path.join('build', 'bench', 'profiles')
+
+FIRMWARE = 'bench'
+
+# Run length limit in clock cycles, the UART benchmark and the results are
+# sent at 9600 baud
+TIMEOUT = 3000000
+
+
+def build_firmware(profile, outdir=BENCH_DIR):
+    '''
+    Builds the benchmark firmware for profile. Returns the path of its image.
+    '''
+    march = profiles.PROFILES[profile]['march']
+    # Objects of another -march may be left over, rebuild everything
+    subprocess.run(['make', '-B', '-C', 'sw', f'MARCH={march}', f'{FIRMWARE}.mem'], check=True)
+
+    path = os.path.join(outdir, profile, f'{FIRMWARE}.mem')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    shutil.copy(os.path.join('sw', f'{FIRMWARE}.mem'), path)
+    return path
+
+
+def _parse(uart):
+    results = {}
+    for line in uart.splitlines():
+        fields = line.split()
+        if len(fields) == 4 and fields[0] == 'bench':
+            results[fields[1]] = {'cycles': int(fields[2]), 'checksum': int(fields[3])}
+    return results
+
+
+def run_profile(profile, image, model=simulate.MODEL, timeout=TIMEOUT, outdir=BENCH_DIR):
+    '''
+    Runs the benchmark image on the model with profile. Returns a dict of
+    benchmark to its cycles and checksum.
+    '''
+    result, = simulate.regress([image], model=model, expect='done', timeout=timeout,
+                               defines=profiles.defines(profile), dump=False,
+                               sim_dir=os.path.join(outdir, profile))
+    if result['status'] != 'pass':
+        raise RuntimeError(f"{profile}: benchmark run ended with {result['status']}, "
+                           f"UART output {result['uart']!r}")
+    return _parse(result['uart'])
+
+
+def bench(names, model=simulate.MODEL, timeout=TIMEOUT):
+    '''
+    Returns the benchmark results of each profile of names.
+    '''
+    # Firmware builds share sw/, simulations run at the same time
+    images = {profile: build_firmware(profile) for profile in names}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(names)) as pool:
+        futures = {profile: pool.submit(run_profile, profile, image, model=model, timeout=timeout)
+                   for profile, image in images.items()}
+        return {profile: future.result() for profile, future in futures.items()}
+
+
+def _revision():
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return result.stdout.strip() or None
+
+
+def _report(results):
+    names = list(results)
+    benchmarks = sorted({name for result in results.values() for name in result})
+    base = names[0]
+
+    print('benchmark  ' + '  '.join(f'{name:>20}' for name in names))
+    ok = True
+    for benchmark in benchmarks:
+        cells = []
+        for name in names:
+            entry = results[name].get(benchmark)
+            if not entry:
+                cells.append(f"{'-':>20}")
+                continue
+            cell = str(entry['cycles'])
+            base_entry = results[base].get(benchmark)
+            if name != base and base_entry:
+                cell += f" ({base_entry['cycles'] / entry['cycles']:.2f}x)"
+                if entry['checksum'] != base_entry['checksum']:
+                    ok = False
+                    print(f'{benchmark}: checksum of {name} differs from {base}', file=sys.stderr)
+            cells.append(f'{cell:>20}')
+        print(f'{benchmark:<9}  ' + '  '.join(cells))
+    return ok
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Benchmark the Ibex core profiles')
+    parser.add_argument('--profile',
+                        action='append',
+                        choices=sorted(profiles.PROFILES),
+                        help='Profile to benchmark, can be repeated (default: all).')
+    parser.add_argument('--model',
+                        default=simulate.MODEL,
+                        help='Verilog model of zerosoc.')
+    parser.add_argument('--timeout',
+                        type=int,
+                        default=TIMEOUT,
+                        help='Run length limit in clock cycles.')
+    parser.add_argument('--history',
+                        default=HISTORY_FILE,
+                        help='File to append the results to.')
+    options = parser.parse_args()
+
+    try:
+        results = bench(options.profile or list(profiles.PROFILES), model=options.model,
+                        timeout=options.timeout)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    ok = _report(results)
+
+    entry = {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': _revision(),
+        'profiles': {profile: {benchmark: values['cycles'] for benchmark, values in result.items()}
+                     for profile, result in results.items()}
+    }
+    os.makedirs(os.path.dirname(options.history), exist_ok=True)
+    with open(options.history, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+'''
+ZeroSoC build script startup benchmark
+
+Measures, in fresh interpreters, how long importing make.py takes and how long
+each design takes to set up, and appends the results to a history file so
+regressions show up over time.
+'''
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HISTORY_FILE = os.path.join('build', 'bench', 'startup.jsonl')
+
+# Setup functions in make.py to time, by name
+SETUPS = {
+    'core': 'make._setup_core()',
+    'top-flat': 'make._setup_top_flat()',
+    'top': 'make._setup_top_hier(None)'
+}
+
+_CHILD = '''
+import json, time
+start = time.perf_counter()
+import make
+times = {{'import': time.perf_counter() - start}}
+start = time.perf_counter()
+{setup}
+times['setup'] = time.perf_counter() - start
+print(json.dumps(times))
+'''
+
+
+def _measure(setup):
+    script = _CHILD.format(setup=setup or 'pass')
+    result = subprocess.run([sys.executable, '-c', script], check=True,
+                            stdout=subprocess.PIPE, text=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _revision():
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return result.stdout.strip() or None
+
+
+def bench(designs, repeat=3):
+    '''
+    Returns the median import time and the median setup time of each design,
+    in seconds.
+    '''
+    imports = []
+    setups = {}
+    for design in designs:
+        runs = [_measure(SETUPS[design]) for _ in range(repeat)]
+        imports.extend(run['import'] for run in runs)
+        setups[design] = statistics.median(run['setup'] for run in runs)
+    return {'import': statistics.median(imports), 'setup': setups}
+
+
+def _previous(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Benchmark make.py startup')
+    parser.add_argument('--design',
+                        action='append',
+                        choices=sorted(SETUPS),
+                        help='Design to time the setup of (default: core and top-flat).')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='Number of runs per design.')
+    parser.add_argument('--history',
+                        default=HISTORY_FILE,
+                        help='File to append the results to.')
+    options = parser.parse_args()
+
+    result = bench(options.design or ['core', 'top-flat'], repeat=options.repeat)
+    previous = _previous(options.history)
+
+    def change(value, old):
+        if old is None:
+            return ''
+        return f' ({value - old:+.2f} s)'
+
+    old = previous or {'setup': {}}
+    print(f"import make: {result['import']:.2f} s{change(result['import'], old.get('import'))}")
+    for design, seconds in result['setup'].items():
+        print(f'setup {design}: {seconds:.2f} s{change(seconds, old["setup"].get(design))}')
+
+    result['time'] = datetime.datetime.now().isoformat(timespec='seconds')
+    result['revision'] = _revision()
+    os.makedirs(os.path.dirname(options.history), exist_ok=True)
+    with open(options.history, 'a') as f:
+        f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+'''
+Content-addressed, deduplicated file upload for remote ZeroSoC builds
+
+Protocol (HTTP):
+    POST /missing         JSON {"hashes": [...]}, returns {"missing": [...]}
+    PUT  /blobs/<sha256>  deflate-compressed file contents
+    GET  /blobs/<sha256>  deflate-compressed file contents
+    PUT  /index/<name>    JSON mapping of client paths to hashes for one job
+    GET  /index/<name>
+
+This module also contains a local stand-in server implementing the protocol,
+so the client can be exercised offline:
+
+    ./blobstore.py serve --root build/blobstore --port 8765
+
+make.py does not upload to a store yet: the SiliconCompiler server cannot
+resolve job inputs from it by hash, so remote jobs still carry their files.
+'''
+
+import argparse
+import concurrent.futures
+import hashlib
+import http.server
+import json
+import os
+import re
+import shutil
+import tempfile
+import urllib.request
+import zlib
+
+import filehash
+
+_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+_NAME_RE = re.compile(r'^[\w.-]+$')
+
+
+def _compress(path, out):
+    compressor = zlib.compressobj(6)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            out.write(compressor.compress(chunk))
+    out.write(compressor.flush())
+
+
+class BlobClient:
+    def __init__(self, url, jobs=8, timeout=600):
+        self.url = url.rstrip('/')
+        self.jobs = jobs
+        self.timeout = timeout
+
+    def _request(self, method, path, data=None, headers=None):
+        request = urllib.request.Request(f'{self.url}{path}', data=data, method=method,
+                                         headers=headers or {})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def missing(self, hashes):
+        body = json.dumps({'hashes': sorted(set(hashes))}).encode()
+        response = self._request('POST', '/missing', body, {'Content-Type': 'application/json'})
+        return json.loads(response)['missing']
+
+    def upload(self, path, digest):
+        with tempfile.TemporaryFile() as data:
+            _compress(path, data)
+            size = data.tell()
+            data.seek(0)
+            self._request('PUT', f'/blobs/{digest}', data,
+                          {'Content-Encoding': 'deflate', 'Content-Length': str(size)})
+
+    def put_index(self, name, index):
+        self._request('PUT', f'/index/{name}', json.dumps(index, indent=2).encode(),
+                      {'Content-Type': 'application/json'})
+
+    def sync(self, paths, cache=None):
+        '''
+        Uploads the files in paths the server does not already hold. Returns a
+        dict mapping each path to its sha256.
+        '''
+        paths = sorted(set(os.path.abspath(path) for path in paths))
+        if cache:
+            digests = cache.hash_files(paths)
+        else:
+            with filehash.HashCache() as new_cache:
+                digests = new_cache.hash_files(paths)
+        index = dict(zip(paths, digests))
+
+        missing = set(self.missing(digests))
+        uploads = {digest: path for path, digest in index.items() if digest in missing}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for future in [pool.submit(self.upload, path, digest)
+                           for digest, path in uploads.items()]:
+                future.result()
+
+        print(f'Remote store: {len(uploads)} of {len(index)} files uploaded, '
+              f'{len(index) - len(uploads)} already present')
+
+        return index
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    root = None
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, 'blobs', digest[:2], digest)
+
+    def _reply(self, code, body=b'', content_type='application/json'):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'blobs' and _HASH_RE.match(parts[1]):
+            return 'blobs', parts[1]
+        if len(parts) == 2 and parts[0] == 'index' and _NAME_RE.match(parts[1]):
+            return 'index', parts[1]
+        if parts == ['missing']:
+            return 'missing', None
+        return None, None
+
+    def do_POST(self):
+        kind, _ = self._route()
+        if kind != 'missing':
+            return self._reply(404)
+
+        hashes = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['hashes']
+        missing = [digest for digest in hashes
+                   if not _HASH_RE.match(digest) or not os.path.exists(self._blob_path(digest))]
+        self._reply(200, json.dumps({'missing': missing}).encode())
+
+    def do_PUT(self):
+        kind, name = self._route()
+        length = int(self.headers['Content-Length'])
+        if kind == 'index':
+            path = os.path.join(self.root, 'index', f'{name}.json')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self.rfile.read(length))
+            return self._reply(201)
+        if kind != 'blobs':
+            return self._reply(404)
+
+        # Verify the upload against its address before storing it
+        staging = tempfile.NamedTemporaryFile(dir=self.root, delete=False)
+        hasher = hashlib.sha256()
+        decompressor = zlib.decompressobj()
+        with staging:
+            while length > 0:
+                chunk = self.rfile.read(min(length, 1 << 20))
+                length -= len(chunk)
+                staging.write(chunk)
+                hasher.update(decompressor.decompress(chunk))
+            hasher.update(decompressor.flush())
+
+        if hasher.hexdigest() != name:
+            os.unlink(staging.name)
+            return self._reply(400, json.dumps({'error': 'hash mismatch'}).encode())
+
+        os.makedirs(os.path.dirname(self._blob_path(name)), exist_ok=True)
+        os.replace(staging.name, self._blob_path(name))
+        self._reply(201)
+
+    def do_GET(self):
+        kind, name = self._route()
+        if kind == 'blobs':
+            path = self._blob_path(name)
+        elif kind == 'index':
+            path = os.path.join(self.root, 'index', f'{name}.json')
+        else:
+            return self._reply(404)
+        if not os.path.exists(path):
+            return self._reply(404)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(os.path.getsize(path)))
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+
+def make_server(root, host='127.0.0.1', port=8765):
+    os.makedirs(root, exist_ok=True)
+    handler = type('Handler', (_Handler,), {'root': os.path.abspath(root)})
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='ZeroSoC remote file store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help='Run a local stand-in store server.')
+    serve.add_argument('--root', default=os.path.join('build', 'blobstore'),
+                       help='Directory to keep blobs in.')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+
+    sync = subparsers.add_parser('sync', help='Upload files to a store.')
+    sync.add_argument('url', help='Store URL.')
+    sync.add_argument('paths', nargs='+', help='Files to upload.')
+
+    options = parser.parse_args()
+
+    if options.command == 'serve':
+        server = make_server(options.root, options.host, options.port)
+        print(f'Serving {options.root} on http://{options.host}:{options.port}')
+        server.serve_forever()
+    else:
+        BlobClient(options.url).sync(options.paths)
+
+
+if __name__ == '__main__':
+    _main()
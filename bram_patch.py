@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+'''
+In-process iCE40 BRAM patcher
+
+Replaces the contents of the RAM initialized with random.mem in a placed and
+routed ASC file, like icebram, for many firmware images at once. Finding the
+BRAM bit columns that hold the random.mem pattern is done once per ASC file
+and cached, then each image is patched in memory in its own process:
+
+    ./bram_patch.py --asc top_icebreaker.asc --bit sw/*.mem
+'''
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import filehash
+
+ASC_FILE = os.path.join('build', 'top_icebreaker', 'job0', 'apr', '0', 'outputs',
+                        'top_icebreaker.asc')
+PATTERN_FILE = 'random.mem'
+CACHE_DIR = os.path.join('build', 'cache', 'bram')
+
+# Each .ram_data block holds 16 lines of 16 16-bit words, word 0 at the right
+# end of a line
+BRAM_LINES = 16
+LINE_WORDS = 16
+WORD_BITS = 16
+BRAM_WORDS = BRAM_LINES * LINE_WORDS
+
+_ASC_LINES = None
+
+
+def read_hex(path):
+    '''
+    Returns the words of a hex memory file, as read by $readmemh.
+    '''
+    words = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('//')[0].strip()
+            if line.startswith('@'):
+                raise ValueError(f'{path}: address directives are not supported')
+            words.extend(int(word, 16) for word in line.split())
+    return words
+
+
+def _bram_words(lines):
+    words = []
+    for line in lines:
+        value = int(line, 16)
+        words.extend((value >> (WORD_BITS * i)) & 0xffff for i in range(LINE_WORDS))
+    return words
+
+
+def _bram_lines(words):
+    lines = []
+    for i in range(0, BRAM_WORDS, LINE_WORDS):
+        value = 0
+        for j, word in enumerate(words[i:i + LINE_WORDS]):
+            value |= word << (WORD_BITS * j)
+        lines.append(f'{value:064x}')
+    return lines
+
+
+def _column(words, bit, start):
+    '''
+    Returns bit of words start to start + BRAM_WORDS as an integer.
+    '''
+    value = 0
+    for i, word in enumerate(words[start:start + BRAM_WORDS]):
+        value |= ((word >> bit) & 1) << i
+    return value
+
+
+def _pattern_slices(pattern):
+    '''
+    Returns a dict of each BRAM sized bit column of pattern to its (bit,
+    offset) in pattern.
+    '''
+    if len(pattern) % BRAM_WORDS:
+        raise ValueError(f'Pattern depth must be a multiple of {BRAM_WORDS} words')
+
+    width = max(pattern).bit_length()
+    slices = {}
+    for start in range(0, len(pattern), BRAM_WORDS):
+        for bit in range(width):
+            column = _column(pattern, bit, start)
+            if column in slices:
+                raise ValueError(f'Pattern is not unique: bit {bit} at word {start} repeats')
+            slices[column] = (bit, start)
+    return slices
+
+
+def build_index(asc_lines, pattern):
+    '''
+    Returns, for each .ram_data block holding part of pattern, the line
+    number of its header and the (BRAM column, pattern bit, pattern offset)
+    of every bit column it holds.
+    '''
+    slices = _pattern_slices(pattern)
+
+    index = []
+    for number, line in enumerate(asc_lines):
+        if not line.startswith('.ram_data '):
+            continue
+        words = _bram_words(asc_lines[number + 1:number + 1 + BRAM_LINES])
+        columns = []
+        for column in range(WORD_BITS):
+            value = _column(words, column, 0)
+            if value in slices:
+                columns.append((column, *slices[value]))
+        if columns:
+            index.append({'line': number, 'columns': columns})
+
+    found = sum(len(bram['columns']) for bram in index)
+    if found != len(slices):
+        raise ValueError(f'Found {found} of the {len(slices)} pattern bit columns')
+    return index
+
+
+def load_index(asc_path, pattern_path, asc_lines, cache_dir=CACHE_DIR):
+    '''
+    Returns the index of asc_path for pattern_path, from the cache if the two
+    files have been indexed before.
+    '''
+    with filehash.HashCache() as cache:
+        asc_digest, pattern_digest = cache.hash_files([asc_path, pattern_path])
+    path = os.path.join(cache_dir, f'{asc_digest}-{pattern_digest}.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    index = build_index(asc_lines, read_hex(pattern_path))
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(f'{path}.tmp', path)
+    return index
+
+
+def patch(asc_lines, index, image):
+    '''
+    Returns asc_lines with the RAM contents of index replaced by image.
+    '''
+    lines = list(asc_lines)
+    for bram in index:
+        start = bram['line'] + 1
+        words = _bram_words(lines[start:start + BRAM_LINES])
+        for column, bit, offset in bram['columns']:
+            mask = ~(1 << column)
+            for i in range(BRAM_WORDS):
+                words[i] = (words[i] & mask) | (((image[offset + i] >> bit) & 1) << column)
+        lines[start:start + BRAM_LINES] = _bram_lines(words)
+    return lines
+
+
+def _init_worker(asc_lines):
+    global _ASC_LINES
+    _ASC_LINES = asc_lines
+
+
+def _patch_image(index, depth, mem_path, outdir, pack):
+    image = read_hex(mem_path)
+    if len(image) > depth:
+        raise ValueError(f'{mem_path}: {len(image)} words do not fit in {depth}')
+    image += [0] * (depth - len(image))
+
+    name = os.path.splitext(os.path.basename(mem_path))[0]
+    asc = os.path.join(outdir, f'zerosoc_{name}.asc')
+    with open(asc, 'w') as f:
+        f.write('\n'.join(patch(_ASC_LINES, index, image)) + '\n')
+
+    outputs = [asc]
+    if pack:
+        bit = os.path.join(outdir, f'zerosoc_{name}.bit')
+        subprocess.run(['icepack', asc, bit], check=True)
+        outputs.append(bit)
+    return outputs
+
+
+def patch_images(asc_path, mem_paths, pattern_path=PATTERN_FILE, outdir='.', pack=False,
+                 jobs=None):
+    '''
+    Writes zerosoc_<image>.asc, and .bit if pack is set, for each of
+    mem_paths to outdir. Returns the written paths.
+    '''
+    with open(asc_path) as f:
+        asc_lines = f.read().splitlines()
+    index = load_index(asc_path, pattern_path, asc_lines)
+    depth = len(read_hex(pattern_path))
+
+    os.makedirs(outdir, exist_ok=True)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                initargs=(asc_lines,)) as pool:
+        futures = [pool.submit(_patch_image, index, depth, path, outdir, pack)
+                   for path in mem_paths]
+        return [output for future in futures for output in future.result()]
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Patch firmware images into an iCE40 bitstream')
+    parser.add_argument('images', nargs='+', metavar='MEM', help='Firmware images to patch in.')
+    parser.add_argument('--asc', default=ASC_FILE, help='Placed and routed ASC file.')
+    parser.add_argument('--pattern', default=PATTERN_FILE,
+                        help='Memory file the RAM was initialized with in the ASC file.')
+    parser.add_argument('--outdir', default='.', help='Directory to write the outputs to.')
+    parser.add_argument('--bit', action='store_true', help='Also pack each output with icepack.')
+    parser.add_argument('--jobs', type=int, help='Number of images to patch at the same time.')
+    options = parser.parse_args()
+
+    if options.bit and not shutil.which('icepack'):
+        print('icepack not found, cannot write .bit files.', file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        outputs = patch_images(options.asc, options.images, pattern_path=options.pattern,
+                               outdir=options.outdir, pack=options.bit, jobs=options.jobs)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    for output in outputs:
+        print(output)
+
+
+if __name__ == '__main__':
+    _main()
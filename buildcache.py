@@ -0,0 +1,178 @@
+'''
+Content-addressed cache for ZeroSoC core builds
+'''
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from importlib import metadata
+
+import filehash
+
+CACHE_DIR = os.path.join('build', 'cache', 'core')
+MAX_CACHE_SIZE = 20 * 1024 ** 3
+
+# Schema trees that are written by a run, or only describe how to run it
+_IGNORED_ROOTS = ('arg', 'history', 'metric', 'output', 'record')
+_IGNORED_OPTIONS = ('breakpoint', 'builddir', 'clean', 'credentials', 'from', 'jobincr',
+                    'jobname', 'nodisplay', 'quiet', 'remote', 'steplist', 'to')
+_VERSIONED_PACKAGES = ('siliconcompiler', 'lambdapdk', 'lambdalib')
+
+
+def _is_ignored(keypath):
+    if keypath[0] in _IGNORED_ROOTS:
+        return True
+    if keypath[0] == 'option' and keypath[1] in _IGNORED_OPTIONS:
+        return True
+    return False
+
+
+def _expand(path):
+    if not os.path.isdir(path):
+        return [path]
+
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names))
+    return files
+
+
+def fingerprint(chip):
+    '''
+    Returns a hash of each parameter in the chip schema that affects the build
+    results (floorplan, tool variables, defines, ...), including the contents
+    of every file and directory it references (RTL, tcl, libraries), keyed by
+    the JSON encoded keypath.
+    '''
+    params = {}
+    files = []
+    for keypath in sorted(chip.allkeys()):
+        if _is_ignored(keypath):
+            continue
+
+        param = chip.getdict(*keypath)
+        paths = []
+        if 'file' in param['type'] or 'dir' in param['type']:
+            for path in chip.find_files(*keypath, missing_ok=True):
+                if path:
+                    paths.extend(_expand(path))
+        params[json.dumps(keypath)] = (param['node'], paths)
+        files.extend(paths)
+
+    with filehash.HashCache() as cache:
+        digests = dict(zip(files, cache.hash_files(files)))
+
+    hashes = {}
+    for keypath, (node, paths) in params.items():
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps(node, sort_keys=True, default=str).encode())
+        for path in paths:
+            hasher.update(f'{os.path.basename(path)}:{digests[path]}'.encode())
+        hashes[keypath] = hasher.hexdigest()
+    return hashes
+
+
+def compute_key(chip):
+    '''
+    Returns a hash of everything in the chip schema that affects the build
+    results, and of the versions of the packages the flow comes from.
+    '''
+    hasher = hashlib.sha256()
+
+    for package in _VERSIONED_PACKAGES:
+        try:
+            hasher.update(f'{package}=={metadata.version(package)}'.encode())
+        except metadata.PackageNotFoundError:
+            pass
+
+    for keypath, digest in sorted(fingerprint(chip).items()):
+        hasher.update(f'{keypath}:{digest}'.encode())
+
+    return hasher.hexdigest()
+
+
+def _entry_size(entry):
+    size = 0
+    for root, _, files in os.walk(entry):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+
+def _evict(cache_dir, max_size):
+    entries = []
+    for name in os.listdir(cache_dir):
+        index = os.path.join(cache_dir, name, 'entry.json')
+        if os.path.exists(index):
+            entry = os.path.join(cache_dir, name)
+            entries.append((os.path.getmtime(index), entry, _entry_size(entry)))
+
+    # Least recently used entries go first
+    entries.sort()
+    total = sum(size for _, _, size in entries)
+    for _, entry, size in entries:
+        if total <= max_size:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def restore(key, manifest, cache_dir=CACHE_DIR):
+    '''
+    Restores the outputs and manifest of a cached build to their original
+    locations. Returns True on a cache hit.
+    '''
+    entry = os.path.join(cache_dir, key)
+    index = os.path.join(entry, 'entry.json')
+    if not os.path.exists(index):
+        return False
+
+    with open(index) as f:
+        files = json.load(f)
+
+    for stored, path in files.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copy2(os.path.join(entry, 'files', stored), path)
+    shutil.copy2(os.path.join(entry, 'manifest.json'), manifest)
+
+    # Mark as recently used for eviction
+    os.utime(index)
+
+    return True
+
+
+def store(key, chip, manifest, cache_dir=CACHE_DIR, max_size=MAX_CACHE_SIZE):
+    '''
+    Stores every file registered under ['output'] of chip, along with the
+    manifest written for it, then evicts old entries beyond max_size bytes.
+    '''
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = os.path.join(cache_dir, key)
+    if os.path.exists(entry):
+        return
+
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix='.staging_')
+    os.makedirs(os.path.join(staging, 'files'))
+
+    files = {}
+    for fileset in chip.getkeys('output'):
+        for filetype in chip.getkeys('output', fileset):
+            for path in chip.find_files('output', fileset, filetype):
+                stored = f'{len(files)}_{os.path.basename(path)}'
+                shutil.copy2(path, os.path.join(staging, 'files', stored))
+                files[stored] = os.path.abspath(path)
+
+    shutil.copy2(manifest, os.path.join(staging, 'manifest.json'))
+    with open(os.path.join(staging, 'entry.json'), 'w') as f:
+        json.dump(files, f, indent=2)
+
+    try:
+        os.rename(staging, entry)
+    except OSError:
+        # Another build stored the same key first
+        shutil.rmtree(staging, ignore_errors=True)
+
+    _evict(cache_dir, max_size)
@@ -0,0 +1,220 @@
+'''
+Fast parse and elaboration check of the ZeroSoC RTL
+
+Every source file is parsed on its own with slang, and files whose contents,
+included headers and defines are unchanged since they last parsed cleanly are
+skipped. The top module is then elaborated with the full file list, which is
+also skipped if nothing at all has changed. The cache keeps only the current
+files of each top.
+'''
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import filehash
+import sources
+
+CACHE_FILE = os.path.join('build', 'cache', 'check.json')
+
+SLANG = 'slang'
+
+# Cells of technology libraries, which are only known to the downstream tools
+BLACKBOX_PREFIXES = ('sky130_', 'SB_')
+
+# Library files in ydirs
+_LIBEXT = ('.sv', '.v')
+_UNKNOWN_MODULE_RE = re.compile(r"error: unknown module '([^']+)'")
+_ERROR_RE = re.compile(r'\berror:')
+
+
+def _libraries(chip):
+    '''
+    Returns the key prefixes of chip and every library it uses, recursively.
+    '''
+    prefixes = [()]
+    pending = list(chip.get('option', 'library'))
+    seen = set()
+    while pending:
+        library = pending.pop(0)
+        if library in seen or library not in chip.getkeys('library'):
+            continue
+        seen.add(library)
+        prefixes.append(('library', library))
+        pending.extend(chip.get('library', library, 'option', 'library'))
+    return prefixes
+
+
+def collect(chip):
+    '''
+    Returns the RTL inputs, include dirs, library dirs and defines of chip,
+    including those of its libraries.
+    '''
+    files, idirs, ydirs, defines = [], [], [], []
+    for prefix in _libraries(chip):
+        if chip.valid(*prefix, 'input', 'rtl'):
+            for filetype in ('systemverilog', 'verilog'):
+                if chip.valid(*prefix, 'input', 'rtl', filetype):
+                    files.extend(chip.find_files(*prefix, 'input', 'rtl', filetype))
+        idirs.extend(chip.find_files(*prefix, 'option', 'idir'))
+        ydirs.extend(chip.find_files(*prefix, 'option', 'ydir'))
+        defines.extend(chip.get(*prefix, 'option', 'define'))
+
+    def unique(values):
+        return list(dict.fromkeys(values))
+
+    return unique(files), unique(idirs), unique(ydirs), unique(defines)
+
+
+def _define_args(defines):
+    args = []
+    for define in defines:
+        # Defines are written the way they would be on a shell command line
+        name, _, value = define.partition('=')
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        args.append(f'-D{name}={value}' if value else f'-D{name}')
+    return args
+
+
+def _common_args(idirs, defines):
+    return [arg for idir in idirs for arg in ('-I', idir)] + _define_args(defines)
+
+
+def _dir_files(dirs, exts):
+    files = []
+    for path in dirs:
+        files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if name.endswith(exts))
+    return files
+
+
+def _version():
+    result = subprocess.run([SLANG, '--version'], stdout=subprocess.PIPE, text=True)
+    return result.stdout.strip()
+
+
+def _parse(path, args):
+    result = subprocess.run([SLANG, '--parse-only', '-q', *args, path],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.returncode == 0, result.stdout
+
+
+def _elaborate(top, files, ydirs, args):
+    cmd = [SLANG, '-q', '--top', top, *args]
+    for ydir in ydirs:
+        cmd.extend(['-y', ydir])
+    for ext in _LIBEXT:
+        cmd.extend(['--libext', ext])
+    cmd.extend(files)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if result.returncode == 0:
+        return True, result.stdout
+
+    # Unknown technology cells alone are not a failure
+    errors = [line for line in result.stdout.splitlines() if _ERROR_RE.search(line)]
+    for line in errors:
+        match = _UNKNOWN_MODULE_RE.search(line)
+        if not match or not match.group(1).startswith(BLACKBOX_PREFIXES):
+            return False, result.stdout
+    return True, result.stdout
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        passed = json.load(f)
+    # Entries of each top, earlier caches held the keys of every file ever parsed
+    return {top: entry for top, entry in passed.items() if isinstance(entry, dict)}
+
+
+def _save(path, passed):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(passed, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def check(chip, jobs=None, cache_file=CACHE_FILE):
+    '''
+    Parses every RTL input of chip and elaborates its entrypoint. Returns
+    True if the design is free of syntax and elaboration errors, or if slang
+    is not installed.
+    '''
+    top = chip.get('option', 'entrypoint') or chip.design
+
+    if not shutil.which(SLANG):
+        print(f"Skipping RTL check of {top}: '{SLANG}' not found.", file=sys.stderr)
+        return True
+
+    files, idirs, ydirs, defines = collect(chip)
+    args = _common_args(idirs, defines)
+
+    ydir_files = _dir_files(ydirs, _LIBEXT)
+    # Each file is only parsed again when it or a file it includes changes
+    includes = {path: sources.includes(path, idirs) for path in files + ydir_files}
+    headers = sorted({header for included in includes.values() for header in included})
+
+    with filehash.HashCache() as cache:
+        digests = cache.hash_files(files)
+        header_digests = dict(zip(headers, cache.hash_files(headers)))
+        ydir_digests = cache.hash_files(ydir_files)
+
+    context = hashlib.sha256(json.dumps([_version(), idirs, defines]).encode())
+
+    def parse_key(path, digest):
+        key = context.copy()
+        key.update(digest.encode())
+        for header in includes[path]:
+            key.update(header_digests[header].encode())
+        return key.hexdigest()
+
+    elab_key = context.copy()
+    elab_key.update(json.dumps([top, ydirs, digests, ydir_digests, header_digests],
+                               sort_keys=True).encode())
+    elab_key = elab_key.hexdigest()
+
+    passed = _load(cache_file)
+    previous = passed.get(top, {})
+    if previous.get('elab') == elab_key:
+        print(f'RTL check of {top}: unchanged, passed.')
+        return True
+
+    # Entries of files no longer in the file list are dropped
+    keys = {path: parse_key(path, digest) for path, digest in zip(files, digests)}
+    current = {path: key for path, key in keys.items()
+               if previous.get('files', {}).get(path) == key}
+    pending = [(path, key) for path, key in keys.items() if path not in current]
+
+    ok = True
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(lambda entry: _parse(entry[0], args), pending)
+        for (path, key), (parsed, output) in zip(pending, results):
+            if parsed:
+                current[path] = key
+            else:
+                ok = False
+                print(output, file=sys.stderr)
+
+    print(f'RTL check of {top}: parsed {len(pending)} of {len(files)} files.')
+
+    passed[top] = {'files': current}
+    if ok:
+        elaborated, output = _elaborate(top, files, ydirs, args)
+        if elaborated:
+            passed[top]['elab'] = elab_key
+        else:
+            ok = False
+            print(output, file=sys.stderr)
+
+    _save(cache_file, passed)
+
+    if not ok:
+        print(f'RTL check of {top} failed.', file=sys.stderr)
+    return ok
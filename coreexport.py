@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+'''
+Compact export of a built ZeroSoC core
+
+Holds only what integrating the core into the padring needs: its abstract
+views, netlist, timing libraries, parasitics and their hashes, plus the DRC
+and LVS excludes. Every key is its own member of a compressed zip file listed
+in a small index, so opening an export reads just the index and each key is
+read the first time it is asked for:
+
+    ./coreexport.py zerosoc_core.zip
+    ./coreexport.py old/zerosoc_core.zip zerosoc_core.zip
+'''
+
+import argparse
+import hashlib
+import json
+import os
+import zipfile
+
+EXPORT_FILE = 'zerosoc_core.zip'
+
+FORMAT_VERSION = 2
+
+_INDEX = 'index.json'
+
+
+def _keypaths(chip):
+    for fileset in chip.getkeys('output'):
+        for filetype in chip.getkeys('output', fileset):
+            yield ('output', fileset, filetype)
+    for tool in chip.getkeys('tool'):
+        for task in chip.getkeys('tool', tool, 'task'):
+            keypath = ('tool', tool, 'task', task, 'var', 'exclude')
+            if chip.valid(*keypath) and chip.get(*keypath):
+                yield keypath
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write(chip, path=EXPORT_FILE, manifest=None):
+    '''
+    Writes the integration view of the core chip to path, recording the hash
+    of the manifest it was taken from, if given.
+    '''
+    index = {'version': FORMAT_VERSION, 'design': chip.design, 'keys': {},
+             'manifest': _file_digest(manifest) if manifest else None}
+
+    tmp = f'{path}.tmp'
+    with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for i, keypath in enumerate(_keypaths(chip)):
+            node = {'value': chip.get(*keypath)}
+            if keypath[0] == 'output':
+                node['filehash'] = chip.get(*keypath, field='filehash')
+            data = json.dumps(node, sort_keys=True)
+
+            member = f'keys/{i}.json'
+            zf.writestr(member, data)
+            index['keys'][json.dumps(keypath)] = {
+                'member': member,
+                'digest': hashlib.sha256(data.encode()).hexdigest()
+            }
+        zf.writestr(_INDEX, json.dumps(index, sort_keys=True))
+    os.replace(tmp, path)
+
+
+class CoreExport:
+    '''
+    Read access to an export written by write().
+    '''
+
+    def __init__(self, path=EXPORT_FILE):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        index = json.loads(self._zip.read(_INDEX))
+        if index['version'] != FORMAT_VERSION:
+            self._zip.close()
+            raise ValueError(f"{path}: unsupported export version {index['version']}")
+
+        self.design = index['design']
+        self.manifest_digest = index['manifest']
+        self._keys = {tuple(json.loads(keypath)): entry
+                      for keypath, entry in index['keys'].items()}
+        self._nodes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def keypaths(self, *prefix):
+        '''
+        Returns the exported keypaths starting with prefix.
+        '''
+        return sorted(keypath for keypath in self._keys if keypath[:len(prefix)] == prefix)
+
+    def digest(self, *keypath):
+        return self._keys[keypath]['digest']
+
+    def node(self, *keypath):
+        '''
+        Returns the value and, for outputs, the file hashes of keypath.
+        '''
+        if keypath not in self._nodes:
+            self._nodes[keypath] = json.loads(self._zip.read(self._keys[keypath]['member']))
+        return self._nodes[keypath]
+
+    def get(self, *keypath):
+        return self.node(*keypath)['value']
+
+    def to_library(self, name=None, prefixes=((),)):
+        '''
+        Returns a siliconcompiler Library with the exported keys starting with
+        any of prefixes set, reading only those.
+        '''
+        import siliconcompiler
+
+        lib = siliconcompiler.Library(name or self.design)
+        for keypath in sorted({keypath for prefix in prefixes
+                               for keypath in self.keypaths(*prefix)}):
+            node = self.node(*keypath)
+            lib.set(*keypath, node['value'])
+            if 'filehash' in node:
+                lib.set(*keypath, node['filehash'], field='filehash')
+        return lib
+
+
+def is_current(path, manifest):
+    '''
+    Returns True if the export at path was taken from the manifest as it is
+    now. Modification times are not compared, as restoring a manifest from the
+    build cache keeps the time it was first written.
+    '''
+    if not os.path.exists(path):
+        return False
+    try:
+        with CoreExport(path) as export:
+            return export.manifest_digest == _file_digest(manifest)
+    except (ValueError, KeyError, zipfile.BadZipFile):
+        return False
+
+
+def _print_keys(export):
+    for keypath in export.keypaths():
+        print(' '.join(keypath))
+        for value in export.get(*keypath):
+            print(f'    {value}')
+
+
+def _diff(export_a, export_b):
+    keys_a = set(export_a.keypaths())
+    keys_b = set(export_b.keypaths())
+    keypaths = sorted(keys_a | keys_b)
+    changed = 0
+    for keypath in keypaths:
+        in_a = keypath in keys_a
+        in_b = keypath in keys_b
+        if in_a and in_b and export_a.digest(*keypath) == export_b.digest(*keypath):
+            continue
+        changed += 1
+        print(' '.join(keypath))
+        if in_a:
+            print(f'    - {export_a.get(*keypath)}')
+        if in_b:
+            print(f'    + {export_b.get(*keypath)}')
+    print(f'{changed} of {len(keypaths)} keys differ')
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Show or compare ZeroSoC core exports')
+    parser.add_argument('exports', nargs='+', metavar='EXPORT',
+                        help='Export to show, or two exports to compare.')
+    options = parser.parse_args()
+
+    if len(options.exports) > 2:
+        parser.error('at most two exports can be compared')
+
+    if len(options.exports) == 1:
+        with CoreExport(options.exports[0]) as export:
+            _print_keys(export)
+    else:
+        with CoreExport(options.exports[0]) as export_a, \
+                CoreExport(options.exports[1]) as export_b:
+            _diff(export_a, export_b)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,98 @@
+'''
+Per-corner timing views of a finished ZeroSoC core
+
+Instead of writing the .lib and .spef of every timing scenario one after the
+other in the write.views step, each scenario gets its own OpenROAD process
+that extracts parasitics, runs STA and writes a timing model, all running at
+the same time.
+'''
+
+import concurrent.futures
+import os
+import re
+import subprocess
+
+TCL_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'openroad', 'write_corner_views.tcl')
+
+_WNS_RE = re.compile(r'worst slack\s+(\S+)')
+
+
+def disable_flow_views(chip):
+    '''
+    Keeps the write.views step from writing the timing models and parasitics
+    that write_corner_views() produces instead.
+    '''
+    chip.set('tool', 'openroad', 'task', 'write_data', 'var', 'write_liberty', 'false')
+    chip.set('tool', 'openroad', 'task', 'write_data', 'var', 'write_spef', 'false')
+
+
+def _corner_libs(chip, libcorner):
+    libs = []
+    for lib in chip.get('asic', 'logiclib') + chip.get('asic', 'macrolib'):
+        if chip.valid('library', lib, 'output', libcorner, 'nldm'):
+            libs.extend(chip.find_files('library', lib, 'output', libcorner, 'nldm'))
+    return libs
+
+
+def _run_corner(chip, scenario, outdir, step):
+    design = chip.get('option', 'entrypoint') or chip.design
+    libcorner = chip.get('constraint', 'timing', scenario, 'libcorner')[0]
+    pexcorner = chip.get('constraint', 'timing', scenario, 'pexcorner')
+    pdk = chip.get('option', 'pdk')
+    stackup = chip.get('option', 'stackup')
+
+    os.makedirs(outdir, exist_ok=True)
+    env = dict(os.environ,
+               ZEROSOC_DESIGN=design,
+               ZEROSOC_OUTDIR=outdir,
+               ZEROSOC_LIBCORNER=libcorner,
+               ZEROSOC_PEXCORNER=pexcorner,
+               ZEROSOC_LIBS=' '.join(_corner_libs(chip, libcorner)),
+               ZEROSOC_ODB=chip.find_result('odb', step=step),
+               ZEROSOC_SDC=chip.find_result('sdc', step=step),
+               ZEROSOC_PEXMODEL=chip.find_files('pdk', pdk, 'pexmodel', 'openroad', stackup,
+                                                pexcorner)[0])
+
+    exe = chip.get('tool', 'openroad', 'exe')
+    with open(os.path.join(outdir, f'{design}.{libcorner}.log'), 'w') as log:
+        subprocess.run([exe, '-no_init', '-no_splash', '-exit', TCL_SCRIPT],
+                       env=env, stdout=log, stderr=subprocess.STDOUT, check=True)
+
+    wns = None
+    with open(os.path.join(outdir, f'{design}.{libcorner}.wns.rpt')) as f:
+        match = _WNS_RE.search(f.read())
+        if match:
+            wns = float(match.group(1))
+
+    return {
+        'libcorner': libcorner,
+        'pexcorner': pexcorner,
+        'lib': os.path.join(outdir, f'{design}.{libcorner}.lib'),
+        'spef': os.path.join(outdir, f'{design}.{pexcorner}.spef'),
+        'wns': wns
+    }
+
+
+def write_corner_views(chip, step='write.views', jobs=None):
+    '''
+    Generates the timing model and parasitics of every timing scenario of chip
+    from the design written by step, one OpenROAD process per scenario.
+    Returns a dict of scenario to its libcorner, pexcorner, lib, spef and
+    setup WNS.
+    '''
+    workdir = os.path.join(chip.getworkdir(), 'corners')
+    scenarios = chip.getkeys('constraint', 'timing')
+    if not scenarios:
+        return {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or len(scenarios)) as pool:
+        futures = {scenario: pool.submit(_run_corner, chip, scenario,
+                                         os.path.join(workdir, scenario), step)
+                   for scenario in scenarios}
+        views = {scenario: future.result() for scenario, future in futures.items()}
+
+    for scenario, view in sorted(views.items()):
+        print(f"{scenario}: {view['libcorner']} setup WNS = {view['wns']}")
+
+    return views
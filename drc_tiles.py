@@ -0,0 +1,130 @@
+'''
+Tiled, parallel Magic DRC
+
+Splits the die into overlapping windows and checks each one in its own Magic
+process. A violation is kept only by the window whose non-overlapping part
+contains its center, so violations seen by several windows are reported once.
+'''
+
+import concurrent.futures
+import json
+import os
+import subprocess
+
+# Default window size and overlap, in um. The overlap must exceed the largest
+# DRC interaction distance so every violation is seen whole by its owner.
+TILE_SIZE = 500
+TILE_OVERLAP = 20
+
+_SCRIPT = '''
+drc off
+gds noduplicates true
+{lefs}
+gds read {gds}
+load {top}
+select top cell
+set scale [cif scale out]
+box values {x0}um {y0}um {x1}um {y1}um
+drc on
+drc check
+drc catchup
+foreach {{why boxes}} [drc listall why] {{
+    foreach b $boxes {{
+        set um {{}}
+        foreach v $b {{ lappend um [format %.3f [expr {{$v * $scale}}]] }}
+        puts "VIOLATION|$why|$um"
+    }}
+}}
+quit -noprompt
+'''
+
+
+def tiles(outline, size=TILE_SIZE, overlap=TILE_OVERLAP):
+    '''
+    Returns the (window, owned area) boxes covering outline, each as
+    (x0, y0, x1, y1).
+    '''
+    (x_min, y_min), (x_max, y_max) = outline
+    result = []
+    y = y_min
+    while y < y_max:
+        x = x_min
+        while x < x_max:
+            owned = (x, y, min(x + size, x_max), min(y + size, y_max))
+            window = (max(owned[0] - overlap, x_min), max(owned[1] - overlap, y_min),
+                      min(owned[2] + overlap, x_max), min(owned[3] + overlap, y_max))
+            result.append((window, owned))
+            x += size
+        y += size
+    return result
+
+
+def _excluded_lefs(chip):
+    '''
+    LEF abstracts of the libraries excluded from DRC, which are read before the
+    GDS so Magic keeps their cells as abstract views and does not check them.
+    '''
+    stackup = chip.get('option', 'stackup')
+    lefs = []
+    for lib in chip.get('tool', 'magic', 'task', 'drc', 'var', 'exclude'):
+        if chip.valid('library', lib, 'output', stackup, 'lef'):
+            lefs.extend(chip.find_files('library', lib, 'output', stackup, 'lef'))
+    return lefs
+
+
+def _check_window(exe, techfile, script, workdir):
+    result = subprocess.run([exe, '-dnull', '-noconsole', '-T', techfile, script],
+                            cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            stdin=subprocess.DEVNULL, text=True, check=True)
+    violations = []
+    for line in result.stdout.splitlines():
+        if line.startswith('VIOLATION|'):
+            _, why, box = line.split('|', 2)
+            violations.append((why, tuple(float(v) for v in box.split())))
+    return violations
+
+
+def _owns(owned, box):
+    x = (box[0] + box[2]) / 2
+    y = (box[1] + box[3]) / 2
+    return owned[0] <= x < owned[2] and owned[1] <= y < owned[3]
+
+
+def run_drc(chip, gds, workdir, size=TILE_SIZE, overlap=TILE_OVERLAP, jobs=None):
+    '''
+    Runs Magic DRC on gds window by window in a process pool and writes the
+    merged violations to workdir. Returns the number of violations.
+    '''
+    pdk = chip.get('option', 'pdk')
+    stackup = chip.get('option', 'stackup')
+    techfile = chip.find_files('pdk', pdk, 'drc', 'runset', 'magic', stackup, 'basic')[0]
+    exe = chip.get('tool', 'magic', 'exe')
+    top = chip.get('option', 'entrypoint') or chip.design
+    lefs = '\n'.join(f'lef read {lef}' for lef in _excluded_lefs(chip))
+
+    os.makedirs(workdir, exist_ok=True)
+    windows = tiles(chip.get('constraint', 'outline'), size=size, overlap=overlap)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = []
+        for i, (window, _) in enumerate(windows):
+            script = os.path.join(workdir, f'tile{i}.tcl')
+            x0, y0, x1, y1 = window
+            with open(script, 'w') as f:
+                f.write(_SCRIPT.format(lefs=lefs, gds=os.path.abspath(gds), top=top,
+                                       x0=x0, y0=y0, x1=x1, y1=y1))
+            futures.append(pool.submit(_check_window, exe, techfile, script, workdir))
+
+        violations = set()
+        for (_, owned), future in zip(windows, futures):
+            violations.update(v for v in future.result() if _owns(owned, v[1]))
+
+    violations = sorted(violations)
+    with open(os.path.join(workdir, f'{top}.drc.json'), 'w') as f:
+        json.dump([{'rule': why, 'box': box} for why, box in violations], f, indent=2)
+    with open(os.path.join(workdir, f'{top}.drc.rpt'), 'w') as f:
+        f.write(f'{top}: {len(violations)} DRC violations in {len(windows)} windows\n')
+        for why, box in violations:
+            f.write(f"{why}: {' '.join(f'{v:.3f}' for v in box)}\n")
+
+    return len(violations)
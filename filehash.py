@@ -0,0 +1,113 @@
+'''
+Persistent file hash cache
+'''
+
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import sqlite3
+
+CACHE_FILE = os.path.join('build', 'cache', 'filehash.sqlite')
+
+# Files at least this large are hashed through a memory map
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+
+def _digest(path, algo):
+    hasher = hashlib.new(algo)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                hasher.update(data)
+        else:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class HashCache:
+    '''
+    Hashes files, remembering each result against the file's (path, size,
+    mtime, inode) so unchanged files are never read again.
+    '''
+
+    def __init__(self, path=CACHE_FILE, jobs=None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.jobs = jobs
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS files ('
+                        'path TEXT, algo TEXT, size INTEGER, mtime_ns INTEGER, inode INTEGER, '
+                        'digest TEXT, PRIMARY KEY (path, algo))')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def hash_files(self, paths, algo='sha256'):
+        '''
+        Returns the hex digests of paths, in order. Files not in the cache are
+        hashed concurrently on a thread pool.
+        '''
+        paths = [os.path.abspath(path) for path in paths]
+        stats = {path: _stat_key(path) for path in paths}
+
+        digests = {}
+        for path in set(paths):
+            row = self.db.execute('SELECT size, mtime_ns, inode, digest FROM files '
+                                  'WHERE path = ? AND algo = ?', (path, algo)).fetchone()
+            if row and tuple(row[:3]) == stats[path]:
+                digests[path] = row[3]
+
+        missing = [path for path in set(paths) if path not in digests]
+        if missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                for path, digest in zip(missing, pool.map(lambda p: _digest(p, algo), missing)):
+                    digests[path] = digest
+
+            with self.db:
+                self.db.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                                    [(path, algo, *stats[path], digests[path])
+                                     for path in missing])
+
+        return [digests[path] for path in paths]
+
+    def hash_file(self, path, algo='sha256'):
+        return self.hash_files([path], algo=algo)[0]
+
+
+def hash_keypaths(chip, keypaths, cache=None):
+    '''
+    Cached replacement for calling chip.hash_files() on each of keypaths. All
+    files are hashed as one batch, and the hashes are recorded in the
+    'filehash' field of each keypath.
+    '''
+    if not cache:
+        with HashCache() as new_cache:
+            return hash_keypaths(chip, keypaths, cache=new_cache)
+
+    batches = {}
+    for keypath in keypaths:
+        paths = chip.find_files(*keypath)
+        if any(os.path.isdir(path) for path in paths):
+            chip.hash_files(*keypath)
+            continue
+        algo = chip.get(*keypath, field='hashalgo')
+        batches.setdefault(algo, []).append((keypath, paths))
+
+    for algo, entries in batches.items():
+        hashes = cache.hash_files([path for _, paths in entries for path in paths], algo=algo)
+        for keypath, paths in entries:
+            chip.set(*keypath, hashes[:len(paths)], field='filehash')
+            hashes = hashes[len(paths):]
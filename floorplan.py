@@ -1,4 +1,7 @@
+import functools
+import math
 import os
+import re
 
 GPIO = 'sky130_ef_io__gpiov2_pad_wrapped'
 VDD = 'sky130_ef_io__vccd_hvc_pad'
@@ -12,103 +15,127 @@ FILL_CELLS = ['sky130_ef_io__com_bus_slice_1um',
               'sky130_ef_io__com_bus_slice_20um']
 
 
+# Default outlines, sized for a single SRAM macro
+CORE_W = 1700
+CORE_H = 1200
+TOP_W = 2300
+TOP_H = 1800
+
+# Space kept free around each additional SRAM macro for routing and its power
+# connections, in um
+SRAM_CHANNEL = 40
+
+
 def define_io_placement():
     io = [GPIO] * 9 + [VSSIO, VDDIO, VDD, VSS]
 
     return io, io, io, io
 
 
-def generate_core_pins(chip):
-    # Place pins
-    pins = [
-        # (name, offset from cell edge, # bit in vector, width of vector)
-        ('tech_cfg', 16, 18),  # tie_lo_esd
-        ('tech_cfg', 17, 18),  # tie_hi_esd
-
-        ('din', 0, 1),  # in
-        ('tech_cfg', 5, 18),  # enable_vddio
-        ('tech_cfg', 8, 18),  # slow
-        ('tech_cfg', 14, 18),  # dm[1]
-        ('tech_cfg', 10, 18),  # analog_en
-        ('tech_cfg', 13, 18),  # dm[0]
-        ('tech_cfg', 12, 18),  # analog_pol
-        ('ie', 0, 1),  # inp_dis
-        ('tech_cfg', 2, 18),  # enable_inp_h
-        ('tech_cfg', 1, 18),  # enable_h
-        ('tech_cfg', 0, 18),  # hld_h_n
-        ('tech_cfg', 11, 18),  # analog_sel
-        ('tech_cfg', 15, 18),  # dm[2]
-        ('tech_cfg', 9, 18),  # hld_ovr
-        ('dout', 0, 1),  # out
-        ('tech_cfg', 4, 18),  # enable_vswitch_h
-        ('tech_cfg', 3, 18),  # enable_vdda_h
-        ('tech_cfg', 7, 18),  # vtrip_sel
-        ('tech_cfg', 6, 18),  # ib_mode_sel
-        ('oen', 0, 1),  # oe_n
-    ]
-    pins = list(reversed(pins))
+# Core pins connected to each GPIO pad
+# (name, # bit in vector, width of vector)
+GPIO_PINS = (
+    ('tech_cfg', 16, 18),  # tie_lo_esd
+    ('tech_cfg', 17, 18),  # tie_hi_esd
+
+    ('din', 0, 1),  # in
+    ('tech_cfg', 5, 18),  # enable_vddio
+    ('tech_cfg', 8, 18),  # slow
+    ('tech_cfg', 14, 18),  # dm[1]
+    ('tech_cfg', 10, 18),  # analog_en
+    ('tech_cfg', 13, 18),  # dm[0]
+    ('tech_cfg', 12, 18),  # analog_pol
+    ('ie', 0, 1),  # inp_dis
+    ('tech_cfg', 2, 18),  # enable_inp_h
+    ('tech_cfg', 1, 18),  # enable_h
+    ('tech_cfg', 0, 18),  # hld_h_n
+    ('tech_cfg', 11, 18),  # analog_sel
+    ('tech_cfg', 15, 18),  # dm[2]
+    ('tech_cfg', 9, 18),  # hld_ovr
+    ('dout', 0, 1),  # out
+    ('tech_cfg', 4, 18),  # enable_vswitch_h
+    ('tech_cfg', 3, 18),  # enable_vdda_h
+    ('tech_cfg', 7, 18),  # vtrip_sel
+    ('tech_cfg', 6, 18),  # ib_mode_sel
+    ('oen', 0, 1),  # oe_n
+)
+
+# Pin name prefix and constraint side of each side, in define_io_placement() order
+PIN_SIDES = (('we', 1), ('no', 2), ('ea', 3), ('so', 4))
+
+
+@functools.lru_cache(maxsize=None)
+def plan_core_pins(pads, pins=GPIO_PINS):
+    '''
+    Returns the (name, side, order) of every core pin for the pads on each side,
+    given as a tuple of one tuple of pad cells per side. Orders count down
+    from the last pin on a side to 1, following the pads.
+    '''
+    pins = pins[::-1]
+
+    plan = []
+    for (prefix, side), side_pads in zip(PIN_SIDES, pads):
+        gpios = side_pads.count(GPIO)
+        side_pins = len(pins) * gpios
+        for i in range(gpios):
+            for pin_order, (pin, bit, width) in enumerate(pins):
+                # Construct name based on side, pin name, and bit # in vector
+                name = f'{prefix}_{pin}[{i * width + bit}]'
+                plan.append((name, side, side_pins - (len(pins) * i + pin_order)))
+
+    _check_pin_plan(plan)
+
+    return tuple(plan)
+
+
+def _check_pin_plan(plan):
+    names = [name for name, _, _ in plan]
+    if len(set(names)) != len(names):
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        raise ValueError(f'Duplicate core pins: {", ".join(duplicates)}')
+
+    for _, side in PIN_SIDES:
+        orders = sorted(order for _, pin_side, order in plan if pin_side == side)
+        if orders != list(range(1, len(orders) + 1)):
+            raise ValueError(f'Pin orders on side {side} are not contiguous')
 
-    we_pads, no_pads, ea_pads, so_pads = define_io_placement()
-
-    # Filter out GPIO pins
-    ea_pins = len(pins) * ea_pads.count(GPIO)
-    for i in range(ea_pads.count(GPIO)):
-        order_offset = len(pins) * i
-        for pin_order, pin_spec in enumerate(pins):
-            pin, bit, width = pin_spec
-            # Construct name based on side, pin name, and bit # in vector
-            name = f'we_{pin}[{i * width + bit}]'
-            chip.set('constraint', 'pin', name, 'side', 1)
-            chip.set('constraint', 'pin', name, 'order', ea_pins - (order_offset + pin_order))
-
-    # Repeat the same logic for each of the other 3 sides, with positions/axes
-    # adjusted accordingly...
-    no_pins = len(pins) * no_pads.count(GPIO)
-    for i in range(no_pads.count(GPIO)):
-        order_offset = len(pins) * i
-        for pin_order, pin_spec in enumerate(pins):
-            pin, bit, width = pin_spec
-            # Construct name based on side, pin name, and bit # in vector
-            name = f'no_{pin}[{i * width + bit}]'
-            chip.set('constraint', 'pin', name, 'side', 2)
-            chip.set('constraint', 'pin', name, 'order', no_pins - (order_offset + pin_order))
-
-    we_pins = len(pins) * we_pads.count(GPIO)
-    for i in range(we_pads.count(GPIO)):
-        order_offset = len(pins) * i
-        for pin_order, pin_spec in enumerate(pins):
-            pin, bit, width = pin_spec
-            # Construct name based on side, pin name, and bit # in vector
-            name = f'ea_{pin}[{i * width + bit}]'
-            chip.set('constraint', 'pin', name, 'side', 3)
-            chip.set('constraint', 'pin', name, 'order', we_pins - (order_offset + pin_order))
-
-    so_pins = len(pins) * so_pads.count(GPIO)
-    for i in range(so_pads.count(GPIO)):
-        order_offset = len(pins) * i
-        for pin_order, pin_spec in enumerate(pins):
-            pin, bit, width = pin_spec
-            # Construct name based on side, pin name, and bit # in vector
-            name = f'so_{pin}[{i * width + bit}]'
-            chip.set('constraint', 'pin', name, 'side', 4)
-            chip.set('constraint', 'pin', name, 'order', so_pins - (order_offset + pin_order))
 
+def generate_core_pins(chip):
+    pads = tuple(tuple(side_pads) for side_pads in define_io_placement())
 
-def __configure_padring_side(chip, side_pads, side_name):
+    # Place pins
+    for name, side, order in plan_core_pins(pads):
+        chip.set('constraint', 'pin', name, 'side', side)
+        chip.set('constraint', 'pin', name, 'order', order)
+
+
+# Generate block and pad instance of each pad cell in la_iopadring
+PAD_NAME_MAP = {
+    GPIO: ('gbidir', 'gpio'),
+    VDD: ('gvdd', 'iovdd'),
+    VDDIO: ('gvddio', 'iovddio'),
+    VSS: ('gvss', 'iovss'),
+    VSSIO: ('gvssio', 'iovssio')
+}
+
+
+def padring_side_names(side_pads, side_name):
+    '''
+    Returns the instance name patterns padring.tcl looks up for the pads of
+    one side.
+    '''
     pad_name_prefix = f'padring.i{side_name}.ipad'
     pad_name_suffix = '.i0.'
 
-    pad_name_map = {
-        GPIO: ('gbidir', 'gpio'),
-        VDD: ('gvdd', 'iovdd'),
-        VDDIO: ('gvddio', 'iovddio'),
-        VSS: ('gvss', 'iovss'),
-        VSSIO: ('gvssio', 'iovssio')
-    }
-
+    names = []
     for i, pad_type in enumerate(side_pads):
-        pad_type_name, pad_type_inst = pad_name_map[pad_type]
-        pad_name = fr'{pad_name_prefix}\[{i}\]*.{pad_type_name}{pad_name_suffix}{pad_type_inst}'
+        pad_type_name, pad_type_inst = PAD_NAME_MAP[pad_type]
+        names.append(fr'{pad_name_prefix}\[{i}\]*.{pad_type_name}{pad_name_suffix}{pad_type_inst}')
+    return names
+
+
+def __configure_padring_side(chip, side_pads, side_name):
+    for pad_name in padring_side_names(side_pads, side_name):
         chip.add('tool', 'openroad', 'task', 'init_floorplan', 'var', f'padring_{side_name}_name',
                  pad_name)
 
@@ -126,11 +153,34 @@ def configure_padring(chip):
     __configure_padring_side(chip, so_pads, 'south')
 
 
-def generate_core_outline(chip):
+def lef_size(path):
+    '''
+    Returns the width and height of the first macro in a LEF file.
+    '''
+    with open(path) as f:
+        for line in f:
+            match = re.match(r'\s*SIZE\s+([\d.]+)\s+BY\s+([\d.]+)', line)
+            if match:
+                return float(match.group(1)), float(match.group(2))
+    raise ValueError(f'{path}: no macro SIZE')
+
+
+def sram_growth(sram_size, macros):
+    '''
+    Returns how much wider and taller the default core outline has to be to
+    fit macros SRAM macros of sram_size instead of one, at the same aspect
+    ratio. The top outlines grow by as much.
+    '''
+    if macros <= 1:
+        return 0, 0
+    width, height = sram_size
+    area = (macros - 1) * (width + 2 * SRAM_CHANNEL) * (height + 2 * SRAM_CHANNEL)
+    scale = math.sqrt(1 + area / (CORE_W * CORE_H))
+    return math.ceil(CORE_W * (scale - 1)), math.ceil(CORE_H * (scale - 1))
+
+
+def generate_core_outline(chip, core_w=CORE_W, core_h=CORE_H, core_margin=10):
     # Set up die area
-    core_w = 1700
-    core_h = 1200
-    core_margin = 10
     diearea = [(0, 0), (core_w, core_h)]
     corearea = [(core_margin, core_margin), (core_w - core_margin, core_h - core_margin)]
 
@@ -138,8 +188,8 @@ def generate_core_outline(chip):
     chip.set('constraint', 'corearea', corearea)
 
 
-def generate_core_floorplan(chip):
-    generate_core_outline(chip)
+def generate_core_floorplan(chip, **outline):
+    generate_core_outline(chip, **outline)
     generate_core_pins(chip)
 
     # Global connections
@@ -157,25 +207,31 @@ def generate_core_floorplan(chip):
         chip.add('tool', 'openroad', 'task', 'power_grid', 'file', 'pdn_config', pdngen_path)
 
 
-def generate_top_outline(chip):
+def generate_top_outline(chip, top_w=TOP_W, top_h=TOP_H, core_offset=220):
     # Create die area
-    top_w = 2300
-    top_h = 1800
-
     io_offset = 10
-    core_offset = 220
     margin = core_offset + io_offset
     chip.set('constraint', 'outline', [(0, 0), (top_w, top_h)])
     chip.set('constraint', 'corearea', [(margin, margin), (top_w - margin, top_h - margin)])
 
 
+def top_outline(core_size):
+    '''
+    Returns the top outline arguments that fit a core of core_size, grown
+    from the default outline by as much as the core is larger than default.
+    '''
+    core_w, core_h = core_size
+    return {'top_w': max(TOP_W, math.ceil(core_w) + TOP_W - CORE_W),
+            'top_h': max(TOP_H, math.ceil(core_h) + TOP_H - CORE_H)}
+
+
 def generate_top_placement(chip):
     # Place core
     chip.set('constraint', 'component', 'core', 'placement', (300, 300))
 
 
-def generate_top_floorplan(chip):
-    generate_top_outline(chip)
+def generate_top_floorplan(chip, **outline):
+    generate_top_outline(chip, **outline)
     generate_top_placement(chip)
     configure_padring(chip)
 
@@ -190,8 +246,8 @@ def generate_top_floorplan(chip):
         chip.add('tool', 'openroad', 'task', 'power_grid', 'file', 'pdn_config', pdngen_file)
 
 
-def generate_top_flat_floorplan(chip):
-    generate_top_outline(chip)
+def generate_top_flat_floorplan(chip, **outline):
+    generate_top_outline(chip, **outline)
     configure_padring(chip)
 
     # Global connections
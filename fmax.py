@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+'''
+ZeroSoC maximum frequency search
+'''
+
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+
+import incremental
+import make
+import resources
+
+# Setup function and current clock period (ns) of each design
+DESIGNS = {
+    'core': ('_setup_core', 66),
+    'top-flat': ('_setup_top_flat', 60)
+}
+
+# Timing checkpoints: (tool and task of the step, setup WNS deficit still
+# considered recoverable, as a fraction of the clock period). A run whose WNS is
+# worse than this at a checkpoint is abandoned, and the last checkpoint must
+# meet timing.
+STAGES = (
+    (('openroad', 'detailed_placement'), 0.05),
+    (('openroad', 'clock_tree_synthesis'), 0.02),
+    (('openroad', 'detailed_route'), 0.0)
+)
+
+
+def _jobname(period):
+    return f'fmax_{period:g}'.replace('.', 'p')
+
+
+def _timing_report(chip, step):
+    flow = chip.get('option', 'flow')
+    tool = chip.get('flowgraph', flow, step, '0', 'tool')
+    task = chip.get('flowgraph', flow, step, '0', 'task')
+    reports = chip.get('tool', tool, 'task', task, 'report', 'setupwns', step=step, index='0')
+    if not reports:
+        return None
+    return os.path.abspath(os.path.join(chip.getworkdir(step=step, index='0'), reports[0]))
+
+
+def _run_candidate(design, period, results):
+    # Own process group, so the whole tool tree can be killed if this run loses
+    os.setsid()
+
+    setup, _ = DESIGNS[design]
+    chip = getattr(make, setup)(period=period)
+    chip.set('option', 'jobname', _jobname(period))
+    chip.set('option', 'quiet', True)
+
+    for task, margin in STAGES:
+        step = incremental.task_steps(chip, *task)[-1]
+        chip.set('option', 'to', [step])
+        with resources.reserve(chip):
+            chip.run()
+
+        wns = chip.get('metric', 'setupwns', step=step, index='0')
+        if wns is None or wns < -margin * period:
+            results.put((period, step, wns, False, _timing_report(chip, step)))
+            return
+        results.put((period, step, wns, None, None))
+
+    results.put((period, step, wns, True, _timing_report(chip, step)))
+
+
+def _kill(proc):
+    if proc.is_alive():
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    proc.join()
+
+
+def _check_crashed(procs, outcome):
+    for period, proc in procs.items():
+        if period not in outcome and proc.exitcode not in (None, 0):
+            print(f'{period:g} ns: run failed', file=sys.stderr)
+            outcome[period] = ('fail', None, None)
+
+
+def _race(design, periods):
+    '''
+    Runs all periods at once. Once a period closes timing, longer periods are
+    cancelled; once a period fails, shorter periods are cancelled.
+
+    Returns a dict of period to (status, wns, report), where status is one of
+    'pass', 'fail' or 'cancelled'.
+    '''
+    results = multiprocessing.Queue()
+    procs = {}
+    try:
+        for period in periods:
+            proc = multiprocessing.Process(target=_run_candidate, args=(design, period, results))
+            proc.start()
+            procs[period] = proc
+        return _collect(procs, results)
+    finally:
+        # Also on Ctrl-C or an error, so no run is left behind with its tools
+        for proc in procs.values():
+            _kill(proc)
+
+
+def _collect(procs, results):
+    outcome = {}
+    while len(outcome) < len(procs):
+        try:
+            period, step, wns, passed, report = results.get(timeout=10)
+        except queue.Empty:
+            _check_crashed(procs, outcome)
+            continue
+
+        print(f'{period:g} ns: {step} setup WNS = {wns}')
+        if passed is None:
+            continue
+
+        outcome[period] = ('pass' if passed else 'fail', wns, report)
+        procs[period].join()
+
+        for other, proc in procs.items():
+            if other in outcome:
+                continue
+            if (passed and other > period) or (not passed and other < period):
+                _kill(proc)
+                outcome[other] = ('cancelled', None, None)
+
+    return outcome
+
+
+def _candidates(lo, hi, parallel, include_hi):
+    if include_hi:
+        step = (hi - lo) / parallel
+        return [round(hi - i * step, 3) for i in range(parallel)]
+    step = (hi - lo) / (parallel + 1)
+    return [round(lo + (i + 1) * step, 3) for i in range(parallel)]
+
+
+def search(design, lo, hi, parallel=4, resolution=1.0):
+    '''
+    Racing bisection between lo and hi ns. Returns the tightest passing period
+    and the results of every evaluated period.
+    '''
+    evaluated = {}
+    best = None
+    while hi - lo > resolution:
+        periods = [p for p in _candidates(lo, hi, parallel, best is None) if p not in evaluated]
+        if not periods:
+            break
+        evaluated.update(_race(design, periods))
+
+        passing = [p for p, (status, _, _) in evaluated.items() if status == 'pass']
+        if not passing:
+            break
+        best = min(passing)
+        hi = best
+
+        # Cancelled runs below a failure are assumed to fail as well
+        failing = [p for p, (status, _, _) in evaluated.items() if status != 'pass' and p < hi]
+        lo = max(failing, default=lo)
+
+    return best, evaluated
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Find the shortest clock period ZeroSoC closes at')
+    parser.add_argument('--design',
+                        choices=sorted(DESIGNS),
+                        default='core',
+                        help='Design to search.')
+    parser.add_argument('--min',
+                        type=float,
+                        default=20.0,
+                        help='Lower bound of the period search in ns.')
+    parser.add_argument('--max',
+                        type=float,
+                        help='Upper bound of the period search in ns '
+                             '(default: the current period of the design).')
+    parser.add_argument('--parallel',
+                        type=int,
+                        default=4,
+                        help='Number of periods to run at the same time.')
+    parser.add_argument('--resolution',
+                        type=float,
+                        default=1.0,
+                        help='Stop once the bounds are this close, in ns.')
+    options = parser.parse_args()
+
+    if options.max is None:
+        _, options.max = DESIGNS[options.design]
+
+    best, evaluated = search(options.design, options.min, options.max,
+                             parallel=options.parallel,
+                             resolution=options.resolution)
+
+    for period, (status, wns, _) in sorted(evaluated.items()):
+        print(f'{period:>10g} ns  {status:<9}  WNS = {wns}')
+
+    if best is None:
+        print(f'No period up to {options.max:g} ns closed timing.', file=sys.stderr)
+        sys.exit(1)
+
+    _, wns, report = evaluated[best]
+    print(f'Tightest passing period: {best:g} ns ({1000 / best:.2f} MHz), WNS = {wns}')
+    if report:
+        print(f'Timing report: {report}')
+
+
+if __name__ == '__main__':
+    _main()
@@ -37,6 +37,12 @@ module asic_core (
     // Instantiate SoC
     zerosoc #(
         .RamDepth(`RAM_DEPTH),
+        .RamBanks(`RAM_BANKS),
+        .RamTileDepth(`RAM_TILE_DEPTH),
+        .IbexRV32M(`IBEX_RV32M),
+        .IbexBranchTargetALU(`IBEX_BRANCH_TARGET_ALU),
+        .IbexWritebackStage(`IBEX_WRITEBACK_STAGE),
+        .IbexPipeLine(`IBEX_PIPELINE),
         .ASIC(1)
     ) soc (
         .clk_i(clk),
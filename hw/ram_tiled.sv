@@ -0,0 +1,78 @@
+// RAM of Depth 32 bit words built from Depth / TileDepth tiles, each of which
+// maps to one SRAM macro in ASIC builds. The top address bits select a tile,
+// and the selection is registered to steer the read data back a cycle later.
+//
+// With SplitInit, tile t loads its slice of the image from MemInitFile
+// followed by "_" and the two digit index FirstTile + t, as split by
+// sw/Makefile. Otherwise the single tile loads MemInitFile.
+module ram_tiled #(
+  parameter int Depth = 512,
+  parameter int TileDepth = Depth,
+  parameter     MemInitFile = "",
+  parameter bit SplitInit = 0,
+  parameter int FirstTile = 0,
+
+  localparam int Aw = $clog2(Depth)
+) (
+  input               clk_i,
+  input               rst_ni,
+
+  input               req_i,
+  input               write_i,
+  input  [Aw-1:0]     addr_i,
+  input  [31:0]       wdata_i,
+  input  [31:0]       wmask_i,
+  output logic [31:0] rdata_o,
+  output logic        rvalid_o
+);
+
+  localparam int Tiles = Depth / TileDepth;
+  localparam int TileAw = $clog2(TileDepth);
+  localparam int TileSelW = Tiles > 1 ? $clog2(Tiles) : 1;
+
+  logic [TileSelW-1:0] tile_sel;
+  logic [TileSelW-1:0] tile_sel_q;
+  logic [31:0]         tile_rdata [Tiles];
+  logic [Tiles-1:0]    tile_rvalid;
+
+  assign tile_sel = Tiles > 1 ? addr_i[Aw-1 -: TileSelW] : '0;
+
+  always_ff @(posedge clk_i or negedge rst_ni) begin
+    if (!rst_ni) begin
+      tile_sel_q <= '0;
+    end else if (req_i) begin
+      tile_sel_q <= tile_sel;
+    end
+  end
+
+  for (genvar t = 0; t < Tiles; t++) begin : gen_tile
+    localparam int Index = FirstTile + t;
+    localparam TileInitFile = MemInitFile == "" || !SplitInit ? MemInitFile :
+        {MemInitFile, "_", 8'(8'h30 + Index / 10), 8'(8'h30 + Index % 10)};
+
+    prim_ram_1p_adv #(
+      .Width(32),
+      .Depth(TileDepth),
+      .DataBitsPerMask(8),
+      .MemInitFile(TileInitFile)
+    ) u_tile (
+      .clk_i    (clk_i),
+      .rst_ni   (rst_ni),
+
+      .req_i    (req_i && tile_sel == TileSelW'(t)),
+      .write_i  (write_i),
+      .addr_i   (addr_i[TileAw-1:0]),
+      .wdata_i  (wdata_i),
+      .wmask_i  (wmask_i),
+      .rdata_o  (tile_rdata[t]),
+      .rvalid_o (tile_rvalid[t]),
+      .rerror_o (), // tied to zero, not important
+
+      .cfg_i(8'b0) // currently unused
+    );
+  end
+
+  assign rdata_o = tile_rdata[tile_sel_q];
+  assign rvalid_o = |tile_rvalid;
+
+endmodule
@@ -43,6 +43,10 @@ module top_icebreaker (
     zerosoc #(
         .RamInitFile(`MAKE_MEM_PATH(random.mem)),
         .RamDepth(2048),
+        .IbexRV32M(`IBEX_RV32M),
+        .IbexBranchTargetALU(`IBEX_BRANCH_TARGET_ALU),
+        .IbexWritebackStage(`IBEX_WRITEBACK_STAGE),
+        .IbexPipeLine(`IBEX_PIPELINE),
         .ASIC(0)
     ) soc(
         .clk_i(clk_6mhz),
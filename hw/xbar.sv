@@ -1,12 +1,18 @@
-module xbar (
+module xbar #(
+    // RAM size in 32 bit words and number of banks it is split into, the banks
+    // are contiguous and each gets its own arbiter so that instruction fetches
+    // and data accesses to different banks go ahead in the same cycle
+    parameter int RamDepth = 512,
+    parameter int RamBanks = 1
+  ) (
     input clk_i,
     input rst_ni,
     input tlul_pkg::tl_h2d_t tl_corei_i,
     output tlul_pkg::tl_d2h_t tl_corei_o,
     input tlul_pkg::tl_h2d_t tl_cored_i,
     output tlul_pkg::tl_d2h_t tl_cored_o,
-    output tlul_pkg::tl_h2d_t tl_ram_o,
-    input tlul_pkg::tl_d2h_t tl_ram_i,
+    output tlul_pkg::tl_h2d_t tl_ram_o [RamBanks],
+    input tlul_pkg::tl_d2h_t tl_ram_i [RamBanks],
     output tlul_pkg::tl_h2d_t tl_uart_o,
     input tlul_pkg::tl_d2h_t tl_uart_i,
     output tlul_pkg::tl_h2d_t tl_gpio_o,
@@ -15,41 +21,51 @@ module xbar (
   import tlul_pkg::*;
   import xbar_pkg::*;
 
-  tl_h2d_t tl_dmem_out_arb_h2d [3];
-  tl_d2h_t tl_dmem_out_arb_d2h [3];
-  tl_h2d_t tl_ram_in_arb_h2d [2];
-  tl_d2h_t tl_ram_in_arb_d2h [2];
+  // The RAM space is never smaller than ADDR_MASK_RAM, smaller RAMs alias in it
+  localparam logic [31:0] RamMask = RamDepth * 4 - 1 > ADDR_MASK_RAM ?
+                                    RamDepth * 4 - 1 : ADDR_MASK_RAM;
+  // Banks are selected by the address bits above the bytes of one bank
+  localparam int BankOffset = $clog2(RamDepth / RamBanks) + 2;
+  localparam int BankSelW = RamBanks > 1 ? $clog2(RamBanks) : 1;
 
-  assign tl_ram_in_arb_h2d[0] = tl_dmem_out_arb_h2d[0];
-  assign tl_dmem_out_arb_d2h[0] = tl_ram_in_arb_d2h[0];
-  assign tl_ram_in_arb_h2d[1] = tl_corei_i;
-  assign tl_corei_o = tl_ram_in_arb_d2h[1];
+  // Data port devices: the RAM banks, then GPIO and UART
+  localparam int DmemN = RamBanks + 2;
+  localparam int DmemSelW = $clog2(DmemN + 1);
+  localparam int ImemSelW = $clog2(RamBanks + 1);
 
-  assign tl_gpio_o = tl_dmem_out_arb_h2d[1];
-  assign tl_dmem_out_arb_d2h[1] = tl_gpio_i;
-  assign tl_uart_o = tl_dmem_out_arb_h2d[2];
-  assign tl_dmem_out_arb_d2h[2] = tl_uart_i;
+  tl_h2d_t tl_dmem_out_arb_h2d [DmemN];
+  tl_d2h_t tl_dmem_out_arb_d2h [DmemN];
+  tl_h2d_t tl_imem_out_arb_h2d [RamBanks];
+  tl_d2h_t tl_imem_out_arb_d2h [RamBanks];
 
-  logic [1:0] dev_sel_dmem_out_arb;
+  assign tl_gpio_o = tl_dmem_out_arb_h2d[RamBanks];
+  assign tl_dmem_out_arb_d2h[RamBanks] = tl_gpio_i;
+  assign tl_uart_o = tl_dmem_out_arb_h2d[RamBanks + 1];
+  assign tl_dmem_out_arb_d2h[RamBanks + 1] = tl_uart_i;
+
+  logic [BankSelW-1:0] cored_bank;
+  logic [DmemSelW-1:0] dev_sel_dmem_out_arb;
+
+  assign cored_bank = RamBanks > 1 ? tl_cored_i.a_address[BankOffset +: BankSelW] : '0;
 
   always_comb begin
     // default steering to generate error response if address is not within the range
-    dev_sel_dmem_out_arb = 2'd3;
-    if ((tl_cored_i.a_address & ~(ADDR_MASK_RAM)) == ADDR_SPACE_RAM) begin
-      dev_sel_dmem_out_arb = 2'd0;
+    dev_sel_dmem_out_arb = DmemSelW'(DmemN);
+    if ((tl_cored_i.a_address & ~(RamMask)) == ADDR_SPACE_RAM) begin
+      dev_sel_dmem_out_arb = DmemSelW'(cored_bank);
     end else if ((tl_cored_i.a_address & ~(ADDR_MASK_GPIO)) == ADDR_SPACE_GPIO) begin
-      dev_sel_dmem_out_arb = 2'd1;
+      dev_sel_dmem_out_arb = DmemSelW'(RamBanks);
     end else if ((tl_cored_i.a_address & ~(ADDR_MASK_UART)) == ADDR_SPACE_UART) begin
-      dev_sel_dmem_out_arb = 2'd2;
+      dev_sel_dmem_out_arb = DmemSelW'(RamBanks + 1);
     end
   end
 
   tlul_socket_1n #(
     .HReqDepth (4'h0),
     .HRspDepth (4'h0),
-    .DReqDepth (16'h0),
-    .DRspDepth (16'h0),
-    .N         (3)
+    .DReqDepth ({DmemN{4'h0}}),
+    .DRspDepth ({DmemN{4'h0}}),
+    .N         (DmemN)
   ) dmem_out_arb (
     .clk_i        (clk_i),
     .rst_ni       (rst_ni),
@@ -60,19 +76,64 @@ module xbar (
     .dev_select_i (dev_sel_dmem_out_arb)
   );
 
-  tlul_socket_m1 #(
-    .HReqDepth (12'h0),
-    .HRspDepth (12'h0),
-    .DReqDepth (4'h0),
-    .DRspDepth (4'h0),
-    .M         (2)
-  ) ram_in_arb (
-    .clk_i        (clk_i),
-    .rst_ni       (rst_ni),
-    .tl_h_i       (tl_ram_in_arb_h2d),
-    .tl_h_o       (tl_ram_in_arb_d2h),
-    .tl_d_i       (tl_ram_i),
-    .tl_d_o       (tl_ram_o)
-  );
+  if (RamBanks > 1) begin : gen_imem_out_arb
+    logic [BankSelW-1:0] corei_bank;
+    logic [ImemSelW-1:0] dev_sel_imem_out_arb;
+
+    assign corei_bank = tl_corei_i.a_address[BankOffset +: BankSelW];
+
+    always_comb begin
+      // default steering to generate error response if address is not within the range
+      dev_sel_imem_out_arb = ImemSelW'(RamBanks);
+      if ((tl_corei_i.a_address & ~(RamMask)) == ADDR_SPACE_RAM) begin
+        dev_sel_imem_out_arb = ImemSelW'(corei_bank);
+      end
+    end
+
+    tlul_socket_1n #(
+      .HReqDepth (4'h0),
+      .HRspDepth (4'h0),
+      .DReqDepth ({RamBanks{4'h0}}),
+      .DRspDepth ({RamBanks{4'h0}}),
+      .N         (RamBanks)
+    ) imem_out_arb (
+      .clk_i        (clk_i),
+      .rst_ni       (rst_ni),
+      .tl_h_i       (tl_corei_i),
+      .tl_h_o       (tl_corei_o),
+      .tl_d_o       (tl_imem_out_arb_h2d),
+      .tl_d_i       (tl_imem_out_arb_d2h),
+      .dev_select_i (dev_sel_imem_out_arb)
+    );
+  end else begin : gen_imem_direct
+    // Instruction fetches all go to the single RAM, as before banking
+    assign tl_imem_out_arb_h2d[0] = tl_corei_i;
+    assign tl_corei_o = tl_imem_out_arb_d2h[0];
+  end
+
+  for (genvar b = 0; b < RamBanks; b++) begin : gen_ram_in_arb
+    tl_h2d_t tl_ram_in_arb_h2d [2];
+    tl_d2h_t tl_ram_in_arb_d2h [2];
+
+    assign tl_ram_in_arb_h2d[0] = tl_dmem_out_arb_h2d[b];
+    assign tl_dmem_out_arb_d2h[b] = tl_ram_in_arb_d2h[0];
+    assign tl_ram_in_arb_h2d[1] = tl_imem_out_arb_h2d[b];
+    assign tl_imem_out_arb_d2h[b] = tl_ram_in_arb_d2h[1];
+
+    tlul_socket_m1 #(
+      .HReqDepth (12'h0),
+      .HRspDepth (12'h0),
+      .DReqDepth (4'h0),
+      .DRspDepth (4'h0),
+      .M         (2)
+    ) ram_in_arb (
+      .clk_i        (clk_i),
+      .rst_ni       (rst_ni),
+      .tl_h_i       (tl_ram_in_arb_h2d),
+      .tl_h_o       (tl_ram_in_arb_d2h),
+      .tl_d_i       (tl_ram_i[b]),
+      .tl_d_o       (tl_ram_o[b])
+    );
+  end
 
  endmodule
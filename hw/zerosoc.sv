@@ -1,9 +1,18 @@
 module zerosoc #(
   parameter bit IbexPipeLine = 0,
+  // Values of ibex_pkg::rv32m_e
+  parameter int IbexRV32M = 0,
+  parameter bit IbexBranchTargetALU = 0,
+  parameter bit IbexWritebackStage = 0,
   parameter [31:0] BootAddr = 32'b0,
   // TODO: need to hard code file until https://github.com/zachjs/sv2v/issues/147 is resolved
   parameter RamInitFile = "sw/hello.mem",
+  // RAM size in 32 bit words, split over RamBanks banks the core's instruction
+  // and data ports can access in parallel, each made of RamTileDepth word tiles.
+  // A RAM of several tiles loads RamInitFile split per tile, see ram_tiled.sv.
   parameter RamDepth = 512,
+  parameter RamBanks = 1,
+  parameter RamTileDepth = RamDepth / RamBanks,
   parameter ASIC = 1
 ) (
   // Clock and Reset
@@ -33,8 +42,8 @@ module zerosoc #(
   tl_h2d_t  tl_gpio_d_h2d;
   tl_d2h_t  tl_gpio_d_d2h;
 
-  tl_h2d_t tl_ram_d_h2d;
-  tl_d2h_t tl_ram_d_d2h;
+  tl_h2d_t tl_ram_d_h2d [RamBanks];
+  tl_d2h_t tl_ram_d_d2h [RamBanks];
 
   tl_h2d_t tl_xbar_h_h2d;
   tl_d2h_t tl_xbar_h_d2h;
@@ -51,11 +60,11 @@ module zerosoc #(
     .MHPMCounterNum           (0),
     .MHPMCounterWidth         (0),
     .RV32E                    (0),
-    .RV32M                    (ibex_pkg::RV32MNone),
+    .RV32M                    (ibex_pkg::rv32m_e'(IbexRV32M)),
     .RV32B                    (ibex_pkg::RV32BNone),
     .RegFile                  (ASIC ? ibex_pkg::RegFileLatch : ibex_pkg::RegFileFPGA),
-    .BranchTargetALU          (0),
-    .WritebackStage           (0),
+    .BranchTargetALU          (IbexBranchTargetALU),
+    .WritebackStage           (IbexWritebackStage),
     .ICache                   (0),
     .ICacheECC                (0),
     .BranchPredictor          (0),
@@ -110,61 +119,65 @@ module zerosoc #(
     .scanmode_i(1'b0)
   );
 
-  // sram device
-  logic        ram_req;
-  logic        ram_we;
-  logic [$clog2(RamDepth)-1:0] ram_addr;
-  logic [31:0] ram_wdata;
-  logic [31:0] ram_wmask;
-  logic [31:0] ram_rdata;
-  logic        ram_rvalid;
-
-  tlul_adapter_sram #(
-    .SramAw($clog2(RamDepth)),
-    .SramDw(32),
-    .Outstanding(1),
-    .EnableRspIntgGen(1),
-    .EnableDataIntgGen(1)
-  ) tl_adapter_ram (
-    .clk_i   (clk_i),
-    .rst_ni   (rst_ni),
-    .tl_i     (tl_ram_d_h2d),
-    .tl_o     (tl_ram_d_d2h),
-    .en_ifetch_i(tlul_pkg::InstrEn),  // enable requests with "Instruction" type
-
-    .req_o    (ram_req),
-    .req_type_o(),
-    .gnt_i    (1'b1), // Always grant as only one requester exists
-    .we_o     (ram_we),
-    .addr_o   (ram_addr),
-    .wdata_o  (ram_wdata),
-    .wmask_o  (ram_wmask),
-    .intg_error_o(),
-    .rdata_i  (ram_rdata),
-    .rvalid_i (ram_rvalid),
-    .rerror_i (2'b00)
-  );
-
-  prim_ram_1p_adv #(
-    .Width(32),
-    .Depth(RamDepth),
-    .DataBitsPerMask(8),
-    .MemInitFile(RamInitFile)
-  ) ram (
-    .clk_i    (clk_i),
-    .rst_ni   (rst_ni),
-
-    .req_i    (ram_req),
-    .write_i  (ram_we),
-    .addr_i   (ram_addr),
-    .wdata_i  (ram_wdata),
-    .wmask_i  (ram_wmask),
-    .rdata_o  (ram_rdata),
-    .rvalid_o (ram_rvalid),
-    .rerror_o (), // tied to zero, not important
-
-    .cfg_i(8'b0) // currently unused
-  );
+  // sram devices
+  localparam int RamBankDepth = RamDepth / RamBanks;
+  localparam int RamBankAw = $clog2(RamBankDepth);
+
+  for (genvar b = 0; b < RamBanks; b++) begin : gen_ram_bank
+    logic        ram_req;
+    logic        ram_we;
+    logic [RamBankAw-1:0] ram_addr;
+    logic [31:0] ram_wdata;
+    logic [31:0] ram_wmask;
+    logic [31:0] ram_rdata;
+    logic        ram_rvalid;
+
+    tlul_adapter_sram #(
+      .SramAw(RamBankAw),
+      .SramDw(32),
+      .Outstanding(1),
+      .EnableRspIntgGen(1),
+      .EnableDataIntgGen(1)
+    ) tl_adapter_ram (
+      .clk_i   (clk_i),
+      .rst_ni   (rst_ni),
+      .tl_i     (tl_ram_d_h2d[b]),
+      .tl_o     (tl_ram_d_d2h[b]),
+      .en_ifetch_i(tlul_pkg::InstrEn),  // enable requests with "Instruction" type
+
+      .req_o    (ram_req),
+      .req_type_o(),
+      .gnt_i    (1'b1), // Always grant as only one requester exists
+      .we_o     (ram_we),
+      .addr_o   (ram_addr),
+      .wdata_o  (ram_wdata),
+      .wmask_o  (ram_wmask),
+      .intg_error_o(),
+      .rdata_i  (ram_rdata),
+      .rvalid_i (ram_rvalid),
+      .rerror_i (2'b00)
+    );
+
+    ram_tiled #(
+      .Depth(RamBankDepth),
+      .TileDepth(RamTileDepth),
+      // Every tile of every bank is initialized with its part of the image
+      .MemInitFile(RamInitFile),
+      .SplitInit(RamDepth > RamTileDepth),
+      .FirstTile(b * RamBankDepth / RamTileDepth)
+    ) ram (
+      .clk_i    (clk_i),
+      .rst_ni   (rst_ni),
+
+      .req_i    (ram_req),
+      .write_i  (ram_we),
+      .addr_i   (ram_addr),
+      .wdata_i  (ram_wdata),
+      .wmask_i  (ram_wmask),
+      .rdata_o  (ram_rdata),
+      .rvalid_o (ram_rvalid)
+    );
+  end
 
   gpio gpio (
       .clk_i (clk_i),
@@ -210,7 +223,10 @@ module zerosoc #(
       .rst_ni (rst_ni)
   );
 
-  xbar xbar (
+  xbar #(
+    .RamDepth (RamDepth),
+    .RamBanks (RamBanks)
+  ) xbar (
     .clk_i (clk_i),
     .rst_ni (rst_ni),
 
@@ -0,0 +1,137 @@
+'''
+Step-level incremental builds
+
+Compares a fingerprint of the build inputs with the one saved by the previous
+run of the same job, and restarts the flow at the earliest step any changed
+input feeds into, reusing the results of all steps before it.
+'''
+
+import json
+import os
+
+import buildcache
+
+FINGERPRINT_FILE = 'inputs.fingerprint.json'
+
+# Tool and task of the steps inputs are mapped to
+SYN_TASK = ('yosys', 'syn_asic')
+FLOORPLAN_TASK = ('openroad', 'init_floorplan')
+
+# Library cell lists that synthesis does not use
+PHYSICAL_CELLS = ('antenna', 'decap', 'endcap', 'filler', 'tap')
+
+
+def flow_order(chip):
+    '''
+    Returns the steps of the current flow in execution order.
+    '''
+    flow = chip.get('option', 'flow')
+    inputs = {}
+    for step in chip.getkeys('flowgraph', flow):
+        inputs[step] = set()
+        for index in chip.getkeys('flowgraph', flow, step):
+            inputs[step].update(in_step for in_step, _ in
+                                chip.get('flowgraph', flow, step, index, 'input'))
+
+    order = []
+
+    def visit(step):
+        if step in order:
+            return
+        for in_step in sorted(inputs[step]):
+            visit(in_step)
+        order.append(step)
+
+    for step in sorted(inputs):
+        visit(step)
+    return order
+
+
+def task_steps(chip, tool, task=None):
+    '''
+    Returns the steps of the current flow that run tool (and task), in
+    execution order.
+    '''
+    flow = chip.get('option', 'flow')
+    steps = []
+    for step in flow_order(chip):
+        for index in chip.getkeys('flowgraph', flow, step):
+            if chip.get('flowgraph', flow, step, index, 'tool') == tool and \
+                    (task is None or chip.get('flowgraph', flow, step, index, 'task') == task):
+                steps.append(step)
+                break
+    return steps
+
+
+def _first(steps, default):
+    return steps[0] if steps else default
+
+
+def affected_step(chip, keypath, order):
+    '''
+    Returns the earliest step of order that keypath is an input of, or None if
+    it is not used by any step of the flow.
+    '''
+    first = order[0]
+    root = keypath[0]
+
+    if root == 'tool':
+        task = keypath[3] if len(keypath) > 3 and keypath[2] == 'task' else None
+        return _first(task_steps(chip, keypath[1], task), None)
+    if root == 'constraint':
+        if keypath[1] == 'timing':
+            # Clocks and corners drive synthesis
+            return _first(task_steps(chip, *SYN_TASK), first)
+        return _first(task_steps(chip, *FLOORPLAN_TASK), first)
+    if root == 'library' and keypath[2:4] == ['asic', 'cells'] and keypath[4] in PHYSICAL_CELLS:
+        return _first(task_steps(chip, *FLOORPLAN_TASK), first)
+    if root == 'option' and keypath[1] == 'var' and keypath[2].startswith('openroad_'):
+        return _first(task_steps(chip, 'openroad'), first)
+
+    # RTL, defines, libraries, PDK and anything else unknown: start over
+    return first
+
+
+def _path(chip):
+    return os.path.join(chip.getworkdir(), FINGERPRINT_FILE)
+
+
+def plan(chip):
+    '''
+    Sets the chip to resume from the earliest step affected by the inputs that
+    changed since the last run of this job. Returns the current fingerprint,
+    to be saved with save() once the run succeeded, and whether the job needs
+    to run at all, which it does unless an earlier run had the same inputs.
+    '''
+    current = buildcache.fingerprint(chip)
+
+    path = _path(chip)
+    if chip.get('option', 'clean') or not os.path.exists(path):
+        return current, True
+    with open(path) as f:
+        previous = json.load(f)
+
+    order = flow_order(chip)
+    changed = {}
+    for keypath in set(current) | set(previous):
+        if current.get(keypath) != previous.get(keypath):
+            step = affected_step(chip, json.loads(keypath), order)
+            if step:
+                changed.setdefault(step, []).append(keypath)
+
+    if not changed:
+        print(f'{chip.design}: no inputs changed since the last run.')
+        return current, False
+
+    step = min(changed, key=order.index)
+    print(f'{chip.design}: restarting from {step}, changed inputs:')
+    for keypath in sorted(changed[step]):
+        print(f'    {keypath}')
+    chip.set('option', 'from', [step])
+
+    return current, True
+
+
+def save(chip, fingerprint):
+    with open(_path(chip), 'w') as f:
+        json.dump(fingerprint, f, indent=2, sort_keys=True)
@@ -3,29 +3,41 @@
 ZeroSOC build system
 '''
 
-import siliconcompiler
-
 import argparse
 import os
 import sys
 
-# Libraries
-from lambdapdk.sky130.libs import sky130sram, sky130io
-from siliconcompiler.targets import skywater130_demo, fpgaflow_demo
-
-from siliconcompiler.tools import openroad
-from siliconcompiler.tools._common import get_tool_tasks as _get_tool_tasks
-
+# SiliconCompiler, the PDK libraries and the zerosoc libraries are imported in
+# the functions that use them, as importing them takes seconds
+import buildcache
+import check
+import coreexport
+import corners
+import drc_tiles
+import filehash
+import incremental
 import floorplan as zerosoc_floorplan
-import zerosoc_core
-import zerosoc_top
+import padnames
+import profiles
+import ram
+import resources
+import scheduler
+import sources
+import telemetry
 
 ASIC_CORE_CFG = 'zerosoc_core.pkg.json'
 
+# Where --dry-run writes manifests to
+MANIFEST_DIR = os.path.join('build', 'manifests')
+
+# Window size in um for tiled DRC of local signoff runs, unset for a single DRC run
+TILED_DRC_ENV = 'ZEROSOC_TILED_DRC'
+
 
 def _configure_remote(chip):
     chip.set('option', 'remote', True)
 
+    keypaths = []
     for library in chip.getkeys('library'):
         if library in ['sky130hd', 'sky130io']:
             # No need to copy library
@@ -34,7 +46,7 @@ def _configure_remote(chip):
             for filetype in chip.getkeys('library', library, 'output', fileset):
                 # Need to copy library files into build directory for remote run so the
                 # server can access them
-                chip.hash_files('library', library, 'output', fileset, filetype)
+                keypaths.append(['library', library, 'output', fileset, filetype])
                 chip.set('library', library, 'output', fileset, filetype, True, field='copy')
 
     for tool in chip.getkeys('tool'):
@@ -42,11 +54,17 @@ def _configure_remote(chip):
             for file_var in chip.getkeys('tool', tool, 'task', task, 'file'):
                 # Need to copy tool files into build directory for remote run so the
                 # server can access them
-                chip.hash_files('tool', tool, 'task', task, 'file', file_var)
+                keypaths.append(['tool', tool, 'task', task, 'file', file_var])
                 chip.set('tool', tool, 'task', task, 'file', file_var, True, field='copy')
 
+    filehash.hash_keypaths(chip, keypaths)
+
+
+def _setup_fpga():
+    import siliconcompiler
+    from siliconcompiler.targets import fpgaflow_demo
+    import zerosoc_core
 
-def build_fpga():
     chip = siliconcompiler.Chip('top_icebreaker')
 
     chip.set('fpga', 'partname', 'ice40up5k-sg48')
@@ -60,10 +78,43 @@ def build_fpga():
 
     chip.add('option', 'define', 'PRIM_DEFAULT_IMPL="prim_pkg::ImplIce40"')
 
-    _run_build(chip)
+    return chip
+
+
+def build_fpga():
+    chip = _setup_fpga()
+
+    _run_build(chip, False)
+
+
+def _use_sram(chip):
+    '''
+    Maps the RAM tiles to SRAM macros. Returns how much wider and taller the
+    default outlines have to be to fit the selected number of macros.
+    '''
+    from lambdapdk.sky130.libs import sky130sram
+
+    chip.use(sky130sram)
+    chip.swap_library('lambdalib_ramlib', 'lambdalib_sky130sram')
+
+    # Ignore the macros during DRC and LVS, they violate the rules but are
+    # foundry-validated. Excluded by cell, so this covers every macro instance.
+    for task in ('extspice', 'drc'):
+        chip.add('tool', 'magic', 'task', task, 'var', 'exclude', ram.SRAM_MACRO)
+    chip.add('tool', 'netgen', 'task', 'lvs', 'var', 'exclude', ram.SRAM_MACRO)
+
+    # The pdngen_sram.tcl grid matches the macros by cell and the RTLMP macro
+    # placer places however many synthesis instantiated, only the area grows
+    lef = chip.find_files('library', ram.SRAM_MACRO, 'output', chip.get('option', 'stackup'),
+                          'lef')[0]
+    return zerosoc_floorplan.sram_growth(zerosoc_floorplan.lef_size(lef), ram.sram_macros())
+
 
+def _setup_core(period=66, place_density='0.40', **outline):
+    import siliconcompiler
+    from siliconcompiler.targets import skywater130_demo
+    import zerosoc_core
 
-def _setup_core():
     chip = siliconcompiler.Chip('zerosoc_core')
     chip.set('option', 'entrypoint', 'asic_core')
 
@@ -72,33 +123,28 @@ def _setup_core():
     chip.add('option', 'define', 'SYNTHESIS')
     chip.use(zerosoc_core)
 
-    chip.use(sky130sram)
-    chip.swap_library('lambdalib_ramlib', 'lambdalib_sky130sram')
-
-    chip.set('asic', 'macrolib', ['sky130_sram_1rw1r_64x256_8'])
+    grow_w, grow_h = _use_sram(chip)
+    outline.setdefault('core_w', zerosoc_floorplan.CORE_W + grow_w)
+    outline.setdefault('core_h', zerosoc_floorplan.CORE_H + grow_h)
 
-    # Ignore cells in these libraries during DRC, they violate the rules but are
-    # foundry-validated
-    for task in ('extspice', 'drc'):
-        chip.add('tool', 'magic', 'task', task, 'var', 'exclude', 'sky130_sram_1rw1r_64x256_8')
-    chip.add('tool', 'netgen', 'task', 'lvs', 'var', 'exclude', 'sky130_sram_1rw1r_64x256_8')
+    chip.set('asic', 'macrolib', [ram.SRAM_MACRO])
 
     chip.set('tool', 'openroad', 'task', 'write_data', 'var',
              'ord_abstract_lef_bloat_layers', False)
 
-    chip.clock(r'we_din\[5\]', period=66)
+    chip.clock(r'we_din\[5\]', period=period)
 
     chip.set('tool', 'openroad', 'task', 'macro_placement', 'var', 'rtlmp_enable', 'true')
     chip.set('tool', 'openroad', 'task', 'write_data', 'var', 'write_cdl', 'false')
-    chip.set('option', 'var', 'openroad_place_density', '0.40')
+    chip.set('option', 'var', 'openroad_place_density', place_density)
     chip.set('option', 'var', 'openroad_grt_macro_extension', '0')
 
-    zerosoc_floorplan.generate_core_floorplan(chip)
+    zerosoc_floorplan.generate_core_floorplan(chip, **outline)
 
     return chip
 
 
-def _setup_core_module(chip):
+def _setup_core_module(chip, corner_views=None):
     # set up pointers to final outputs for integration
     # Set physical outputs
     stackup = chip.get('option', 'stackup')
@@ -108,42 +154,107 @@ def _setup_core_module(chip):
     # Set output netlist
     chip.set('output', 'netlist', 'verilog', chip.find_result('vg', step='write.views'))
 
-    # Set timing libraries
-    for scenario in chip.getkeys('constraint', 'timing'):
-        corner = chip.get('constraint', 'timing', scenario, 'libcorner')[0]
-        lib = chip.find_result(f'{corner}.lib', step='write.views')
-        chip.set('output', corner, 'nldm', lib)
-
-    # Set pex outputs
-    for scenario in chip.getkeys('constraint', 'timing'):
-        corner = chip.get('constraint', 'timing', scenario, 'pexcorner')
-        spef = chip.find_result(f'{corner}.spef', step='write.views')
-        chip.set('output', corner, 'spef', spef)
+    if corner_views:
+        # Set timing libraries and pex outputs generated per corner
+        for view in corner_views.values():
+            chip.set('output', view['libcorner'], 'nldm', view['lib'])
+            chip.set('output', view['pexcorner'], 'spef', view['spef'])
+    else:
+        # Set timing libraries
+        for scenario in chip.getkeys('constraint', 'timing'):
+            corner = chip.get('constraint', 'timing', scenario, 'libcorner')[0]
+            lib = chip.find_result(f'{corner}.lib', step='write.views')
+            chip.set('output', corner, 'nldm', lib)
+
+        # Set pex outputs
+        for scenario in chip.getkeys('constraint', 'timing'):
+            corner = chip.get('constraint', 'timing', scenario, 'pexcorner')
+            spef = chip.find_result(f'{corner}.spef', step='write.views')
+            chip.set('output', corner, 'spef', spef)
 
     # Hash output files
-    for fileset in chip.getkeys('output'):
-        for filetype in chip.getkeys('output', fileset):
-            chip.hash_files('output', fileset, filetype)
+    filehash.hash_keypaths(chip, [['output', fileset, filetype]
+                                  for fileset in chip.getkeys('output')
+                                  for filetype in chip.getkeys('output', fileset)])
 
     chip.write_manifest(ASIC_CORE_CFG)
+    coreexport.write(chip, coreexport.EXPORT_FILE, manifest=ASIC_CORE_CFG)
+
+
+def _core_export_keys(chip):
+    '''
+    Returns the keypath prefixes of the core export the top chip uses: the
+    views of its stackup, the netlist, the timing views of its scenarios and
+    the excludes.
+    '''
+    keys = [('output', chip.get('option', 'stackup')), ('output', 'netlist'), ('tool',)]
+    for scenario in chip.getkeys('constraint', 'timing'):
+        for libcorner in chip.get('constraint', 'timing', scenario, 'libcorner'):
+            keys.append(('output', libcorner))
+        keys.append(('output', chip.get('constraint', 'timing', scenario, 'pexcorner')))
+    return keys
+
+
+def _read_core_manifest(prefixes=((),)):
+    if not os.path.exists(ASIC_CORE_CFG):
+        print(f"'{ASIC_CORE_CFG}' has not been generated.", file=sys.stderr)
+        return None
+
+    if not coreexport.is_current(coreexport.EXPORT_FILE, ASIC_CORE_CFG):
+        # Manifest restored from the build cache or written by an older build
+        import siliconcompiler
+        core_chip = siliconcompiler.Library('zerosoc_core')
+        core_chip.read_manifest(ASIC_CORE_CFG)
+        coreexport.write(core_chip, coreexport.EXPORT_FILE, manifest=ASIC_CORE_CFG)
 
+    with coreexport.CoreExport(coreexport.EXPORT_FILE) as export:
+        return export.to_library('zerosoc_core', prefixes=prefixes)
 
-def build_core(verify=True, remote=False, resume=False, floorplan=False):
+
+def build_core(verify=True, remote=False, resume=False, floorplan=False, cache=True):
     chip = _setup_core()
     chip.set('option', 'clean', not resume)
     chip.set('option', 'breakpoint', floorplan and not remote, step='floorplan')
-
-    _run_build(chip, remote)
+    if not remote:
+        # Timing views are generated per corner in parallel after the flow
+        corners.disable_flow_views(chip)
+
+    cache_key = None
+    if cache and not floorplan:
+        cache_key = buildcache.compute_key(chip)
+        if buildcache.restore(cache_key, ASIC_CORE_CFG):
+            print(f'Restored zerosoc_core from build cache ({cache_key[:12]})')
+            if verify:
+                _run_signoff(chip, 'write.views', 'write.gds', remote)
+            # The top reads just the parts of the restored core it uses
+            return None
+
+    _run_incremental(chip, remote, floorplan, _run_build)
+
+    corner_views = None
+    if not remote:
+        corner_views = corners.write_corner_views(chip)
 
     if verify:
         _run_signoff(chip, 'write.views', 'write.gds', remote)
 
-    _setup_core_module(chip)
+    _setup_core_module(chip, corner_views)
+
+    if cache_key:
+        buildcache.store(cache_key, chip, ASIC_CORE_CFG)
 
     return chip
 
 
-def _setup_top_flat():
+def _setup_top_flat(period=60, place_density=None, **outline):
+    import siliconcompiler
+    from lambdapdk.sky130.libs import sky130io
+    from siliconcompiler.targets import skywater130_demo
+    from siliconcompiler.tools import openroad
+    from siliconcompiler.tools._common import get_tool_tasks as _get_tool_tasks
+    import zerosoc_core
+    import zerosoc_top
+
     chip = siliconcompiler.Chip('zerosoc')
     chip.set('option', 'entrypoint', 'asic_top')
 
@@ -155,9 +266,10 @@ def _setup_top_flat():
     chip.use(zerosoc_core)
 
     chip.use(sky130io)
-    chip.use(sky130sram)
-    chip.set('asic', 'macrolib', ['sky130_sram_1rw1r_64x256_8', 'sky130io'])
-    chip.swap_library('lambdalib_ramlib', 'lambdalib_sky130sram')
+    grow_w, grow_h = _use_sram(chip)
+    outline.setdefault('top_w', zerosoc_floorplan.TOP_W + grow_w)
+    outline.setdefault('top_h', zerosoc_floorplan.TOP_H + grow_h)
+    chip.set('asic', 'macrolib', [ram.SRAM_MACRO, 'sky130io'])
     chip.swap_library('lambdalib_iolib', 'lambdalib_sky130io')
 
     # Ignore cells in these libraries during DRC, they violate the rules but are
@@ -169,28 +281,27 @@ def _setup_top_flat():
     # OpenROAD settings
     chip.set('tool', 'openroad', 'task', 'macro_placement', 'var', 'rtlmp_enable', 'true')
     chip.set('option', 'var', 'openroad_grt_macro_extension', '0')
+    if place_density:
+        chip.set('option', 'var', 'openroad_place_density', place_density)
     for task in _get_tool_tasks(chip, openroad):
         chip.add('tool', 'openroad', 'task', task, 'var', 'psm_skip_nets', 'ioring*')
         chip.add('tool', 'openroad', 'task', task, 'var', 'psm_skip_nets', 'v*io')
 
     chip.set('tool', 'yosys', 'task', 'syn_asic', 'var', 'hierarchy_separator', '.')
-    chip.clock(r'padring.iwest.ipad\[3\].gbidir.i0.gpio/IN', period=60)
+    chip.clock(r'padring.iwest.ipad\[3\].gbidir.i0.gpio/IN', period=period)
 
-    zerosoc_floorplan.generate_top_flat_floorplan(chip)
+    zerosoc_floorplan.generate_top_flat_floorplan(chip, **outline)
 
     return chip
 
 
 def _setup_top_hier(core_chip):
-    chip = siliconcompiler.Chip('zerosoc_top')
-
-    if not core_chip:
-        if not os.path.exists(ASIC_CORE_CFG):
-            print(f"'{ASIC_CORE_CFG}' has not been generated.", file=sys.stderr)
-            return
-        core_chip = siliconcompiler.Library('zerosoc_core')
-        core_chip.read_manifest(ASIC_CORE_CFG)
-    core_chip.set('design', 'asic_zerosoc_core')
+    import siliconcompiler
+    from lambdapdk.sky130.libs import sky130io
+    from siliconcompiler.targets import skywater130_demo
+    from siliconcompiler.tools import openroad
+    from siliconcompiler.tools._common import get_tool_tasks as _get_tool_tasks
+    import zerosoc_top
 
     chip = siliconcompiler.Chip('zerosoc_top')
     chip.set('option', 'entrypoint', 'asic_top')
@@ -198,6 +309,13 @@ def _setup_top_hier(core_chip):
     chip.use(skywater130_demo)
     chip.set('option', 'flow', 'asicflow')
 
+    if not core_chip:
+        # Only the parts of the export this chip uses are read
+        core_chip = _read_core_manifest(_core_export_keys(chip))
+        if not core_chip:
+            return
+    core_chip.set('design', 'asic_zerosoc_core')
+
     chip.use(core_chip)
     chip.use(zerosoc_top)
     chip.use(sky130io)
@@ -231,7 +349,10 @@ def _setup_top_hier(core_chip):
         chip.add('tool', 'openroad', 'task', task, 'var', 'psm_skip_nets', 'v*io')
     chip.set('tool', 'yosys', 'task', 'syn_asic', 'var', 'hierarchy_separator', '.')
 
-    zerosoc_floorplan.generate_top_floorplan(chip)
+    # The top is sized around the core, which grows with its SRAM macros
+    core_lef = core_chip.find_files('output', chip.get('option', 'stackup'), 'lef')[0]
+    zerosoc_floorplan.generate_top_floorplan(
+        chip, **zerosoc_floorplan.top_outline(zerosoc_floorplan.lef_size(core_lef)))
 
     return chip
 
@@ -242,7 +363,7 @@ def build_top_flat(verify=True, resume=False, remote=False, floorplan=False):
 
     chip.set('option', 'breakpoint', floorplan and not remote, step='floorplan')
 
-    _run_build(chip, remote)
+    _run_incremental(chip, remote, floorplan, _run_padring_build)
     if verify:
         _run_signoff(chip, 'write.views', 'write.gds', remote)
 
@@ -255,18 +376,69 @@ def build_top(core_chip=None, verify=True, resume=False, remote=False, floorplan
     chip.set('option', 'clean', not resume)
     chip.set('option', 'breakpoint', floorplan and not remote, step='floorplan')
 
-    _run_build(chip, remote)
+    _run_incremental(chip, remote, floorplan, _run_padring_build)
     if verify:
         _run_signoff(chip, 'write.views', 'write.gds', remote)
 
     return chip
 
 
+def _run_incremental(chip, remote, floorplan, run):
+    if remote or floorplan:
+        run(chip, remote)
+        return
+
+    # Restart at the earliest step affected by what changed since the last run
+    fingerprint, changed = incremental.plan(chip)
+    if not changed:
+        return
+    run(chip, remote)
+    chip.set('option', 'from', [])
+    incremental.save(chip, fingerprint)
+
+
+def _run_padring_build(chip, remote):
+    if remote:
+        # The netlist is not available locally until the whole run is done, so
+        # padring.tcl resolves the name patterns itself
+        _run_build(chip, remote)
+        return
+
+    order = incremental.flow_order(chip)
+    syn_step = incremental.task_steps(chip, *incremental.SYN_TASK)[0]
+    floorplan_step = incremental.task_steps(chip, *incremental.FLOORPLAN_TASK)[0]
+    restart = chip.get('option', 'from')
+
+    clean = chip.get('option', 'clean')
+    with resources.reserve(chip), telemetry.record(chip):
+        synthesize = not restart or order.index(restart[0]) <= order.index(syn_step)
+        if synthesize:
+            # Stop after synthesis to look up the exact pad instances in the netlist
+            chip.set('option', 'to', [syn_step])
+            chip.run()
+        padnames.resolve_padring(chip, step=syn_step)
+
+        # Continue from floorplanning without clearing the synthesis results
+        if synthesize:
+            restart = [floorplan_step]
+        chip.set('option', 'clean', False)
+        chip.set('option', 'to', [])
+        chip.set('option', 'from', restart)
+        chip.run()
+    chip.summary()
+
+    chip.set('option', 'from', [])
+    chip.set('option', 'clean', clean)
+
+
 def _run_build(chip, remote):
     if remote:
         _configure_remote(chip)
-
-    chip.run()
+        with telemetry.record(chip):
+            chip.run()
+    else:
+        with resources.reserve(chip), telemetry.record(chip):
+            chip.run()
     chip.summary()
 
 
@@ -285,7 +457,186 @@ def _run_signoff(chip, netlist_step, layout_step, remote):
     chip.input(gds_path)
     chip.input(netlist_path)
 
+    tile_size = os.environ.get(TILED_DRC_ENV)
+    if not tile_size or remote:
+        _run_build(chip, remote)
+        return
+
+    # LVS through the flow, DRC window by window outside of it
+    chip.set('option', 'to', ['lvs'])
     _run_build(chip, remote)
+    chip.set('option', 'to', [])
+
+    workdir = os.path.join(chip.getworkdir(), 'drc_tiles')
+    count = drc_tiles.run_drc(chip, gds_path, workdir, size=float(tile_size))
+    print(f'Tiled DRC: {count} violations, see {workdir}')
+
+
+def write_manifests(core=False, top=False, top_flat=False, manifest_dir=MANIFEST_DIR):
+    '''
+    Sets up the selected designs and writes their manifests to manifest_dir,
+    without running any tool. Returns the written paths.
+    '''
+    setups = []
+    if core:
+        setups.append(_setup_core)
+    if top:
+        setups.append(lambda: _setup_top_hier(None))
+    if top_flat:
+        setups.append(_setup_top_flat)
+
+    os.makedirs(manifest_dir, exist_ok=True)
+    paths = []
+    for setup in setups:
+        chip = setup()
+        if not chip:
+            continue
+        path = os.path.join(manifest_dir, f'{chip.design}.pkg.json')
+        chip.write_manifest(path)
+        paths.append(path)
+    return paths
+
+
+def check_rtl(core=True, top=True, fpga=True):
+    '''
+    Parses and elaborates asic_core, asic_top and top_icebreaker without
+    running any flow. Returns True if all selected designs pass.
+    '''
+    setups = []
+    if core:
+        setups.append(_setup_core)
+    if top:
+        # The flat setup elaborates asic_top down through the core
+        setups.append(_setup_top_flat)
+    if fpga:
+        setups.append(_setup_fpga)
+
+    # Check every design, even after a failure, to report all errors at once
+    results = [check.check(setup()) for setup in setups]
+    return all(results)
+
+
+def _core_task(remote, resume, floorplan, cache):
+    build_core(verify=False, remote=remote, resume=resume, floorplan=floorplan,
+               cache=cache)
+
+
+def _core_signoff_task(remote):
+    chip = _setup_core()
+    _run_signoff(chip, 'write.views', 'write.gds', remote)
+
+
+def _top_task(remote, resume, floorplan):
+    build_top(verify=False, remote=remote, resume=resume, floorplan=floorplan)
+
+
+def _top_signoff_task(remote):
+    chip = _setup_top_hier(None)
+    _run_signoff(chip, 'write.views', 'write.gds', remote)
+
+
+def _top_flat_task(remote, resume, floorplan):
+    build_top_flat(verify=False, remote=remote, resume=resume, floorplan=floorplan)
+
+
+def _top_flat_signoff_task(remote):
+    chip = _setup_top_flat()
+    _run_signoff(chip, 'write.views', 'write.gds', remote)
+
+
+def _build_graph(core=False, top=False, top_flat=False, verify=False,
+                 remote=False, resume=False, floorplan=False, cache=True):
+    build_args = {'remote': remote, 'resume': resume, 'floorplan': floorplan}
+    signoff_args = {'remote': remote}
+
+    graph = {}
+    if core:
+        graph['core'] = (_core_task, {**build_args, 'cache': cache}, ())
+        if verify:
+            graph['core_signoff'] = (_core_signoff_task, signoff_args, ('core',))
+    if top:
+        graph['top'] = (_top_task, build_args, ('core',) if core else ())
+        if verify:
+            graph['top_signoff'] = (_top_signoff_task, signoff_args, ('top',))
+    if top_flat:
+        graph['top_flat'] = (_top_flat_task, build_args, ())
+        if verify:
+            graph['top_flat_signoff'] = (_top_flat_signoff_task, signoff_args, ('top_flat',))
+
+    return graph
+
+
+def build_graph(jobs=None, **kwargs):
+    graph = _build_graph(**kwargs)
+    _, failed = scheduler.run_graph(graph, jobs=jobs)
+    if failed:
+        print(f"Failed tasks: {', '.join(failed)}", file=sys.stderr)
+    return not failed
+
+
+def _build(options, hier):
+    verify = options.verify
+
+    if options.jobs or options.all:
+        return build_graph(jobs=options.jobs or 1,
+                           core=options.core_only or hier or options.all,
+                           top=options.top_only or hier or options.all,
+                           top_flat=options.top_flat or options.all,
+                           verify=verify,
+                           remote=options.remote,
+                           resume=not options.clean,
+                           floorplan=options.floorplan,
+                           cache=options.cache)
+    elif options.core_only:
+        build_core(remote=options.remote,
+                   verify=verify,
+                   resume=not options.clean,
+                   floorplan=options.floorplan,
+                   cache=options.cache)
+    elif options.top_only:
+        build_top(verify=verify,
+                  remote=options.remote,
+                  resume=not options.clean,
+                  floorplan=options.floorplan)
+    elif options.top_flat:
+        build_top_flat(verify=verify,
+                       remote=options.remote,
+                       resume=not options.clean,
+                       floorplan=options.floorplan)
+    else:
+        core_chip = build_core(remote=options.remote,
+                               verify=False,
+                               resume=not options.clean,
+                               floorplan=options.floorplan,
+                               cache=options.cache)
+        build_top(core_chip=core_chip,
+                  remote=options.remote,
+                  verify=verify,
+                  resume=not options.clean,
+                  floorplan=options.floorplan)
+
+    return True
+
+
+def _check_and_build(options, hier):
+    if options.check:
+        return check_rtl()
+
+    if options.precheck:
+        check_top = options.all or not options.core_only
+        if not check_rtl(core=not check_top, top=check_top, fpga=False):
+            return False
+
+    return _build(options, hier)
+
+
+def _set_build_env(options):
+    # Passed on to the libraries and the tools through the environment
+    if options.tiled_drc:
+        os.environ[TILED_DRC_ENV] = str(options.tiled_drc)
+    os.environ[profiles.PROFILE_ENV] = options.profile
+    os.environ[ram.DEPTH_ENV] = str(options.ram_depth)
+    os.environ[ram.BANKS_ENV] = str(options.ram_banks)
 
 
 def _main():
@@ -306,6 +657,39 @@ def _main():
                         action='store_true',
                         default=False,
                         help='Build the entire ZeroSoC.')
+    parser.add_argument('--all',
+                        action='store_true',
+                        default=False,
+                        help='Build both the hierarchical and the flat ZeroSoC.')
+    parser.add_argument('--jobs',
+                        type=int,
+                        metavar='N',
+                        help='Schedule core, top and signoff builds as a dependency graph, '
+                             'running up to N independent builds at the same time.')
+    parser.add_argument('--check',
+                        action='store_true',
+                        default=False,
+                        help='Only parse and elaborate the RTL, then exit.')
+    parser.add_argument('--no-check',
+                        dest='precheck',
+                        action='store_false',
+                        default=True,
+                        help='Do not check the RTL before starting a build.')
+    parser.add_argument('--dry-run',
+                        action='store_true',
+                        default=False,
+                        help=f'Only write the manifests of the selected builds to {MANIFEST_DIR}.')
+    parser.add_argument('--perf-report',
+                        action='store_true',
+                        default=False,
+                        help='Compare the step times of the latest builds with earlier builds, '
+                             'then exit.')
+    parser.add_argument('--perf-threshold',
+                        type=float,
+                        default=20,
+                        metavar='PCT',
+                        help='With --perf-report, flag steps more than PCT%% slower '
+                             '(default: %(default)s).')
     parser.add_argument('--floorplan',
                         action='store_true',
                         default=False,
@@ -318,39 +702,68 @@ def _main():
                         action='store_true',
                         default=False,
                         help='Run on remote server. Requires SC remote credentials.')
+    parser.add_argument('--tiled-drc',
+                        type=float,
+                        nargs='?',
+                        const=drc_tiles.TILE_SIZE,
+                        metavar='SIZE',
+                        help='With --verify, run DRC on overlapping windows of SIZE um '
+                             f'in parallel (default: {drc_tiles.TILE_SIZE}).')
+    parser.add_argument('--profile',
+                        choices=sorted(profiles.PROFILES),
+                        default=profiles.DEFAULT_PROFILE,
+                        help='Ibex core profile to build (default: %(default)s).')
+    parser.add_argument('--ram-depth',
+                        type=int,
+                        default=ram.DEFAULT_DEPTH,
+                        metavar='WORDS',
+                        help='ASIC RAM size in 32 bit words, tiled with one SRAM macro per '
+                             f'{ram.SRAM_DEPTH} words (default: %(default)s).')
+    parser.add_argument('--ram-banks',
+                        type=int,
+                        default=ram.DEFAULT_BANKS,
+                        metavar='N',
+                        help='Number of ASIC RAM banks the instruction and data ports can '
+                             'access in parallel (default: %(default)s).')
     parser.add_argument('--clean',
                         action='store_true',
                         default=False,
                         help='Clean previous run.')
+    parser.add_argument('--no-cache',
+                        dest='cache',
+                        action='store_false',
+                        default=True,
+                        help='Always rebuild the core, even if it is in the build cache.')
     options = parser.parse_args()
 
-    verify = options.verify
-
-    if options.core_only:
-        build_core(remote=options.remote,
-                   verify=verify,
-                   resume=not options.clean,
-                   floorplan=options.floorplan)
-    elif options.top_only:
-        build_top(verify=verify,
-                  remote=options.remote,
-                  resume=not options.clean,
-                  floorplan=options.floorplan)
-    elif options.top_flat:
-        build_top_flat(verify=verify,
-                       remote=options.remote,
-                       resume=not options.clean,
-                       floorplan=options.floorplan)
-    else:
-        core_chip = build_core(remote=options.remote,
-                               verify=False,
-                               resume=not options.clean,
-                               floorplan=options.floorplan)
-        build_top(core_chip=core_chip,
-                  remote=options.remote,
-                  verify=verify,
-                  resume=not options.clean,
-                  floorplan=options.floorplan)
+    if options.perf_report:
+        sys.exit(0 if telemetry.report(threshold=options.perf_threshold / 100) else 1)
+
+    try:
+        ram.check(options.ram_depth, options.ram_banks)
+    except ValueError as e:
+        parser.error(str(e))
+    _set_build_env(options)
+
+    hier = not (options.core_only or options.top_only or options.top_flat)
+
+    if options.dry_run:
+        # Without fetching OpenTitan to resolve the file list, an existing
+        # lock file is used if it is up to date
+        for path in write_manifests(core=options.core_only or hier or options.all,
+                                    top=options.top_only or hier or options.all,
+                                    top_flat=options.top_flat or options.all):
+            print(f'Wrote {path}')
+        return
+
+    # Resolve the exact RTL file list before any library is set up
+    try:
+        sources.ensure_lock()
+    except ValueError as e:
+        parser.error(str(e))
+
+    if not _check_and_build(options, hier):
+        sys.exit(1)
 
 
 if __name__ == '__main__':
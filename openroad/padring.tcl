@@ -12,11 +12,18 @@ proc place_padring_edge { row dim edge } {
     upvar sc_task sc_task
     set span [ord::dbu_to_microns [[[pad::get_row $row] getBBox] d$dim]]
     set span_start [ord::dbu_to_microns [[[pad::get_row $row] getBBox] ${dim}Min]]
-    set pad_length [llength [dict get $sc_cfg tool $sc_tool task $sc_task {var} padring_${edge}_name]]
+    set pad_names [dict get $sc_cfg tool $sc_tool task $sc_task {var} padring_${edge}_name]
+    set pad_length [llength $pad_names]
     set pad_interval [expr $span / ($pad_length + 1)]
+    set block [ord::get_db_block]
     for { set i 0 } { $i < $pad_length } { incr i } {
-        set pad_cell [get_cells {*}[lindex [dict get $sc_cfg tool $sc_tool task $sc_task {var} padring_${edge}_name] $i]]
-        set pad_name [[sta::sta_to_db_inst $pad_cell] getName]
+        # Names are exact instance names when resolved ahead of time (see
+        # padnames.py), otherwise get_cells patterns
+        set pad_name [lindex $pad_names $i]
+        if { [$block findInst $pad_name] == "NULL" } {
+            set pad_cell [get_cells {*}$pad_name]
+            set pad_name [[sta::sta_to_db_inst $pad_cell] getName]
+        }
         puts "Placing IO pad: $pad_name"
         place_pad \
             -row $row \
@@ -0,0 +1,27 @@
+# Extract parasitics, run STA and write an abstract timing model for one
+# timing corner of a finished design. Run by corners.py, one process per corner.
+
+set design $::env(ZEROSOC_DESIGN)
+set outdir $::env(ZEROSOC_OUTDIR)
+set libcorner $::env(ZEROSOC_LIBCORNER)
+set pexcorner $::env(ZEROSOC_PEXCORNER)
+
+foreach lib $::env(ZEROSOC_LIBS) {
+    read_liberty $lib
+}
+read_db $::env(ZEROSOC_ODB)
+read_sdc $::env(ZEROSOC_SDC)
+
+# Parasitics
+define_process_corner -ext_model_index 0 $pexcorner
+extract_parasitics -ext_model_file $::env(ZEROSOC_PEXMODEL)
+write_spef "${outdir}/${design}.${pexcorner}.spef"
+read_spef "${outdir}/${design}.${pexcorner}.spef"
+
+# Timing
+report_checks -path_delay max -format full_clock_expanded \
+    > "${outdir}/${design}.${libcorner}.timing.rpt"
+report_worst_slack -max -digits 4 > "${outdir}/${design}.${libcorner}.wns.rpt"
+
+# Abstract timing model
+write_timing_model "${outdir}/${design}.${libcorner}.lib"
@@ -1,66 +1,296 @@
+#!/usr/bin/env python3
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+
 from siliconcompiler import Library
+import sources
 
+OPENTITAN_URL = 'git+https://github.com/lowRISC/opentitan.git'
+OPENTITAN_REF = '8b9fe4bf2db8ccfac0b26600decf07cf41867e07'
 
-def setup():
-    lib = Library("opentitan", package='opentitan', auto_enable=True)
-    lib.register_source(
-        name='opentitan',
-        path='git+https://github.com/lowRISC/opentitan.git',
-        ref='8b9fe4bf2db8ccfac0b26600decf07cf41867e07')
-
-    # Include dirs
-    lib.add('option', 'idir', 'hw/ip/prim/rtl')
-    lib.add('option', 'idir', 'hw/dv/sv/dv_utils')
-
-    # Add RTL of all modules we use to search path
-    lib.add('option', 'ydir', 'hw/ip/tlul/rtl')
-    lib.add('option', 'ydir', 'hw/ip/rv_core_ibex/rtl')
-    lib.add('option', 'ydir', 'hw/ip/uart/rtl')
-    lib.add('option', 'ydir', 'hw/ip/gpio/rtl')
-    lib.add('option', 'ydir', 'hw/ip/prim/rtl')
-    lib.add('option', 'ydir', 'hw/ip/prim_generic/rtl')
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'build', 'cache', 'opentitan')
+
+# Include dirs
+IDIRS = [
+    'hw/ip/prim/rtl',
+    'hw/dv/sv/dv_utils'
+]
 
+# RTL of all modules we use, added to search path
+YDIRS = [
+    'hw/ip/tlul/rtl',
+    'hw/ip/rv_core_ibex/rtl',
+    'hw/ip/uart/rtl',
+    'hw/ip/gpio/rtl',
+    'hw/ip/prim/rtl',
+    'hw/ip/prim_generic/rtl'
+]
+
+INPUTS = [
     # SV packages (need to be added explicitly)
-    lib.input('hw/top_earlgrey/rtl/top_pkg.sv')
-
-    lib.input('hw/ip/gpio/rtl/gpio_reg_pkg.sv')
-    lib.input('hw/ip/uart/rtl/uart_reg_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_alert_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_esc_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_otp_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_pad_wrapper_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_ram_1p_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_ram_2p_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_rom_pkg.sv')
-    lib.input('hw/ip/tlul/rtl/tlul_pkg.sv')
-
-    lib.input('hw/ip/prim/rtl/prim_util_pkg.sv')
-    lib.input('hw/ip/prim/rtl/prim_secded_pkg.sv')
-
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_pkg.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_top.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_core.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_cs_registers.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_register_file_latch.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_wb_stage.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_load_store_unit.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_ex_block.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_id_stage.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_if_stage.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_prefetch_buffer.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_fetch_fifo.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_csr.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_counter.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_controller.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_decoder.sv')
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_alu.sv')
-
-    lib.input('hw/ip/lc_ctrl/rtl/lc_ctrl_state_pkg.sv')
-    lib.input('hw/ip/lc_ctrl/rtl/lc_ctrl_pkg.sv')
+    'hw/top_earlgrey/rtl/top_pkg.sv',
+
+    'hw/ip/gpio/rtl/gpio_reg_pkg.sv',
+    'hw/ip/uart/rtl/uart_reg_pkg.sv',
+    'hw/ip/prim/rtl/prim_alert_pkg.sv',
+    'hw/ip/prim/rtl/prim_esc_pkg.sv',
+    'hw/ip/prim/rtl/prim_otp_pkg.sv',
+    'hw/ip/prim/rtl/prim_pad_wrapper_pkg.sv',
+    'hw/ip/prim/rtl/prim_ram_1p_pkg.sv',
+    'hw/ip/prim/rtl/prim_ram_2p_pkg.sv',
+    'hw/ip/prim/rtl/prim_rom_pkg.sv',
+    'hw/ip/tlul/rtl/tlul_pkg.sv',
+
+    'hw/ip/prim/rtl/prim_util_pkg.sv',
+    'hw/ip/prim/rtl/prim_secded_pkg.sv',
+
+    'hw/vendor/lowrisc_ibex/rtl/ibex_pkg.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_top.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_core.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_cs_registers.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_register_file_latch.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_wb_stage.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_load_store_unit.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_ex_block.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_id_stage.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_if_stage.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_prefetch_buffer.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_fetch_fifo.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_csr.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_counter.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_controller.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_decoder.sv',
+    'hw/vendor/lowrisc_ibex/rtl/ibex_alu.sv',
+
+    'hw/ip/lc_ctrl/rtl/lc_ctrl_state_pkg.sv',
+    'hw/ip/lc_ctrl/rtl/lc_ctrl_pkg.sv',
 
     # Hack to work around Yosys + Surelog issue. Even though this is found in
     # one of our ydirs, we get different synthesis results if this isn't ordered
-    # earlier.
-    lib.input('hw/vendor/lowrisc_ibex/rtl/ibex_compressed_decoder.sv')
+    # earlier. Only matters without a lock file, see sources.py.
+    'hw/vendor/lowrisc_ibex/rtl/ibex_compressed_decoder.sv'
+]
+
+
+def _snapshot_index(ref):
+    return os.path.join(SNAPSHOT_DIR, f'{ref}.json')
+
+
+def snapshot_path(ref=OPENTITAN_REF):
+    '''
+    Returns the directory holding the extracted snapshot of ref, or None if no
+    snapshot has been created.
+    '''
+    index = _snapshot_index(ref)
+    if not os.path.exists(index):
+        return None
+
+    with open(index) as f:
+        digest = json.load(f)['sha256']
+
+    path = os.path.join(SNAPSHOT_DIR, digest)
+    if not os.path.isdir(path):
+        # Only the archive was kept (e.g. restored from a CI cache). Extracted
+        # next to its final place and renamed, as parallel setup() calls may
+        # be doing the same.
+        tmp = tempfile.mkdtemp(dir=SNAPSHOT_DIR, prefix=f'{digest}.')
+        try:
+            _extract(os.path.join(SNAPSHOT_DIR, 'archives', f'{digest}.tar.gz'), tmp)
+            os.rename(tmp, path)
+        except OSError:
+            if not os.path.isdir(path):
+                raise
+            # Another process finished first
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    return path
+
+
+def _extract(archive, path):
+    with tarfile.open(archive) as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(path, filter='data')
+            return
+
+        # No extraction filters before Python 3.11.4, check the members the
+        # way the data filter would for the plain files of a snapshot
+        for member in tar.getmembers():
+            if not member.isfile() or os.path.isabs(member.name) or \
+                    os.pardir in member.name.split('/'):
+                raise ValueError(f'{archive}: unexpected member {member.name}')
+        tar.extractall(path)
+
+
+def snapshot_unresolved(ref=OPENTITAN_REF):
+    '''
+    Returns the names the design references that were not found in the
+    OpenTitan sources when the snapshot of ref was taken, or None if no
+    snapshot has been created.
+    '''
+    index = _snapshot_index(ref)
+    if not os.path.exists(index):
+        return None
+
+    with open(index) as f:
+        return json.load(f).get('unresolved', [])
+
+
+def _git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, stdout=subprocess.PIPE).stdout
+
+
+def _fetch(source, ref, workdir):
+    if os.path.isdir(source):
+        # Use the pack protocol for local mirrors so shallow fetches work
+        source = f'file://{os.path.abspath(source)}'
+    elif source.startswith('git+'):
+        source = source[len('git+'):]
+
+    _git(workdir, 'init', '-q')
+    try:
+        _git(workdir, 'fetch', '-q', '--depth', '1', '--filter=blob:none', source, ref)
+    except subprocess.CalledProcessError:
+        # Source does not allow partial clones
+        _git(workdir, 'fetch', '-q', '--depth', '1', source, ref)
+
+
+def _checkout(workdir):
+    '''
+    Checks out only the directories the sources are resolved from, so a
+    partial clone fetches just their files.
+    '''
+    dirs = sorted({*IDIRS, *YDIRS, *(os.path.dirname(path) for path in INPUTS)})
+    _git(workdir, 'sparse-checkout', 'init', '--cone')
+    _git(workdir, 'sparse-checkout', 'set', *dirs)
+    _git(workdir, 'checkout', '-q', 'FETCH_HEAD')
+
+
+def _normalize(raw):
+    '''
+    Rewrites a tar stream with sorted members and no timestamps or owners, so
+    the same files always produce the same archive.
+    '''
+    out = io.BytesIO()
+    with tarfile.open(fileobj=io.BytesIO(raw)) as src, \
+            gzip.GzipFile(filename='', mode='wb', fileobj=out, mtime=0) as gz, \
+            tarfile.open(fileobj=gz, mode='w', format=tarfile.PAX_FORMAT) as dst:
+        for member in sorted(src.getmembers(), key=lambda m: m.name):
+            if not member.isfile():
+                continue
+            data = src.extractfile(member).read()
+            info = tarfile.TarInfo(member.name)
+            info.size = len(data)
+            info.mode = member.mode
+            dst.addfile(info, io.BytesIO(data))
+    return out.getvalue()
+
+
+def _snapshot_paths(entries, roots):
+    '''
+    Returns the OpenTitan files of the resolved entries and the headers the
+    design includes from OpenTitan, relative to its root.
+    '''
+    import zerosoc_core
+
+    root = roots['opentitan']
+    idirs = [os.path.join(root, idir) for idir in IDIRS] + \
+        [os.path.join(roots['zerosoc'], idir) for idir in zerosoc_core.IDIRS]
+
+    paths = {path for package, path in entries if package == 'opentitan'}
+    for package, path in entries:
+        for header in sources.includes(os.path.join(roots[package], path), idirs):
+            relpath = os.path.relpath(header, root)
+            if not relpath.startswith(os.pardir):
+                paths.add(relpath)
+    return sorted(paths)
+
+
+def snapshot(source=OPENTITAN_URL, ref=OPENTITAN_REF):
+    '''
+    Fetches only the OpenTitan files the design uses from source (a git URL or
+    local mirror) and stores them as a content-addressed archive, which
+    setup() uses as the package source from then on. The sources are resolved
+    from a sparse checkout of the directories they are searched in, which also
+    writes the lock file. Take a new snapshot when the RTL uses other
+    OpenTitan modules. Returns the archive hash.
+    '''
+    import zerosoc_core
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _fetch(source, ref, workdir)
+        _checkout(workdir)
+
+        roots = {'zerosoc': zerosoc_core.ROOT, 'opentitan': workdir}
+        entries, unresolved = sources.write_lock(roots=roots)
+        paths = _snapshot_paths(entries, roots)
+        raw = _git(workdir, 'archive', '--format=tar', 'FETCH_HEAD', '--', *paths)
+
+    archive = _normalize(raw)
+    digest = hashlib.sha256(archive).hexdigest()
+
+    os.makedirs(os.path.join(SNAPSHOT_DIR, 'archives'), exist_ok=True)
+    with open(os.path.join(SNAPSHOT_DIR, 'archives', f'{digest}.tar.gz'), 'wb') as f:
+        f.write(archive)
+
+    shutil.rmtree(os.path.join(SNAPSHOT_DIR, digest), ignore_errors=True)
+    with open(_snapshot_index(ref), 'w') as f:
+        json.dump({'ref': ref, 'sha256': digest, 'paths': paths, 'unresolved': unresolved}, f,
+                  indent=2)
+
+    return digest
+
+
+def setup():
+    lib = Library("opentitan", package='opentitan', auto_enable=True)
+
+    snapshot_dir = snapshot_path()
+    if snapshot_dir:
+        lib.register_source(
+            name='opentitan',
+            path=snapshot_dir)
+    else:
+        lib.register_source(
+            name='opentitan',
+            path=OPENTITAN_URL,
+            ref=OPENTITAN_REF)
+
+    for idir in IDIRS:
+        lib.add('option', 'idir', idir)
+
+    locked = sources.locked_files('opentitan')
+    if locked is not None:
+        # Exact, ordered file list resolved ahead of time, see sources.py
+        for path in locked:
+            lib.input(path)
+    else:
+        for ydir in YDIRS:
+            lib.add('option', 'ydir', ydir)
+        for path in INPUTS:
+            lib.input(path)
 
     return lib
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Manage the OpenTitan source snapshot')
+    parser.add_argument('--source',
+                        default=OPENTITAN_URL,
+                        help='Git URL or local mirror to take the snapshot from.')
+    options = parser.parse_args()
+
+    digest = snapshot(source=options.source)
+    print(f'OpenTitan {OPENTITAN_REF[:12]} snapshot: {snapshot_path()} ({digest[:12]})')
+
+
+if __name__ == '__main__':
+    _main()
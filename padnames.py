@@ -0,0 +1,90 @@
+'''
+Exact padring instance names
+
+floorplan.configure_padring() names each pad with a get_cells pattern, which
+padring.tcl would otherwise match against the whole netlist once per pad. This
+module indexes the pad instances of the synthesized netlist in one pass and
+replaces every pattern with the one instance it matches.
+'''
+
+import re
+
+import floorplan
+
+SIDES = ('west', 'north', 'east', 'south')
+
+# Cell and instance name of each instance in a structural netlist
+_INSTANCE_RE = re.compile(r'^\s*([A-Za-z_][\w$]*)\s+(\\\S+|[A-Za-z_][\w$]*)\s*\(', re.MULTILINE)
+
+
+def _pattern_regex(pattern):
+    '''
+    Converts a tcl glob, as used by get_cells, into a regular expression.
+    '''
+    regex = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == '\\':
+            regex.append(re.escape(next(chars, '\\')))
+        elif char == '*':
+            regex.append('.*')
+        elif char == '?':
+            regex.append('.')
+        else:
+            regex.append(re.escape(char))
+    return re.compile(''.join(regex) + '$')
+
+
+def index_netlist(path, cells=tuple(floorplan.PAD_NAME_MAP)):
+    '''
+    Returns the names of all instances of cells in the Verilog netlist at path,
+    with escaped identifiers unescaped.
+    '''
+    cells = set(cells)
+    with open(path) as f:
+        netlist = f.read()
+
+    instances = []
+    for match in _INSTANCE_RE.finditer(netlist):
+        cell, name = match.groups()
+        if cell in cells:
+            instances.append(name[1:] if name.startswith('\\') else name)
+    return instances
+
+
+def resolve(patterns, instances):
+    '''
+    Returns the instance matched by each of patterns. Raises ValueError if any
+    pattern matches no instance or more than one.
+    '''
+    resolved = []
+    problems = []
+    for pattern in patterns:
+        regex = _pattern_regex(pattern)
+        matches = [name for name in instances if regex.match(name)]
+        if len(matches) != 1:
+            problems.append(f'{pattern} matches {len(matches)} pad instances')
+        else:
+            resolved.append(matches[0])
+
+    if problems:
+        raise ValueError('Unable to resolve padring: ' + '; '.join(problems))
+    return resolved
+
+
+def _db_name(name):
+    # OpenDB keeps brackets in hierarchical names escaped
+    return re.sub(r'([\[\]])', r'\\\1', name)
+
+
+def resolve_padring(chip, step='syn'):
+    '''
+    Replaces the padring name patterns of chip with the exact instance names
+    found in the netlist produced by step.
+    '''
+    instances = index_netlist(chip.find_result('vg', step=step))
+
+    for side in SIDES:
+        keypath = ['tool', 'openroad', 'task', 'init_floorplan', 'var', f'padring_{side}_name']
+        names = resolve(chip.get(*keypath), instances)
+        chip.set(*keypath, [_db_name(name) for name in names])
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+'''
+ZeroSoC padring preview
+
+Pure Python model of openroad/padring.tcl: places the pads from
+floorplan.define_io_placement() in the outline from
+floorplan.generate_top_outline(), checks the result and renders it as an SVG,
+without synthesis or OpenROAD.
+'''
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import floorplan
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# make_fake_io_site / make_io_sites in padring.tcl
+IO_SITE_HEIGHT = 200
+CORNER_SIZE = (200, 204)
+IO_OFFSET = 10
+
+# Pad widths along the ring, in um
+PAD_WIDTHS = {
+    floorplan.GPIO: 80,
+    floorplan.VDD: 75,
+    floorplan.VDDIO: 75,
+    floorplan.VSS: 75,
+    floorplan.VSSIO: 75
+}
+
+PAD_COLORS = {
+    floorplan.GPIO: '#4c72b0',
+    floorplan.VDD: '#c44e52',
+    floorplan.VDDIO: '#dd8452',
+    floorplan.VSS: '#55a868',
+    floorplan.VSSIO: '#8172b3'
+}
+
+# Side name and the axis its IO row runs along, in padring.tcl order
+SIDES = (('west', 'y'), ('north', 'x'), ('east', 'y'), ('south', 'x'))
+
+# la_iopadring cell types of the generate blocks named in floorplan.PAD_NAME_MAP
+_LA_CELLS = {
+    'LA_BIDIR': 'gbidir',
+    'LA_VDD': 'gvdd',
+    'LA_VDDIO': 'gvddio',
+    'LA_VSS': 'gvss',
+    'LA_VSSIO': 'gvssio'
+}
+
+_CELLMAP_ENTRY_RE = re.compile(r'\{\s*[^,{}]+,\s*[^,{}]+,\s*(\w+)\s*,')
+_NCELLS_RE = re.compile(r'\.(NO|EA|SO|WE)_NCELLS\((\d+)\)')
+_SIDE_PREFIX = {'NO': 'north', 'EA': 'east', 'SO': 'south', 'WE': 'west'}
+
+
+class _Recorder:
+    '''
+    Stands in for a chip to capture what the floorplan functions set.
+    '''
+
+    def __init__(self):
+        self.values = {}
+
+    def set(self, *args, **kwargs):
+        self.values[args[:-1]] = args[-1]
+
+    def add(self, *args, **kwargs):
+        self.values.setdefault(args[:-1], []).append(args[-1])
+
+
+def _filler_widths():
+    widths = {}
+    for cell in floorplan.FILL_CELLS:
+        widths[cell] = int(re.search(r'(\d+)um$', cell).group(1))
+    return sorted(widths.items(), key=lambda item: -item[1])
+
+
+def _fill(gap):
+    fill = {}
+    for cell, width in _filler_widths():
+        count, gap = divmod(gap, width)
+        if count:
+            fill[cell] = int(count)
+    return fill, gap
+
+
+def _rows(width, height):
+    '''
+    Returns the (start, end, depth position) of each IO row.
+    '''
+    corner_w, corner_h = CORNER_SIZE
+    x_span = (IO_OFFSET + corner_w, width - IO_OFFSET - corner_w)
+    y_span = (IO_OFFSET + corner_h, height - IO_OFFSET - corner_h)
+    return {
+        'west': (*y_span, IO_OFFSET),
+        'north': (*x_span, height - IO_OFFSET - IO_SITE_HEIGHT),
+        'east': (*y_span, width - IO_OFFSET - IO_SITE_HEIGHT),
+        'south': (*x_span, IO_OFFSET)
+    }
+
+
+def place(outline=None):
+    '''
+    Places the padring the way padring.tcl does. Returns the die size and,
+    for each side, the row bounds and the (name, cell, location, width) of
+    each pad, with locations snapped to the 1 um IO site grid.
+    '''
+    chip = _Recorder()
+    floorplan.generate_top_outline(chip, **(outline or {}))
+    floorplan.configure_padring(chip)
+
+    (_, _), (width, height) = chip.values[('constraint', 'outline')]
+    rows = _rows(width, height)
+
+    pads = dict(zip([side for side, _ in SIDES], floorplan.define_io_placement()))
+    placement = {}
+    for side, _ in SIDES:
+        names = chip.values[('tool', 'openroad', 'task', 'init_floorplan', 'var',
+                             f'padring_{side}_name')]
+        start, end, _ = rows[side]
+        interval = (end - start) / (len(names) + 1)
+        placement[side] = []
+        for i, (name, cell) in enumerate(zip(names, pads[side])):
+            location = int(start + (i + 0.5) * interval)
+            placement[side].append((name, cell, location, PAD_WIDTHS[cell]))
+
+    return (width, height), rows, placement
+
+
+def _padring_cells():
+    '''
+    Returns the generate block name of each cell index of la_iopadring and the
+    number of cells on each side, as configured in hw/asic_top.v.
+    '''
+    with open(os.path.join(ROOT, 'hw', 'iomap.vh')) as f:
+        cellmap = _CELLMAP_ENTRY_RE.findall(f.read())
+    with open(os.path.join(ROOT, 'hw', 'asic_top.v')) as f:
+        ncells = {_SIDE_PREFIX[side]: int(n) for side, n in _NCELLS_RE.findall(f.read())}
+
+    # The first entry of the concatenation is the most significant, last index
+    blocks = [_LA_CELLS.get(cell) for cell in reversed(cellmap)]
+    return blocks, ncells
+
+
+def _check_side(side, start, end, pads, blocks, ncells):
+    problems = []
+    fill = {}
+
+    if len(pads) != ncells.get(side):
+        problems.append((None, f'{side}: {len(pads)} pads placed, '
+                               f'asic_top.v configures {ncells.get(side)}'))
+
+    position = start
+    for i, (name, cell, location, width) in enumerate(pads):
+        block = floorplan.PAD_NAME_MAP[cell][0]
+        if i >= len(blocks) or blocks[i] != block:
+            problems.append((name, f'{side}: {name} does not resolve, '
+                                   f'cell {i} of the padring is not a {block}'))
+
+        if location < position:
+            problems.append((name, f'{side}: {name} overlaps the previous pad or corner '
+                                   f'by {position - location} um'))
+        else:
+            for filler, count in _fill(location - position)[0].items():
+                fill[filler] = fill.get(filler, 0) + count
+        position = max(position, location + width)
+
+    if position > end:
+        problems.append((pads[-1][0], f'{side}: pads extend {position - end} um into the corner'))
+    else:
+        for filler, count in _fill(end - position)[0].items():
+            fill[filler] = fill.get(filler, 0) + count
+
+    return problems, fill
+
+
+def check(outline=None):
+    '''
+    Returns the placement and a list of (pad name, message) problems found in
+    it: overlapping pads, pads running into the corners, and names that do not
+    resolve to a pad of the right type in the padring RTL.
+    '''
+    die, rows, placement = place(outline)
+    blocks, ncells = _padring_cells()
+
+    problems = []
+    fill = {}
+    for side, _ in SIDES:
+        start, end, _ = rows[side]
+        side_problems, fill[side] = _check_side(side, start, end, placement[side],
+                                                blocks, ncells)
+        problems.extend(side_problems)
+
+    return die, rows, placement, fill, problems
+
+
+def _pad_rect(side, rows, location, width):
+    _, _, depth = rows[side]
+    if dict(SIDES)[side] == 'x':
+        return location, depth, width, IO_SITE_HEIGHT
+    return depth, location, IO_SITE_HEIGHT, width
+
+
+def write_svg(path, die, rows, placement, problems):
+    width, height = die
+    corner_w, corner_h = CORNER_SIZE
+
+    # SVG y runs downwards, flip so the layout reads like the GDS
+    shapes = [f'<rect x="0" y="0" width="{width}" height="{height}" '
+              'fill="#f8f8f8" stroke="black" stroke-width="2"/>']
+    for x in (IO_OFFSET, width - IO_OFFSET - corner_w):
+        for y in (IO_OFFSET, height - IO_OFFSET - corner_h):
+            shapes.append(f'<rect x="{x}" y="{height - y - corner_h}" width="{corner_w}" '
+                          f'height="{corner_h}" fill="#999999"/>')
+
+    flagged = {name for name, _ in problems}
+    for side, pads in placement.items():
+        for name, cell, location, pad_width in pads:
+            x, y, w, h = _pad_rect(side, rows, location, pad_width)
+            stroke = 'red' if name in flagged else 'black'
+            shapes.append(f'<rect x="{x}" y="{height - y - h}" width="{w}" height="{h}" '
+                          f'fill="{PAD_COLORS[cell]}" stroke="{stroke}">'
+                          f'<title>{name} ({cell}) @ {location}</title></rect>')
+
+    with open(path, 'w') as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+                f'width="{width / 2}" height="{height / 2}">\n')
+        f.write('\n'.join(shapes))
+        f.write('\n</svg>\n')
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Preview and check the ZeroSoC padring')
+    parser.add_argument('--width', type=int, help='Die width in um.')
+    parser.add_argument('--height', type=int, help='Die height in um.')
+    parser.add_argument('--svg',
+                        default=os.path.join('build', 'padring.svg'),
+                        help='Where to write the preview.')
+    options = parser.parse_args()
+
+    outline = {}
+    if options.width:
+        outline['top_w'] = options.width
+    if options.height:
+        outline['top_h'] = options.height
+
+    start = time.perf_counter()
+    die, rows, placement, fill, problems = check(outline)
+    elapsed = time.perf_counter() - start
+
+    for side, pads in placement.items():
+        start, end, _ = rows[side]
+        pitch = [b[2] - a[2] for a, b in zip(pads, pads[1:])]
+        print(f'{side}: {len(pads)} pads in {start}-{end} um, '
+              f'pitch {min(pitch, default=0)}-{max(pitch, default=0)} um, '
+              f'first pad {pads[0][2] - start} um from corner, '
+              f'last pad {end - pads[-1][2] - pads[-1][3]} um from corner')
+        for filler, count in sorted(fill[side].items()):
+            print(f'    {count} x {filler}')
+
+    os.makedirs(os.path.dirname(options.svg) or '.', exist_ok=True)
+    write_svg(options.svg, die, rows, placement, problems)
+    print(f'Checked in {elapsed * 1000:.1f} ms, preview written to {options.svg}')
+
+    for _, message in problems:
+        print(message, file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,55 @@
+'''
+Ibex core profiles
+
+Each profile sets the Ibex parameters zerosoc exposes, through the IBEX_*
+defines read by the ASIC and FPGA wrappers and the testbench, and the
+-march firmware has to be built with to run on it.
+'''
+
+import os
+
+# Environment variable make.py passes the selected profile to builds in
+PROFILE_ENV = 'ZEROSOC_PROFILE'
+
+DEFAULT_PROFILE = 'area'
+
+# RV32M values follow ibex_pkg::rv32m_e: 0 none, 1 slow, 2 fast, 3 single cycle.
+# PipeLine registers the core's bus interfaces, costing a cycle per access for
+# a shorter critical path, so only the performance profile, which also has
+# the writeback stage, trades cycles for clock rate with it.
+PROFILES = {
+    'area': {
+        'defines': {'IBEX_RV32M': 0, 'IBEX_BRANCH_TARGET_ALU': 0, 'IBEX_WRITEBACK_STAGE': 0,
+                    'IBEX_PIPELINE': 0},
+        'march': 'rv32i'
+    },
+    'balanced': {
+        'defines': {'IBEX_RV32M': 2, 'IBEX_BRANCH_TARGET_ALU': 1, 'IBEX_WRITEBACK_STAGE': 0,
+                    'IBEX_PIPELINE': 0},
+        'march': 'rv32im'
+    },
+    'performance': {
+        'defines': {'IBEX_RV32M': 3, 'IBEX_BRANCH_TARGET_ALU': 1, 'IBEX_WRITEBACK_STAGE': 1,
+                    'IBEX_PIPELINE': 1},
+        'march': 'rv32im'
+    }
+}
+
+
+def selected():
+    '''
+    Returns the name of the profile selected for this build.
+    '''
+    profile = os.environ.get(PROFILE_ENV, DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown core profile '{profile}', expected one of "
+                         f"{', '.join(sorted(PROFILES))}")
+    return profile
+
+
+def defines(profile=None):
+    '''
+    Returns the NAME=value defines of profile, or of the selected profile.
+    '''
+    return [f'{name}={value}'
+            for name, value in PROFILES[profile or selected()]['defines'].items()]
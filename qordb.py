@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+'''
+ZeroSoC QoR database
+
+Indexes the metrics of every job under build/ into a SQLite database, reading
+each job manifest only when it changed, and queries or diffs the results:
+
+    ./qordb.py query --design zerosoc_core --sort setupwns
+    ./qordb.py diff zerosoc_core/job0 zerosoc_core/job1
+'''
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+
+BUILD_DIR = 'build'
+DB_FILE = os.path.join(BUILD_DIR, 'qor.sqlite')
+
+DESIGNS = ('zerosoc_core', 'zerosoc_top', 'zerosoc')
+
+# Summary columns: (column, metric, step the value is taken from, or None for
+# the last step of the flow that reports it)
+SUMMARY = (
+    ('cellarea', 'cellarea', None),
+    ('totalarea', 'totalarea', None),
+    ('cells', 'cells', None),
+    ('setupwns', 'setupwns', None),
+    ('setuptns', 'setuptns', None),
+    ('holdwns', 'holdwns', None),
+    ('holdtns', 'holdtns', None),
+    ('peakpower', 'peakpower', None),
+    ('leakagepower', 'leakagepower', None),
+    ('drc', 'drcs', 'drc'),
+    ('lvs', 'drcs', 'lvs'),
+    ('runtime', 'totaltime', None)
+)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    design TEXT,
+    jobname TEXT,
+    flow TEXT,
+    path TEXT UNIQUE,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    job INTEGER REFERENCES jobs(id) ON DELETE CASCADE,
+    metric TEXT,
+    step TEXT,
+    idx TEXT,
+    position INTEGER,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS metrics_job ON metrics (job, metric);
+'''
+
+
+def connect(path=DB_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA foreign_keys = ON')
+    db.executescript(_SCHEMA)
+    return db
+
+
+def _value(entry):
+    value = entry.get('value') if isinstance(entry, dict) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _flow_order(manifest, flow):
+    '''
+    Returns the (step, index) nodes of flow in execution order.
+    '''
+    graph = manifest.get('flowgraph', {}).get(flow, {})
+    inputs = {}
+    for step, indices in graph.items():
+        for index, params in indices.items():
+            edges = params.get('input', {}).get('node', {}).get('global', {}).get('global', {})
+            inputs[(step, index)] = [tuple(edge) for edge in edges.get('value') or []]
+
+    order = []
+
+    def visit(node):
+        if node in order or node not in inputs:
+            return
+        for parent in inputs[node]:
+            visit(parent)
+        order.append(node)
+
+    for node in sorted(inputs):
+        visit(node)
+    return order
+
+
+def _read_job(path):
+    with open(path) as f:
+        manifest = json.load(f)
+
+    flow = manifest['option']['flow']['node']['global']['global']['value']
+    jobname = manifest['option']['jobname']['node']['global']['global']['value']
+    design = manifest['design']['node']['global']['global']['value']
+    position = {node: i for i, node in enumerate(_flow_order(manifest, flow))}
+
+    metrics = []
+    for metric, param in manifest.get('metric', {}).items():
+        for step, indices in param.get('node', {}).items():
+            for index, entry in indices.items():
+                value = _value(entry)
+                if value is not None and (step, index) in position:
+                    metrics.append((metric, step, index, position[(step, index)], value))
+
+    return design, jobname, flow, metrics
+
+
+def _manifests(build_dir):
+    for design in DESIGNS:
+        yield from glob.glob(os.path.join(build_dir, design, '*', f'{design}.pkg.json'))
+
+
+def index(db, build_dir=BUILD_DIR):
+    '''
+    Indexes new and changed jobs and drops jobs whose manifest was removed.
+    Returns the number of jobs read.
+    '''
+    known = {path: (job, size, mtime_ns) for job, path, size, mtime_ns in
+             db.execute('SELECT id, path, size, mtime_ns FROM jobs')}
+
+    read = 0
+    seen = set()
+    with db:
+        for path in _manifests(build_dir):
+            path = os.path.abspath(path)
+            seen.add(path)
+            st = os.stat(path)
+            if path in known and known[path][1:] == (st.st_size, st.st_mtime_ns):
+                continue
+
+            try:
+                design, jobname, flow, metrics = _read_job(path)
+            except (KeyError, ValueError) as e:
+                print(f'Skipping {path}: {e}', file=sys.stderr)
+                continue
+
+            if path in known:
+                db.execute('DELETE FROM jobs WHERE id = ?', (known[path][0],))
+            job = db.execute('INSERT INTO jobs (design, jobname, flow, path, size, mtime_ns) '
+                             'VALUES (?, ?, ?, ?, ?, ?)',
+                             (design, jobname, flow, path, st.st_size, st.st_mtime_ns)).lastrowid
+            db.executemany('INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?)',
+                           [(job, *metric) for metric in metrics])
+            read += 1
+
+        for path in set(known) - seen:
+            db.execute('DELETE FROM jobs WHERE id = ?', (known[path][0],))
+
+    return read
+
+
+def summary(db, job):
+    '''
+    Returns the summary columns of job as a dict.
+    '''
+    values = {}
+    for column, metric, step in SUMMARY:
+        if step:
+            row = db.execute('SELECT value FROM metrics WHERE job = ? AND metric = ? AND step = ? '
+                             'ORDER BY position DESC LIMIT 1', (job, metric, step)).fetchone()
+        else:
+            row = db.execute('SELECT value FROM metrics WHERE job = ? AND metric = ? '
+                             'ORDER BY position DESC LIMIT 1', (job, metric)).fetchone()
+        values[column] = row[0] if row else None
+    return values
+
+
+def _format(value):
+    if value is None:
+        return '-'
+    return f'{value:.4g}'
+
+
+def _print_table(header, rows):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header, *rows]:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
+
+
+def query(db, design=None, flow=None, sort=None, limit=None):
+    jobs = db.execute('SELECT id, design, jobname, flow FROM jobs '
+                      'WHERE (? IS NULL OR design = ?) AND (? IS NULL OR flow = ?) '
+                      'ORDER BY design, jobname', (design, design, flow, flow)).fetchall()
+
+    rows = [(job_design, jobname, job_flow, summary(db, job))
+            for job, job_design, jobname, job_flow in jobs]
+    if sort:
+        # Jobs without the metric go last
+        rows.sort(key=lambda row: (row[3][sort] is None, row[3][sort] or 0))
+    if limit:
+        rows = rows[:limit]
+
+    columns = [column for column, _, _ in SUMMARY]
+    _print_table(['design', 'job', 'flow', *columns],
+                 [(d, j, f, *[_format(values[c]) for c in columns]) for d, j, f, values in rows])
+
+
+def _find_job(db, spec):
+    design, _, jobname = spec.partition('/')
+    row = db.execute('SELECT id FROM jobs WHERE design = ? AND jobname = ?',
+                     (design, jobname)).fetchone()
+    if not row:
+        raise ValueError(f"No indexed job '{spec}', expected <design>/<jobname>")
+    return row[0]
+
+
+def diff(db, spec_a, spec_b, all_metrics=False):
+    job_a, job_b = _find_job(db, spec_a), _find_job(db, spec_b)
+
+    if all_metrics:
+        sql = 'SELECT metric, step, idx, value FROM metrics WHERE job = ?'
+        values_a = {row[:3]: row[3] for row in db.execute(sql, (job_a,))}
+        values_b = {row[:3]: row[3] for row in db.execute(sql, (job_b,))}
+        keys = sorted(set(values_a) | set(values_b))
+        names = [f'{metric} {step}/{index}' for metric, step, index in keys]
+    else:
+        values_a, values_b = summary(db, job_a), summary(db, job_b)
+        keys = names = [column for column, _, _ in SUMMARY]
+
+    rows = []
+    for key, name in zip(keys, names):
+        a, b = values_a.get(key), values_b.get(key)
+        if a == b and all_metrics:
+            continue
+        delta = '-'
+        if a is not None and b is not None:
+            delta = f'{b - a:+.4g}'
+            if a:
+                delta += f' ({(b - a) / abs(a):+.1%})'
+        rows.append((name, _format(a), _format(b), delta))
+
+    _print_table(['metric', spec_a, spec_b, 'change'], rows)
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Index, query and diff ZeroSoC build results')
+    parser.add_argument('--build-dir', default=BUILD_DIR, help='Build directory to index.')
+    parser.add_argument('--db', default=DB_FILE, help='Database file.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('index', help='Index new and changed jobs.')
+
+    query_parser = subparsers.add_parser('query', help='List the results of indexed jobs.')
+    query_parser.add_argument('--design', choices=DESIGNS)
+    query_parser.add_argument('--flow', help='Only list jobs of this flow.')
+    query_parser.add_argument('--sort', choices=[column for column, _, _ in SUMMARY])
+    query_parser.add_argument('--limit', type=int)
+
+    diff_parser = subparsers.add_parser('diff', help='Compare two jobs.')
+    diff_parser.add_argument('job_a', help='First job, as <design>/<jobname>.')
+    diff_parser.add_argument('job_b', help='Second job, as <design>/<jobname>.')
+    diff_parser.add_argument('--all',
+                             action='store_true',
+                             help='Compare every metric of every step, not just the summary.')
+
+    options = parser.parse_args()
+
+    db = connect(options.db)
+
+    start = time.perf_counter()
+    read = index(db, options.build_dir)
+    if options.command == 'index':
+        total = db.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+        print(f'Indexed {read} new or changed jobs, {total} in total '
+              f'({time.perf_counter() - start:.2f} s)')
+    elif options.command == 'query':
+        query(db, design=options.design, flow=options.flow, sort=options.sort,
+              limit=options.limit)
+    else:
+        try:
+            diff(db, options.job_a, options.job_b, all_metrics=options.all)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,69 @@
+'''
+RAM configuration
+
+The zerosoc RAM is split into banks the core's instruction and data ports can
+access in parallel, and each bank into tiles of one SRAM macro in ASIC builds.
+The size and number of banks are passed to the ASIC wrapper and the simulation
+testbench through the RAM_* defines.
+'''
+
+import os
+
+# SRAM macro each RAM tile maps to, and its depth in 32 bit words
+SRAM_MACRO = 'sky130_sram_1rw1r_64x256_8'
+SRAM_DEPTH = 512
+
+# Environment variables make.py passes the RAM depth in words and its number of
+# banks to builds in
+DEPTH_ENV = 'ZEROSOC_RAM_DEPTH'
+BANKS_ENV = 'ZEROSOC_RAM_BANKS'
+
+DEFAULT_DEPTH = SRAM_DEPTH
+DEFAULT_BANKS = 1
+
+
+def _power_of_two(value):
+    return value > 0 and not value & (value - 1)
+
+
+def check(depth, banks):
+    '''
+    Raises ValueError if a RAM of depth words cannot be split into banks of
+    whole SRAM macros.
+    '''
+    if not _power_of_two(banks):
+        raise ValueError(f'RAM banks must be a power of two, not {banks}')
+    if not _power_of_two(depth) or depth < banks * SRAM_DEPTH:
+        raise ValueError(f'RAM depth must be a power of two of at least {banks * SRAM_DEPTH} '
+                         f'words for {banks} banks, not {depth}')
+
+
+def selected():
+    '''
+    Returns the RAM depth in words and number of banks selected for this build.
+    '''
+    depth = int(os.environ.get(DEPTH_ENV, DEFAULT_DEPTH))
+    banks = int(os.environ.get(BANKS_ENV, DEFAULT_BANKS))
+    check(depth, banks)
+    return depth, banks
+
+
+def sram_macros():
+    '''
+    Returns the number of SRAM macros the selected RAM is tiled with.
+    '''
+    depth, _ = selected()
+    return depth // SRAM_DEPTH
+
+
+def defines(depth=None, banks=None):
+    '''
+    Returns the NAME=value defines of a RAM of depth words in banks, by default
+    the selected RAM.
+    '''
+    if depth is None or banks is None:
+        selected_depth, selected_banks = selected()
+        depth = selected_depth if depth is None else depth
+        banks = selected_banks if banks is None else banks
+    check(depth, banks)
+    return [f'RAM_DEPTH={depth}', f'RAM_BANKS={banks}', f'RAM_TILE_DEPTH={SRAM_DEPTH}']
@@ -0,0 +1,191 @@
+'''
+Host-level CPU and memory reservations for flow runs
+
+Every run reserves the threads and memory its most demanding step needs in a
+ledger shared by all builds on the host, and waits while the host cannot
+provide them. The threads granted are then set on each task of the flow, so
+concurrent builds share the CPUs instead of each tool using all of them.
+'''
+
+import contextlib
+import fcntl
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import incremental
+
+LEDGER_FILE = os.path.join(tempfile.gettempdir(), 'zerosoc-resources.json')
+
+# (tool, task): (threads the task still speeds up with, typical peak memory in GB)
+PROFILES = {
+    ('yosys', 'syn_asic'): (1, 4),
+    ('yosys', 'syn_fpga'): (1, 2),
+    ('openroad', 'init_floorplan'): (1, 2),
+    ('openroad', 'macro_placement'): (4, 8),
+    ('openroad', 'endcap_tapcell_insertion'): (1, 2),
+    ('openroad', 'power_grid'): (1, 3),
+    ('openroad', 'pin_placement'): (1, 2),
+    ('openroad', 'global_placement'): (8, 4),
+    ('openroad', 'repair_design'): (4, 4),
+    ('openroad', 'detailed_placement'): (4, 3),
+    ('openroad', 'clock_tree_synthesis'): (4, 4),
+    ('openroad', 'repair_timing'): (4, 4),
+    ('openroad', 'global_route'): (8, 6),
+    ('openroad', 'antenna_repair'): (4, 4),
+    ('openroad', 'detailed_route'): (16, 8),
+    ('openroad', 'fillercell_insertion'): (1, 3),
+    ('openroad', 'write_data'): (4, 4),
+    ('klayout', 'export'): (1, 4),
+    ('magic', 'drc'): (1, 8),
+    ('magic', 'extspice'): (1, 6),
+    ('netgen', 'lvs'): (1, 4),
+}
+DEFAULT_PROFILE = (1, 2)
+
+# Share of the host memory runs may reserve, the rest is left to the system
+MEMORY_FRACTION = 0.9
+
+# A run starts once it can get at least this share of the threads it can use
+MIN_THREAD_SHARE = 0.5
+
+# Seconds between checks while waiting for resources
+POLL_INTERVAL = 10
+
+
+def _host():
+    '''
+    Returns the number of CPUs and the memory (GB) of the host.
+    '''
+    cpus = len(os.sched_getaffinity(0))
+    memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024**3
+    return cpus, memory * MEMORY_FRACTION
+
+
+def _steps(chip):
+    '''
+    Returns the steps of the flow of chip the next run executes, from the
+    option from to the option to steps.
+    '''
+    order = incremental.flow_order(chip)
+    start = chip.get('option', 'from')
+    stop = chip.get('option', 'to')
+    first = min(order.index(step) for step in start) if start else 0
+    last = max(order.index(step) for step in stop) if stop else len(order) - 1
+    return order[first:last + 1]
+
+
+def _nodes(chip):
+    flow = chip.get('option', 'flow')
+    for step in _steps(chip):
+        for index in chip.getkeys('flowgraph', flow, step):
+            yield step, index, (chip.get('flowgraph', flow, step, index, 'tool'),
+                                chip.get('flowgraph', flow, step, index, 'task'))
+
+
+def demand(chip):
+    '''
+    Returns the threads and memory (GB) of the most demanding step chip runs
+    next, counting the parallel indices of a step together.
+    '''
+    threads = {}
+    memory = {}
+    for step, _, task in _nodes(chip):
+        task_threads, task_memory = PROFILES.get(task, DEFAULT_PROFILE)
+        threads[step] = threads.get(step, 0) + task_threads
+        memory[step] = memory.get(step, 0) + task_memory
+    return max(threads.values()), max(memory.values())
+
+
+def set_threads(chip, threads):
+    '''
+    Sets the thread count of every task chip runs next to what it scales to,
+    limited to threads.
+    '''
+    for step, index, task in _nodes(chip):
+        task_threads, _ = PROFILES.get(task, DEFAULT_PROFILE)
+        chip.set('tool', task[0], 'task', task[1], 'threads', min(task_threads, threads),
+                 step=step, index=index)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextlib.contextmanager
+def _ledger(path):
+    '''
+    Yields the reservations of the ledger at path, with entries of processes
+    that are gone removed, and writes them back on exit. The ledger is locked
+    for the duration of the block.
+    '''
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            entries = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    entries = json.load(f)
+            entries = {token: entry for token, entry in entries.items() if _alive(entry['pid'])}
+
+            yield entries
+
+            with open(path, 'w') as f:
+                json.dump(entries, f, indent=2)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _try_reserve(path, token, name, threads, memory):
+    '''
+    Records the reservation if the host has room for it. Returns the threads
+    granted, or None if the run has to wait.
+    '''
+    host_cpus, host_memory = _host()
+    with _ledger(path) as entries:
+        free_cpus = host_cpus - sum(entry['threads'] for entry in entries.values())
+        free_memory = host_memory - sum(entry['memory'] for entry in entries.values())
+
+        # A run that does not fit an idle host gets the whole host
+        threads = min(threads, host_cpus)
+        memory = min(memory, host_memory)
+        if entries and (free_cpus < max(1, threads * MIN_THREAD_SHARE) or free_memory < memory):
+            return None
+
+        granted = max(1, min(threads, free_cpus))
+        entries[token] = {'pid': os.getpid(), 'name': name, 'threads': granted,
+                          'memory': memory}
+        return granted
+
+
+@contextlib.contextmanager
+def reserve(chip, path=LEDGER_FILE):
+    '''
+    Waits until the host can run the flow of chip, sets the thread count of
+    its tasks and holds the reservation for the duration of the block.
+    '''
+    threads, memory = demand(chip)
+    name = f"{chip.design}/{chip.get('option', 'jobname')}"
+    token = uuid.uuid4().hex
+
+    granted = _try_reserve(path, token, name, threads, memory)
+    if granted is None:
+        print(f'{name}: waiting for {threads} threads and {memory} GB of memory')
+        while granted is None:
+            time.sleep(POLL_INTERVAL)
+            granted = _try_reserve(path, token, name, threads, memory)
+    set_threads(chip, granted)
+
+    try:
+        yield granted
+    finally:
+        with _ledger(path) as entries:
+            entries.pop(token, None)
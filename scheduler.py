@@ -0,0 +1,74 @@
+'''
+Dependency-aware task scheduler for ZeroSoC builds
+'''
+
+import concurrent.futures
+import sys
+
+
+def _check_graph(graph):
+    for name, (_, _, deps) in graph.items():
+        for dep in deps:
+            if dep not in graph:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+
+    # Kahn's algorithm, only used to reject cycles before anything is launched
+    remaining = {name: set(deps) for name, (_, _, deps) in graph.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Task graph contains a cycle: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_graph(graph, jobs=None):
+    '''
+    Run a DAG of tasks in a process pool.
+
+    graph maps a task name to a tuple of (function, kwargs, dependencies). A task
+    is submitted as soon as all of its dependencies have completed, so
+    independent branches of the graph run concurrently. Functions must be
+    importable module-level callables and their return values picklable.
+
+    Returns a tuple of (results, failed), where results maps completed task names
+    to their return values and failed lists the tasks that raised or were skipped
+    because an upstream task failed.
+    '''
+    _check_graph(graph)
+
+    pending = dict(graph)
+    running = {}
+    results = {}
+    failed = []
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name, (func, kwargs, deps) in list(pending.items()):
+                if any(dep in failed for dep in deps):
+                    print(f"Skipping '{name}', upstream task failed.", file=sys.stderr)
+                    failed.append(name)
+                    del pending[name]
+                elif all(dep in results for dep in deps):
+                    print(f"Starting '{name}'")
+                    running[pool.submit(func, **kwargs)] = name
+                    del pending[name]
+
+            if not running:
+                continue
+
+            done, _ = concurrent.futures.wait(running,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                exc = future.exception()
+                if exc:
+                    print(f"Task '{name}' failed: {exc}", file=sys.stderr)
+                    failed.append(name)
+                else:
+                    print(f"Finished '{name}'")
+                    results[name] = future.result()
+
+    return results, failed
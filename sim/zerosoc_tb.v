@@ -1,3 +1,40 @@
+// Firmware testbench, configured at run time with plusargs:
+//   +firmware=<file>    hex image loaded into the RAM after its own init file
+//   +timeout=<cycles>   end the run after this many cycles (default 5000)
+//   +uart_period=<n>    clock cycles per UART bit (default 625, 6 MHz / 9600 baud)
+//   +gpio_mask=<hex>    GPIO outputs compared with the pass and fail patterns
+//   +pass_gpio=<hex>    end the run with PASS once (gpio & mask) == pattern
+//   +fail_gpio=<hex>    end the run with FAIL once (gpio & mask) == pattern
+//   +vcd=<file>         dump the whole design to file
+// Every byte sent on the UART is printed as "UART <hex>". The Ibex parameters
+// are set with the IBEX_* defines of a core profile, see profiles.py, and the
+// RAM with the RAM_* defines, see ram.py. The RAM starts with sw/hello.mem,
+// split per tile in RAMs of several tiles, and the firmware is loaded across
+// all of its banks and tiles.
+
+`ifndef RAM_DEPTH
+`define RAM_DEPTH 2048
+`endif
+`ifndef RAM_BANKS
+`define RAM_BANKS 1
+`endif
+`ifndef RAM_TILE_DEPTH
+`define RAM_TILE_DEPTH (`RAM_DEPTH / `RAM_BANKS)
+`endif
+
+`ifndef IBEX_RV32M
+`define IBEX_RV32M 0
+`endif
+`ifndef IBEX_BRANCH_TARGET_ALU
+`define IBEX_BRANCH_TARGET_ALU 0
+`endif
+`ifndef IBEX_WRITEBACK_STAGE
+`define IBEX_WRITEBACK_STAGE 0
+`endif
+`ifndef IBEX_PIPELINE
+`define IBEX_PIPELINE 0
+`endif
+
 module zerosoc_tb();
 
 reg clk;
@@ -6,8 +43,32 @@ reg rst;
 wire uart_tx, uart_tx_en;
 wire [31:0] gpio, gpio_en;
 
+reg [8*256-1:0] firmware;
+reg [8*256-1:0] vcd;
+integer timeout;
+integer uart_period;
+reg [31:0] gpio_mask;
+reg [31:0] pass_gpio;
+reg [31:0] fail_gpio;
+
+integer cycles;
+integer i;
+reg [7:0] uart_byte;
+
+localparam RamTiles = `RAM_DEPTH / `RAM_BANKS / `RAM_TILE_DEPTH;
+
+reg [31:0] image [0:`RAM_DEPTH-1];
+reg image_loaded;
+
 zerosoc #(
-    .RamInitFile("sw/hello.mem")
+    .RamInitFile("sw/hello.mem"),
+    .RamDepth(`RAM_DEPTH),
+    .RamBanks(`RAM_BANKS),
+    .RamTileDepth(`RAM_TILE_DEPTH),
+    .IbexRV32M(`IBEX_RV32M),
+    .IbexBranchTargetALU(`IBEX_BRANCH_TARGET_ALU),
+    .IbexWritebackStage(`IBEX_WRITEBACK_STAGE),
+    .IbexPipeLine(`IBEX_PIPELINE)
 ) uut (
     .clk_i(clk),
     .rst_ni(rst),
@@ -19,6 +80,49 @@ zerosoc #(
     .gpio_en_o(gpio_en)
 );
 
+initial begin
+    if (!$value$plusargs("timeout=%d", timeout)) timeout = 5000;
+    if (!$value$plusargs("uart_period=%d", uart_period)) uart_period = 625;
+    if (!$value$plusargs("gpio_mask=%h", gpio_mask)) gpio_mask = 32'b0;
+    if (!$value$plusargs("pass_gpio=%h", pass_gpio)) pass_gpio = 32'b0;
+    if (!$value$plusargs("fail_gpio=%h", fail_gpio)) fail_gpio = 32'b0;
+
+    if ($value$plusargs("vcd=%s", vcd)) begin
+        $dumpfile(vcd);
+        $dumpvars;
+    end
+
+    image_loaded = 1'b0;
+    if ($value$plusargs("firmware=%s", firmware)) begin
+        // After the RAM has loaded its init file
+        #1;
+        $readmemh(firmware, image);
+        image_loaded = 1'b1;
+    end
+end
+
+// Copy each tile's slice of the image into it, the banks and their tiles are
+// contiguous. Words the image does not set keep the RAM's init file.
+genvar b, t;
+generate
+    for (b = 0; b < `RAM_BANKS; b = b + 1) begin : gen_load_bank
+        for (t = 0; t < RamTiles; t = t + 1) begin : gen_load_tile
+            integer w;
+            initial begin
+                #2;
+                if (image_loaded) begin
+                    for (w = 0; w < `RAM_TILE_DEPTH; w = w + 1) begin
+                        if (^image[(b * RamTiles + t) * `RAM_TILE_DEPTH + w] !== 1'bx) begin
+                            uut.gen_ram_bank[b].ram.gen_tile[t].u_tile.u_mem.gen_generic.u_impl_generic.mem[w] =
+                                image[(b * RamTiles + t) * `RAM_TILE_DEPTH + w];
+                        end
+                    end
+                end
+            end
+        end
+    end
+endgenerate
+
 initial begin
     forever #1 clk = !clk;
 end
@@ -30,14 +134,43 @@ initial begin
     rst = 1'b0;
     #5;
     rst = 1'b1;
-    #10000;
-    $finish;
 end
 
+initial cycles = 0;
+
+always @(posedge clk) begin
+    cycles <= cycles + 1;
+    if (cycles >= timeout) begin
+        $display("TIMEOUT after %0d cycles", cycles);
+        $finish;
+    end
+    if (rst && gpio_mask != 32'b0) begin
+        if ((gpio & gpio_mask) == pass_gpio) begin
+            $display("PASS gpio %h after %0d cycles", gpio, cycles);
+            $finish;
+        end
+        if ((gpio & gpio_mask) == fail_gpio) begin
+            $display("FAIL gpio %h after %0d cycles", gpio, cycles);
+            $finish;
+        end
+    end
+end
+
+// UART receiver, 8N1
 initial begin
-    // Set variables to be dumped to vcd file here
-    $dumpfile("zerosoc.vcd");
-    $dumpvars;
+    #10;
+    forever begin
+        wait (uart_tx === 1'b1);
+        @(negedge uart_tx);
+        // Sample each bit in its middle
+        repeat (uart_period / 2) @(posedge clk);
+        for (i = 0; i < 8; i = i + 1) begin
+            repeat (uart_period) @(posedge clk);
+            uart_byte[i] = uart_tx;
+        end
+        repeat (uart_period) @(posedge clk);
+        $display("UART %h", uart_byte);
+    end
 end
 
 endmodule
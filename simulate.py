@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+'''
+ZeroSoC firmware regression
+
+Compiles the zerosoc simulation model with Icarus Verilog once and runs any
+number of firmware images on it in parallel. A run ends as soon as its UART
+output contains the expected text, a pass or fail GPIO pattern appears, or it
+times out. Only failed runs are repeated with waveform dumping, limited to the
+selected scopes:
+
+    ./simulate.py sw/*.mem --expect 'Hello world!' --dump-scope ibex_core
+
+The expected UART text of an image can also be put in a .expect file next to
+it, e.g. sw/hello.expect.
+'''
+
+import argparse
+import concurrent.futures
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+
+import profiles
+import ram
+
+SIM_DIR = os.path.join('build', 'sim')
+TESTBENCH = os.path.join('sim', 'zerosoc_tb.v')
+MODEL = 'zerosoc_sim.v'
+
+# Default run length, in clock cycles
+TIMEOUT = 1000000
+
+# Default RAM size in 32 bit words, the size the firmware is linked for
+RAM_DEPTH = 2048
+
+_DUMP_MODULE = '''module zerosoc_tb_dump();
+reg [8*256-1:0] vcd;
+initial begin
+    if ($value$plusargs("scope_vcd=%s", vcd)) begin
+        $dumpfile(vcd);
+{dumpvars}
+    end
+end
+endmodule
+'''
+
+
+def compile_model(model=MODEL, scopes=(), defines=(), sim_dir=SIM_DIR):
+    '''
+    Compiles the testbench and model with defines, plus a module dumping
+    scopes of the design when given, unless an up to date build exists.
+    Returns the path of the compiled simulation.
+    '''
+    os.makedirs(sim_dir, exist_ok=True)
+    sources = [TESTBENCH, model]
+    name = 'zerosoc_tb'
+    if defines:
+        name += '_' + hashlib.sha256(' '.join(defines).encode()).hexdigest()[:12]
+    if scopes:
+        tag = hashlib.sha256(' '.join(scopes).encode()).hexdigest()[:12]
+        dump = os.path.join(sim_dir, f'dump_{tag}.v')
+        if not os.path.exists(dump):
+            with open(dump, 'w') as f:
+                f.write(_DUMP_MODULE.format(dumpvars='\n'.join(
+                    f'        $dumpvars(0, zerosoc_tb.uut.{scope});' for scope in scopes)))
+        sources.append(dump)
+        name += f'_{tag}'
+
+    vvp = os.path.join(sim_dir, f'{name}.vvp')
+    if os.path.exists(vvp) and \
+            all(os.path.getmtime(vvp) >= os.path.getmtime(source) for source in sources):
+        return vvp
+
+    subprocess.run(['iverilog', '-g2005-sv', *[f'-D{define}' for define in defines],
+                    '-o', vvp, *sources], check=True)
+    return vvp
+
+
+def _expected_text(image, default):
+    path = f'{os.path.splitext(image)[0]}.expect'
+    if os.path.exists(path):
+        with open(path) as f:
+            return f.read().rstrip('\n')
+    return default
+
+
+class Regression:
+    '''
+    Runs firmware images on a compiled simulation, optionally stopping all
+    runs after the first failure.
+    '''
+
+    def __init__(self, expect=None, gpio=None, timeout=TIMEOUT, fail_fast=False,
+                 sim_dir=SIM_DIR):
+        self.expect = expect
+        self.gpio = gpio
+        self.timeout = timeout
+        self.fail_fast = fail_fast
+        self.sim_dir = sim_dir
+
+        self._lock = threading.Lock()
+        self._procs = set()
+        self._stopped = False
+
+    def _stop(self):
+        with self._lock:
+            self._stopped = True
+            for proc in self._procs:
+                proc.kill()
+
+    def _args(self, vvp, image, plusargs):
+        args = ['vvp', '-n', vvp, f'+firmware={image}', f'+timeout={self.timeout}',
+                *plusargs]
+        if self.gpio:
+            mask, pass_gpio, fail_gpio = self.gpio
+            args.extend([f'+gpio_mask={mask:x}', f'+pass_gpio={pass_gpio:x}',
+                         f'+fail_gpio={fail_gpio:x}'])
+        return args
+
+    def _watch(self, proc, log, expect):
+        uart = bytearray()
+        for line in proc.stdout:
+            log.write(line)
+            if line.startswith('UART '):
+                uart.append(int(line.split()[1], 16))
+                if expect and expect in uart.decode(errors='replace'):
+                    return 'pass', uart
+            elif line.startswith(('PASS', 'FAIL', 'TIMEOUT')):
+                return line.split()[0].lower(), uart
+        return None, uart
+
+    def run(self, vvp, image, plusargs=(), suffix=''):
+        '''
+        Runs image and returns its result: the image, its status (pass, fail,
+        timeout, error or cancelled) and UART output.
+        '''
+        name = os.path.splitext(os.path.basename(image))[0]
+        expect = _expected_text(image, self.expect)
+
+        with self._lock:
+            if self._stopped:
+                return {'image': image, 'status': 'cancelled', 'uart': ''}
+            proc = subprocess.Popen(self._args(vvp, image, plusargs),
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    stdin=subprocess.DEVNULL, text=True)
+            self._procs.add(proc)
+
+        with proc, open(os.path.join(self.sim_dir, f'{name}{suffix}.log'), 'w') as log:
+            status, uart = self._watch(proc, log, expect)
+            proc.kill()
+        with self._lock:
+            self._procs.discard(proc)
+            if status is None:
+                status = 'cancelled' if self._stopped else 'error'
+
+        if status not in ('pass', 'cancelled') and self.fail_fast:
+            self._stop()
+        return {'image': image, 'status': status, 'uart': uart.decode(errors='replace')}
+
+    def run_all(self, vvp, images, jobs=None, plusargs=None, suffix=''):
+        '''
+        Runs images in parallel. plusargs optionally maps an image to extra
+        plusargs for its run.
+        '''
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(self.run, vvp, image, (plusargs or {}).get(image, ()), suffix)
+                       for image in images]
+            return [future.result() for future in futures]
+
+
+def regress(images, model=MODEL, expect=None, gpio=None, timeout=TIMEOUT, scopes=(),
+            defines=(), dump=True, fail_fast=False, jobs=None, sim_dir=SIM_DIR):
+    '''
+    Runs every image, then repeats the failed ones with dumping. Returns the
+    results, with the waveform of each repeated run under 'vcd'.
+    '''
+    regression = Regression(expect=expect, gpio=gpio, timeout=timeout, fail_fast=fail_fast,
+                            sim_dir=sim_dir)
+    results = regression.run_all(compile_model(model, defines=defines, sim_dir=sim_dir), images,
+                                 jobs=jobs)
+
+    failed = [result['image'] for result in results
+              if result['status'] not in ('pass', 'cancelled')]
+    if not failed or not dump:
+        return results
+
+    # Repeat the failed runs with dumping, without stopping each other
+    regression = Regression(expect=expect, gpio=gpio, timeout=timeout, sim_dir=sim_dir)
+    vcds = {image: os.path.join(sim_dir, f'{os.path.splitext(os.path.basename(image))[0]}.vcd')
+            for image in failed}
+    plusarg = 'scope_vcd' if scopes else 'vcd'
+    regression.run_all(compile_model(model, scopes=scopes, defines=defines, sim_dir=sim_dir),
+                       failed, jobs=jobs,
+                       plusargs={image: [f'+{plusarg}={vcd}'] for image, vcd in vcds.items()},
+                       suffix='.dump')
+    for result in results:
+        if result['image'] in vcds:
+            result['vcd'] = vcds[result['image']]
+    return results
+
+
+def _gpio(value):
+    mask, pass_gpio, fail_gpio = (int(field, 0) for field in value.split(':'))
+    return mask, pass_gpio, fail_gpio
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Run firmware images on the ZeroSoC model')
+    parser.add_argument('images', nargs='+', metavar='MEM', help='Firmware images to run.')
+    parser.add_argument('--model', default=MODEL, help='Verilog model of zerosoc.')
+    parser.add_argument('--profile', choices=sorted(profiles.PROFILES),
+                        default=profiles.DEFAULT_PROFILE,
+                        help='Ibex core profile (default: %(default)s).')
+    parser.add_argument('--ram-depth', type=int, default=RAM_DEPTH, metavar='WORDS',
+                        help='RAM size in 32 bit words, in tiles of '
+                        f'{ram.SRAM_DEPTH} words (default: %(default)s).')
+    parser.add_argument('--ram-banks', type=int, default=ram.DEFAULT_BANKS, metavar='N',
+                        help='Number of RAM banks (default: %(default)s).')
+    parser.add_argument('--expect', help='UART output that makes a run pass.')
+    parser.add_argument('--gpio', type=_gpio, metavar='MASK:PASS:FAIL',
+                        help='GPIO output patterns that end a run with a pass or a fail.')
+    parser.add_argument('--timeout', type=int, default=TIMEOUT,
+                        help=f'Run length in clock cycles (default: {TIMEOUT}).')
+    parser.add_argument('--dump-scope', action='append', default=[], dest='scopes',
+                        metavar='SCOPE',
+                        help='Instance under the design to dump on failure, e.g. '
+                        'ibex_core. Can be repeated. Default: the whole design.')
+    parser.add_argument('--no-dump', action='store_true',
+                        help='Do not repeat failed runs with dumping.')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='Stop all runs after the first failure.')
+    parser.add_argument('--jobs', type=int, help='Number of runs at the same time.')
+    options = parser.parse_args()
+
+    try:
+        ram_defines = ram.defines(options.ram_depth, options.ram_banks)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = regress(options.images, model=options.model, expect=options.expect,
+                      gpio=options.gpio, timeout=options.timeout, scopes=options.scopes,
+                      defines=[*profiles.defines(options.profile), *ram_defines],
+                      dump=not options.no_dump,
+                      fail_fast=options.fail_fast, jobs=options.jobs)
+
+    for result in results:
+        print(f"{result['image']}: {result['status'].upper()}")
+        if result['status'] != 'pass':
+            print(f"    UART: {result['uart']!r}")
+        if 'vcd' in result:
+            print(f"    waveform: {result['vcd']}")
+
+    passed = sum(result['status'] == 'pass' for result in results)
+    print(f'{passed} of {len(results)} passed')
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+'''
+Resolved, locked RTL source list for the zerosoc_core and opentitan libraries
+
+Instead of letting the front end search the ydirs of both libraries, every
+module and package the design references is resolved to exactly one file,
+and the ordered list is stored in a lock file keyed by a hash of the sources.
+'''
+
+import hashlib
+import json
+import os
+import re
+
+import filehash
+
+LOCK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.lock.json')
+
+# Verilog library extensions searched in each ydir, in order
+LIBEXT = ('.sv', '.v')
+
+_COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"')
+_DECL_RE = re.compile(r'\b(module|macromodule|interface|package)\s+'
+                      r'(?:(?:automatic|static)\s+)?([A-Za-z_]\w*)')
+_PKG_REF_RE = re.compile(r'\b([A-Za-z_]\w*)\s*::')
+_INCLUDE_RE = re.compile(r'`include\s+"([^"]+)"')
+# Whole identifier, not a named port connection, followed by a parameter
+# override or a whole instance name and port list
+_INST_RE = re.compile(r'(?<![\w.$`])([A-Za-z_]\w*)(?!\w)\s*'
+                      r'(?:#|[A-Za-z_]\w*(?!\w)\s*(?:\[[^\]]*\]\s*)?\()')
+_PARAM_RE = re.compile(r'\b(?:parameter|localparam)\b[^=;]*?\b([A-Za-z_]\w*)\s*=')
+# Keywords that can precede an identifier and a parenthesis
+_KEYWORDS = {
+    'always', 'always_comb', 'always_ff', 'always_latch', 'assert', 'assign', 'automatic',
+    'begin', 'bit', 'byte', 'case', 'casez', 'casex', 'else', 'end', 'endcase',
+    'endfunction', 'endgenerate', 'endmodule', 'endtask', 'for', 'foreach', 'function',
+    'generate', 'genvar', 'if', 'initial', 'inout', 'input', 'int', 'integer', 'localparam',
+    'logic', 'module', 'output', 'parameter', 'property', 'reg', 'repeat', 'return',
+    'sequence', 'signed', 'static', 'task', 'unique', 'unsigned', 'virtual', 'void',
+    'while', 'wire'
+}
+
+
+def scan(path):
+    '''
+    Returns (declarations, packages, modules) for one source file: the
+    (kind, name) pairs it declares, the packages it references and the names
+    it may instantiate.
+    '''
+    with open(path, errors='replace') as f:
+        text = _STRING_RE.sub('""', _COMMENT_RE.sub(' ', f.read()))
+
+    declarations = _DECL_RE.findall(text)
+    declared = {name for _, name in declarations}
+    packages = set(_PKG_REF_RE.findall(text)) - declared
+    modules = set(_INST_RE.findall(text)) - declared - _KEYWORDS - set(_PARAM_RE.findall(text))
+    return declarations, packages, modules
+
+
+def includes(path, idirs):
+    '''
+    Returns the files path includes, directly or through other included files,
+    looked up next to the including file and then in idirs.
+    '''
+    found = []
+    queue = [path]
+    while queue:
+        current = queue.pop(0)
+        with open(current, errors='replace') as f:
+            text = _COMMENT_RE.sub(' ', f.read())
+        for name in _INCLUDE_RE.findall(text):
+            for idir in [os.path.dirname(current), *idirs]:
+                candidate = os.path.join(idir, name)
+                if os.path.isfile(candidate):
+                    if candidate not in found:
+                        found.append(candidate)
+                        queue.append(candidate)
+                    break
+    return found
+
+
+def _libraries():
+    # Imported here, as both libraries consult this module from setup()
+    import opentitan
+    import zerosoc_core
+
+    return {'zerosoc': zerosoc_core, 'opentitan': opentitan}
+
+
+def compute_key():
+    '''
+    Hash of everything that determines the resolved file list: the search
+    configuration of both libraries, the pinned OpenTitan ref, the defines and
+    the local sources, which unlike OpenTitan can change without a new ref.
+    '''
+    libraries = _libraries()
+    zerosoc_core = libraries['zerosoc']
+
+    config = {package: [module.INPUTS, module.YDIRS] for package, module in libraries.items()}
+    config['opentitan_ref'] = libraries['opentitan'].OPENTITAN_REF
+    config['defines'] = zerosoc_core.defines()
+
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps(config, sort_keys=True).encode())
+
+    root = zerosoc_core.ROOT
+    files = [os.path.join(root, path) for path in zerosoc_core.INPUTS]
+    for ydir in zerosoc_core.YDIRS:
+        for name in sorted(os.listdir(os.path.join(root, ydir))):
+            if name.endswith(LIBEXT):
+                files.append(os.path.join(root, ydir, name))
+
+    with filehash.HashCache() as cache:
+        digests = cache.hash_files(files)
+    for path, digest in zip(files, digests):
+        hasher.update(f'{os.path.relpath(path, root)}:{digest}'.encode())
+
+    return hasher.hexdigest()
+
+
+def _find_in_ydirs(name, ydirs, roots):
+    for package, ydir in ydirs:
+        for ext in LIBEXT:
+            path = os.path.join(roots[package], ydir, name + ext)
+            if os.path.isfile(path):
+                return package, os.path.join(ydir, name + ext)
+    return None
+
+
+def resolve(roots):
+    '''
+    Resolves the design's sources given the root directory of each package.
+    Returns an ordered list of (package, path) entries: files declaring
+    packages first, in dependency order, followed by all other files sorted by
+    path, and the sorted names that were not found in any ydir.
+    '''
+    libraries = _libraries()
+    ydirs = [(package, ydir) for package, module in libraries.items() for ydir in module.YDIRS]
+
+    files = {}
+    definitions = {}
+    queue = [(package, path) for package, module in libraries.items() for path in module.INPUTS]
+    unresolved = set()
+
+    while queue:
+        entry = queue.pop(0)
+        if entry in files:
+            continue
+        package, path = entry
+        files[entry] = scan(os.path.join(roots[package], path))
+        declarations, packages, modules = files[entry]
+        for _, name in declarations:
+            definitions.setdefault(name, entry)
+
+        for name in sorted(packages | modules):
+            if name in definitions or name in unresolved:
+                continue
+            found = _find_in_ydirs(name, ydirs, roots)
+            if found:
+                definitions[name] = found
+                queue.append(found)
+            else:
+                # Keywords, types, or cells provided by other libraries
+                unresolved.add(name)
+
+    return _order(files, definitions), sorted(unresolved)
+
+
+def _order(files, definitions):
+    package_files = {entry for entry, (decls, _, _) in files.items()
+                     if any(kind == 'package' for kind, _ in decls)}
+
+    ordered = []
+    visiting = set()
+
+    def visit(entry):
+        if entry in ordered or entry in visiting:
+            return
+        visiting.add(entry)
+        for name in sorted(files[entry][1]):
+            dep = definitions.get(name)
+            if dep in package_files:
+                visit(dep)
+        visiting.discard(entry)
+        ordered.append(entry)
+
+    for entry in sorted(package_files):
+        visit(entry)
+    for entry in sorted(files):
+        if entry not in package_files:
+            ordered.append(entry)
+
+    return ordered
+
+
+def package_roots():
+    '''
+    Returns the root directory of the sources of each package.
+    '''
+    libraries = _libraries()
+    opentitan = libraries['opentitan']
+
+    opentitan_root = opentitan.snapshot_path()
+    if not opentitan_root:
+        from siliconcompiler.package import path as sc_path
+        opentitan_root = sc_path(opentitan.setup(), 'opentitan')
+
+    return {'zerosoc': libraries['zerosoc'].ROOT, 'opentitan': opentitan_root}
+
+
+def write_lock(path=LOCK_FILE, roots=None):
+    '''
+    Resolves the sources from roots, by default those of package_roots(), and
+    writes the lock file. Returns the resolved entries and unresolved names.
+    '''
+    key = compute_key()
+    entries, unresolved = resolve(roots or package_roots())
+    if roots is None:
+        _check_snapshot(unresolved)
+    with open(path, 'w') as f:
+        json.dump({'key': key, 'files': entries}, f, indent=2)
+    return entries, unresolved
+
+
+def _check_snapshot(unresolved):
+    # The snapshot only holds the files resolved when it was taken, so a module
+    # the RTL started using since would otherwise be taken for a cell of
+    # another library and left out
+    known = _libraries()['opentitan'].snapshot_unresolved()
+    if known is None:
+        return
+    missing = sorted(set(unresolved) - set(known))
+    if missing:
+        raise ValueError(f"{', '.join(missing)} not found in the OpenTitan snapshot, "
+                         'take a new one with ./opentitan.py')
+
+
+def ensure_lock(path=LOCK_FILE):
+    '''
+    Regenerates the lock file if it is missing or stale.
+    '''
+    if locked_files('zerosoc', path=path) is None:
+        write_lock(path=path)
+
+
+def locked_files(package, path=LOCK_FILE):
+    '''
+    Returns the ordered source files of package from the lock file, or None if
+    there is no lock file or it does not match the current sources.
+    '''
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        lock = json.load(f)
+    if lock['key'] != compute_key():
+        return None
+
+    return [file for file_package, file in lock['files'] if file_package == package]
+
+
+if __name__ == '__main__':
+    for package, file in write_lock()[0]:
+        print(f'{package}: {file}')
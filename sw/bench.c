@@ -0,0 +1,196 @@
+#include "lib/zerosoc.h"
+
+/*
+ * Cycle count benchmarks, run by ../bench_profiles.py on each core profile.
+ * Prints "bench <name> <cycles> <checksum>" per benchmark, then "done".
+ */
+
+#define ITERATIONS 4
+
+#define LIST_SIZE 32
+#define MATRIX_SIZE 8
+#define CRC_SIZE 256
+#define COPY_SIZE 1024
+#define UART_SIZE 64
+
+typedef struct node_t {
+  struct node_t *next;
+  int value;
+} node_t;
+
+static node_t nodes[LIST_SIZE];
+static int matrix_a[MATRIX_SIZE][MATRIX_SIZE];
+static int matrix_b[MATRIX_SIZE][MATRIX_SIZE];
+static int matrix_c[MATRIX_SIZE][MATRIX_SIZE];
+static uint8_t copy_src[COPY_SIZE];
+static uint8_t copy_dst[COPY_SIZE];
+
+static const char *STATE_INPUT = "5012,1.25,-7e3,0x1f,42,,3.0e-2,abc,-12,7.5";
+
+static zerosoc_t soc;
+
+/* Linked list: build, reverse and search, as in CoreMark's list kernel */
+static uint32_t bench_list(void) {
+  for (int i = 0; i < LIST_SIZE; i++) {
+    nodes[i].value = (i * 7919) & 0xff;
+    nodes[i].next = i + 1 < LIST_SIZE ? &nodes[i + 1] : 0;
+  }
+
+  node_t *head = &nodes[0];
+  node_t *reversed = 0;
+  while (head) {
+    node_t *next = head->next;
+    head->next = reversed;
+    reversed = head;
+    head = next;
+  }
+
+  uint32_t sum = 0;
+  for (node_t *n = reversed; n; n = n->next) {
+    if (n->value & 1) sum += n->value;
+  }
+  return sum;
+}
+
+/* Integer matrix multiply, as in CoreMark's matrix kernel */
+static uint32_t bench_matrix(void) {
+  for (int i = 0; i < MATRIX_SIZE; i++) {
+    for (int j = 0; j < MATRIX_SIZE; j++) {
+      matrix_a[i][j] = i - j + 3;
+      matrix_b[i][j] = i * 2 + j;
+    }
+  }
+
+  uint32_t sum = 0;
+  for (int i = 0; i < MATRIX_SIZE; i++) {
+    for (int j = 0; j < MATRIX_SIZE; j++) {
+      int acc = 0;
+      for (int k = 0; k < MATRIX_SIZE; k++) acc += matrix_a[i][k] * matrix_b[k][j];
+      matrix_c[i][j] = acc;
+      sum += acc;
+    }
+  }
+  return sum;
+}
+
+/* Number classifier state machine, as in CoreMark's state kernel */
+enum { STATE_START, STATE_INT, STATE_FLOAT, STATE_EXP, STATE_HEX, STATE_INVALID };
+
+static uint32_t bench_state(void) {
+  uint32_t counts[STATE_INVALID + 1] = {0};
+  int state = STATE_START;
+  for (const char *c = STATE_INPUT;; c++) {
+    if (*c == ',' || *c == '\0') {
+      counts[state]++;
+      state = STATE_START;
+      if (*c == '\0') break;
+      continue;
+    }
+    switch (state) {
+      case STATE_START:
+        state = (*c >= '0' && *c <= '9') || *c == '-' ? STATE_INT : STATE_INVALID;
+        break;
+      case STATE_INT:
+        if (*c == '.') state = STATE_FLOAT;
+        else if (*c == 'x') state = STATE_HEX;
+        else if (*c == 'e') state = STATE_EXP;
+        else if (*c < '0' || *c > '9') state = STATE_INVALID;
+        break;
+      case STATE_FLOAT:
+        if (*c == 'e') state = STATE_EXP;
+        else if (*c < '0' || *c > '9') state = STATE_INVALID;
+        break;
+      case STATE_EXP:
+        if (*c != '-' && (*c < '0' || *c > '9')) state = STATE_INVALID;
+        break;
+      case STATE_HEX:
+        if (!((*c >= '0' && *c <= '9') || (*c >= 'a' && *c <= 'f'))) state = STATE_INVALID;
+        break;
+      default:
+        break;
+    }
+  }
+
+  uint32_t sum = 0;
+  for (int i = 0; i <= STATE_INVALID; i++) sum = sum * 16 + counts[i];
+  return sum;
+}
+
+/* CRC-16/CCITT, as used by CoreMark to check its results */
+static uint32_t bench_crc(void) {
+  uint16_t crc = 0xffff;
+  for (int i = 0; i < CRC_SIZE; i++) {
+    crc ^= (uint16_t)((i * 31) & 0xff) << 8;
+    for (int bit = 0; bit < 8; bit++) {
+      crc = crc & 0x8000 ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+/* Byte copy, kept as a loop instead of a call to a memcpy we do not link */
+__attribute__((optimize("no-tree-loop-distribute-patterns")))
+static uint32_t bench_memcpy(void) {
+  for (int i = 0; i < COPY_SIZE; i++) copy_src[i] = (uint8_t)(i ^ 0x5a);
+  for (int i = 0; i < COPY_SIZE; i++) copy_dst[i] = copy_src[i];
+
+  uint32_t sum = 0;
+  for (int i = 0; i < COPY_SIZE; i += 64) sum += copy_dst[i];
+  return sum;
+}
+
+/* UART transmit throughput, bounded by the baud rate once the FIFO is full */
+static uint32_t bench_uart(void) {
+  char buf[UART_SIZE];
+  for (int i = 0; i < UART_SIZE - 2; i++) buf[i] = 'a' + i % 26;
+  buf[UART_SIZE - 2] = '\r';
+  buf[UART_SIZE - 1] = '\n';
+  return uart_write(&soc, buf, UART_SIZE);
+}
+
+static void print_uint(uint32_t value) {
+  char buf[11];
+  int i = sizeof(buf);
+  do {
+    buf[--i] = '0' + value % 10;
+    value /= 10;
+  } while (value);
+  uart_write(&soc, &buf[i], sizeof(buf) - i);
+}
+
+static void print_str(const char *s) {
+  size_t len = 0;
+  while (s[len]) len++;
+  uart_write(&soc, s, len);
+}
+
+static void run(const char *name, uint32_t (*bench)(void), int iterations) {
+  uint32_t checksum = 0;
+  uint64_t start = mcycle_read();
+  for (int i = 0; i < iterations; i++) checksum += bench();
+  uint64_t cycles = mcycle_read() - start;
+
+  print_str("bench ");
+  print_str(name);
+  print_str(" ");
+  print_uint((uint32_t)cycles);
+  print_str(" ");
+  print_uint(checksum);
+  print_str("\r\n");
+}
+
+int main() {
+  init_peripherals(&soc);
+
+  run("list", bench_list, ITERATIONS);
+  run("matrix", bench_matrix, ITERATIONS);
+  run("state", bench_state, ITERATIONS);
+  run("crc", bench_crc, ITERATIONS);
+  run("memcpy", bench_memcpy, ITERATIONS);
+  run("uart", bench_uart, 1);
+
+  print_str("done\r\n");
+
+  while (true) {
+  }
+}
@@ -24,6 +24,7 @@ size_t uart_read(zerosoc_t *soc, char *buf, size_t max_len);
 size_t uart_bytes_available(zerosoc_t *soc);
 
 void delay(unsigned long msec);
+uint64_t mcycle_read(void);
 uint64_t millis();
 
 #endif
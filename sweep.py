@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+'''
+ZeroSoC floorplan design-space sweep
+'''
+
+import argparse
+import csv
+import itertools
+import sys
+
+import incremental
+import make
+import resources
+import scheduler
+
+# Stage a sweep can stop after, and the tool and task of its last step
+STAGES = {
+    'floorplan': ('openroad', 'pin_placement'),
+    'place': ('openroad', 'detailed_placement'),
+    'route': ('openroad', 'detailed_route')
+}
+
+# Sweepable parameters of each design. Parameters that are not swept keep the
+# defaults of the design's setup, which grows the outline with the SRAM macros.
+DESIGNS = {
+    'core': {
+        'setup': '_setup_core',
+        'params': ('core_w', 'core_h', 'core_margin', 'place_density')
+    },
+    'top-flat': {
+        'setup': '_setup_top_flat',
+        'params': ('top_w', 'top_h', 'core_offset', 'place_density')
+    }
+}
+
+# (column, metric, direction for Pareto ranking: 1 to minimize, -1 to maximize)
+COLUMNS = (
+    ('area', None, 1),
+    ('utilization', 'utilization', 0),
+    ('wns', 'setupwns', -1),
+    ('overflow', 'overflow', 1)
+)
+
+
+def _parse_range(value):
+    '''
+    Parses "start:stop:step" (inclusive) or "a,b,c" into a list of numbers.
+    '''
+    number = float if '.' in value else int
+    if ':' in value:
+        start, stop, step = (number(v) for v in value.split(':'))
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f'step of {value} must be positive')
+        values = []
+        while start <= stop + step / 1000:
+            values.append(start)
+            start = number(round(start + step, 6))
+        return values
+    return [number(v) for v in value.split(',')]
+
+
+def _jobname(params):
+    return '_'.join(['sweep', *(f'{key}{value}' for key, value in params.items())])
+
+
+def _die_area(chip):
+    (x0, y0), (x1, y1) = chip.get('constraint', 'outline')
+    return (x1 - x0) * (y1 - y0)
+
+
+def run_variant(design, params, stage):
+    setup_params = dict(params)
+    if setup_params.get('place_density') is not None:
+        setup_params['place_density'] = f"{setup_params['place_density']:.2f}"
+    else:
+        setup_params.pop('place_density', None)
+
+    chip = getattr(make, DESIGNS[design]['setup'])(**setup_params)
+    chip.set('option', 'jobname', _jobname(params))
+    step = incremental.task_steps(chip, *STAGES[stage])[-1]
+    chip.set('option', 'to', [step])
+    chip.set('option', 'quiet', True)
+    with resources.reserve(chip):
+        chip.run()
+
+    row = {'job': chip.get('option', 'jobname'), **params, 'area': _die_area(chip)}
+    for column, metric, _ in COLUMNS:
+        if metric:
+            row[column] = chip.get('metric', metric, step=step, index='0')
+    return row
+
+
+def _dominates(a, b, objectives):
+    better = False
+    for column, direction in objectives:
+        if a[column] * direction > b[column] * direction:
+            return False
+        if a[column] * direction < b[column] * direction:
+            better = True
+    return better
+
+
+def mark_pareto(rows):
+    # Only rank on objectives that every variant reported at the chosen stage
+    objectives = [(column, direction) for column, _, direction in COLUMNS
+                  if direction and all(row.get(column) is not None for row in rows)]
+    for row in rows:
+        row['pareto'] = not any(_dominates(other, row, objectives)
+                                for other in rows if other is not row)
+    return rows
+
+
+def _print_table(rows, columns):
+    widths = [max(len(column), *(len(_format(row.get(column))) for row in rows))
+              for column in columns]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(_format(row.get(column)).ljust(width)
+                        for column, width in zip(columns, widths)))
+
+
+def _format(value):
+    if value is None:
+        return '-'
+    if value is True:
+        return '*'
+    if value is False:
+        return ''
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return str(value)
+
+
+def sweep(design, ranges, stage, jobs=None):
+    names = list(ranges)
+    graph = {}
+    for values in itertools.product(*ranges.values()):
+        params = dict(zip(names, values))
+        graph[_jobname(params)] = (run_variant,
+                                   {'design': design, 'params': params, 'stage': stage},
+                                   ())
+
+    results, failed = scheduler.run_graph(graph, jobs=jobs)
+    if failed:
+        print(f"Failed variants: {', '.join(failed)}", file=sys.stderr)
+
+    rows = mark_pareto(sorted(results.values(), key=lambda row: row['area']))
+    columns = ['job', *names, *(column for column, _, _ in COLUMNS), 'pareto']
+    return rows, columns
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Sweep ZeroSoC floorplan parameters')
+    parser.add_argument('--design',
+                        choices=sorted(DESIGNS),
+                        default='core',
+                        help='Design to sweep.')
+    parser.add_argument('--to',
+                        choices=list(STAGES),
+                        default='place',
+                        help='Last flow stage to run for each variant.')
+    parser.add_argument('--jobs',
+                        type=int,
+                        metavar='N',
+                        help='Number of variants to run at the same time.')
+    parser.add_argument('--csv',
+                        metavar='FILE',
+                        help='Also write the results table to FILE.')
+    params = {}
+    for design in DESIGNS.values():
+        params.update(dict.fromkeys(design['params']))
+    for param in params:
+        parser.add_argument(f'--{param}',
+                            type=_parse_range,
+                            metavar='RANGE',
+                            help='Values as start:stop:step or a,b,c '
+                                 '(default: not swept, as set up by make.py).')
+    options = parser.parse_args()
+
+    ranges = {param: getattr(options, param) for param in DESIGNS[options.design]['params']
+              if getattr(options, param)}
+
+    rows, columns = sweep(options.design, ranges, options.to, jobs=options.jobs)
+    _print_table(rows, columns)
+
+    if options.csv:
+        with open(options.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,151 @@
+'''
+Build performance history
+
+Every build run appends one record to an append-only JSON lines file: the
+wall time, tool execution time, peak memory and thread count of each step
+from the SC metrics, plus the wall and CPU time of the whole run. report()
+compares the latest run of each design and flow against the runs before it.
+'''
+
+import contextlib
+import datetime
+import json
+import os
+import resource
+import statistics
+import time
+from importlib import metadata
+
+HISTORY_FILE = os.path.join('build', 'telemetry.jsonl')
+
+# Number of earlier runs the latest run is compared against
+BASELINE_RUNS = 5
+
+# Steps shorter than this (s) are too noisy to compare
+MIN_STEP_TIME = 5
+
+_PACKAGES = ('siliconcompiler', 'lambdapdk', 'lambdalib')
+
+
+def _versions():
+    versions = {}
+    for package in _PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            pass
+    return versions
+
+
+def _steps(chip):
+    flow = chip.get('option', 'flow')
+    steps = {}
+    for step in chip.getkeys('flowgraph', flow):
+        for index in chip.getkeys('flowgraph', flow, step):
+            tasktime = chip.get('metric', 'tasktime', step=step, index=index)
+            if tasktime is None:
+                # Not part of this run
+                continue
+            tool = chip.get('flowgraph', flow, step, index, 'tool')
+            task = chip.get('flowgraph', flow, step, index, 'task')
+            steps[f'{step}/{index}'] = {
+                'tool': tool,
+                'task': task,
+                'tasktime': tasktime,
+                'exetime': chip.get('metric', 'exetime', step=step, index=index),
+                'memory': chip.get('metric', 'memory', step=step, index=index),
+                'threads': chip.get('tool', tool, 'task', task, 'threads',
+                                    step=step, index=index)
+            }
+    return steps
+
+
+@contextlib.contextmanager
+def record(chip, path=HISTORY_FILE):
+    '''
+    Records the runs of chip made inside the block, if they succeed.
+    '''
+    start = time.time()
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    yield
+
+    end = time.time()
+    end_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    entry = {
+        'time': datetime.datetime.fromtimestamp(start).isoformat(timespec='seconds'),
+        'design': chip.design,
+        'jobname': chip.get('option', 'jobname'),
+        'flow': chip.get('option', 'flow'),
+        'remote': bool(chip.get('option', 'remote')),
+        'versions': _versions(),
+        'walltime': end - start,
+        # Tools run as child processes, CPU time is only known for the whole run
+        'cputime': (end_usage.ru_utime - usage.ru_utime) + (end_usage.ru_stime - usage.ru_stime),
+        'steps': _steps(chip)
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _compare(latest, baseline, threshold):
+    regressions = []
+    for node, step in sorted(latest['steps'].items()):
+        previous = [entry['steps'][node]['tasktime'] for entry in baseline
+                    if node in entry['steps']]
+        if not previous:
+            continue
+        reference = statistics.median(previous)
+        if max(reference, step['tasktime']) < MIN_STEP_TIME:
+            continue
+        change = (step['tasktime'] - reference) / reference
+        if change > threshold:
+            regressions.append((node, step['tasktime'], reference, change))
+    return regressions
+
+
+def report(threshold=0.2, path=HISTORY_FILE):
+    '''
+    Prints the steps of the latest run of each design and flow that took more
+    than threshold longer than the median of the previous runs. Remote runs are
+    only compared with remote runs. Returns True if there are no regressions.
+    '''
+    runs = {}
+    for entry in _load(path):
+        runs.setdefault((entry['design'], entry['flow'], entry['remote']), []).append(entry)
+
+    if not runs:
+        print(f'No runs recorded in {path}.')
+        return True
+
+    ok = True
+    for (design, flow, remote), entries in sorted(runs.items()):
+        latest = entries[-1]
+        baseline = entries[-BASELINE_RUNS - 1:-1]
+        name = f"{design} {flow}{' (remote)' if remote else ''}"
+        if not baseline:
+            print(f'{name}: no earlier runs to compare with.')
+            continue
+
+        changed = {package: f'{baseline[-1]["versions"].get(package)} -> {version}'
+                   for package, version in latest['versions'].items()
+                   if baseline[-1]['versions'].get(package) != version}
+        print(f"{name}: {latest['walltime']:.0f} s, {latest['cputime']:.0f} s CPU, "
+              f'compared with {len(baseline)} earlier runs')
+        for package, change in changed.items():
+            print(f'    {package} {change}')
+
+        for node, tasktime, reference, change in _compare(latest, baseline, threshold):
+            ok = False
+            print(f'    {node}: {tasktime:.0f} s vs {reference:.0f} s ({change:+.0%})')
+
+    return ok
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+'''
+Streaming VCD analysis
+
+Reads a VCD file line by line and hands the value changes of only the signals
+the analyzers asked for to them, so a waveform of any length is analyzed in
+memory bounded by the number of selected signals. Analyzers:
+
+    UartDecoder     bytes sent on uart_tx_o
+    GpioActivity    toggles and final values of gpio_o and gpio_en_o
+    ToggleCounter   per net toggle counts and state durations, written as
+                    SAIF for power analysis, e.g. in OpenROAD:
+                    read_saif -scope zerosoc_tb/uut zerosoc.saif
+
+    ./vcd.py zerosoc.vcd --uart --gpio --saif zerosoc.saif --scope zerosoc_tb.uut
+'''
+
+import argparse
+import datetime
+import sys
+
+# VCD time units per UART bit: 625 cycles of the testbench clock, which has a
+# period of 2 time units (6 MHz / 9600 baud)
+UART_BIT_TIME = 1250
+
+_SKIPPED = ('$dumpvars', '$dumpall', '$dumpon', '$dumpoff', '$end')
+
+
+class VcdReader:
+    '''
+    Reads the header of a VCD file on construction, then streams its value
+    changes with changes().
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.timescale = '1 s'
+        self.time = 0
+        # Signal path to its (id code, width, variable type)
+        self.signals = {}
+
+        self._file = open(path)
+        self._read_header()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _definition(self, first):
+        tokens = first.split()
+        while tokens[-1] != '$end':
+            tokens.extend(next(self._file).split())
+        return tokens
+
+    def _read_header(self):
+        scope = []
+        for line in self._file:
+            if not line.strip():
+                continue
+            tokens = self._definition(line)
+            keyword = tokens[0]
+            if keyword == '$enddefinitions':
+                return
+            if keyword == '$timescale':
+                self.timescale = ' '.join(tokens[1:-1])
+            elif keyword == '$scope':
+                scope.append(tokens[2])
+            elif keyword == '$upscope':
+                scope.pop()
+            elif keyword == '$var':
+                kind, width, code, name = tokens[1], int(tokens[2]), tokens[3], tokens[4]
+                # The bit range some simulators put after the name is dropped
+                self.signals['.'.join(scope + [name])] = (code, width, kind)
+        raise ValueError(f'{self.path}: no $enddefinitions')
+
+    def changes(self, codes):
+        '''
+        Yields (time, id code, value) for every change of the signals with
+        codes. The time of the last change read is kept in time.
+        '''
+        vector = None
+        comment = False
+        for line in self._file:
+            for token in line.split():
+                if comment:
+                    comment = token != '$end'
+                elif vector is not None:
+                    # Code of a vector or real change
+                    if token in codes:
+                        yield self.time, token, vector
+                    vector = None
+                elif token[0] == '#':
+                    self.time = int(token[1:])
+                elif token[0] in 'bBrR':
+                    vector = token[1:].lower()
+                elif token[0] in '01xXzZ' and token[1:] in codes:
+                    yield self.time, token[1:], token[0].lower()
+                elif token[0] == '$' and token not in _SKIPPED:
+                    # $comment blocks
+                    comment = True
+
+
+def _extend(value, width):
+    '''
+    Left-extends a vector value to width bits as VCD does.
+    '''
+    if len(value) >= width:
+        return value[-width:]
+    fill = value[0] if value[0] in 'xz' else '0'
+    return fill * (width - len(value)) + value
+
+
+def _find(signals, name):
+    '''
+    Returns the shallowest signal path that is name or ends with .name.
+    '''
+    if name in signals:
+        return name
+    matches = [path for path in signals if path.endswith(f'.{name}')]
+    if not matches:
+        raise ValueError(f"No signal '{name}' in the VCD file")
+    return min(matches, key=lambda path: path.count('.'))
+
+
+class UartDecoder:
+    '''
+    Decodes 8N1 UART frames from a serial line, sampling each bit in its middle.
+    '''
+
+    def __init__(self, signal='uart_tx_o', bit_time=UART_BIT_TIME):
+        self.signal = signal
+        self.bit_time = bit_time
+        self.data = bytearray()
+        self.framing_errors = 0
+
+        self._value = None
+        self._bits = []
+        self._next_sample = None
+
+    def select(self, signals):
+        return [_find(signals, self.signal)]
+
+    def _advance(self, time):
+        while self._next_sample is not None and self._next_sample < time:
+            if len(self._bits) < 8:
+                self._bits.append(self._value == '1')
+                self._next_sample += self.bit_time
+                continue
+
+            # Stop bit
+            if self._value == '1':
+                self.data.append(sum(bit << i for i, bit in enumerate(self._bits)))
+            else:
+                self.framing_errors += 1
+            self._bits = []
+            self._next_sample = None
+
+    def change(self, time, path, value):
+        self._advance(time)
+        if self._next_sample is None and self._value == '1' and value == '0':
+            # Start bit
+            self._next_sample = time + self.bit_time * 3 // 2
+        self._value = value
+
+    def finish(self, time):
+        self._advance(time + 1)
+
+    def report(self):
+        print(f'UART: {self.data.decode(errors="replace")!r}')
+        if self.framing_errors:
+            print(f'UART: {self.framing_errors} framing errors')
+
+
+class GpioActivity:
+    '''
+    Counts the toggles of each GPIO output and output enable bit.
+    '''
+
+    def __init__(self, signals=('gpio_o', 'gpio_en_o')):
+        self.names = signals
+        # Signal path to per bit [toggles, first toggle, last toggle]
+        self.bits = {}
+        self.values = {}
+        self.widths = {}
+
+    def select(self, signals):
+        paths = [_find(signals, name) for name in self.names]
+        self.widths = {path: signals[path][1] for path in paths}
+        return paths
+
+    def change(self, time, path, value):
+        width = self.widths[path]
+        value = _extend(value, width)
+        previous = self.values.get(path)
+        self.values[path] = value
+        if previous is None:
+            return
+
+        stats = self.bits.setdefault(path, {})
+        for i, (old, new) in enumerate(zip(previous, value)):
+            if old != new and old in '01' and new in '01':
+                bit = stats.setdefault(width - 1 - i, [0, time, time])
+                bit[0] += 1
+                bit[2] = time
+
+    def finish(self, time):
+        pass
+
+    def report(self):
+        for path in sorted(self.values):
+            print(f'{path}: final {self.values[path]}')
+            for bit, (toggles, first, last) in sorted(self.bits.get(path, {}).items()):
+                print(f'    [{bit}] {toggles} toggles between {first} and {last}')
+
+
+class ToggleCounter:
+    '''
+    Counts the toggles and the time spent at 0, 1 and x/z of every bit of the
+    nets under scope, for SAIF output.
+    '''
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.end = 0
+        # Net path to its width and per bit [value, since, T0, T1, TX, TC]
+        self.nets = {}
+
+    def select(self, signals):
+        prefix = f'{self.scope}.' if self.scope else ''
+        selected = [path for path, (_, _, kind) in signals.items()
+                    if path.startswith(prefix) and kind not in ('real', 'event')]
+        for path in selected:
+            width = signals[path][1]
+            self.nets[path] = (width, [['x', 0, 0, 0, 0, 0] for _ in range(width)])
+        return selected
+
+    def change(self, time, path, value):
+        width, bits = self.nets[path]
+        value = _extend(value, width)
+        for bit, new in zip(bits, value):
+            old = bit[0]
+            if old == new:
+                continue
+            bit[2 + _STATE.get(old, 2)] += time - bit[1]
+            if old in '01' and new in '01':
+                bit[5] += 1
+            bit[0] = new
+            bit[1] = time
+
+    def finish(self, time):
+        self.end = time
+        for _, bits in self.nets.values():
+            for bit in bits:
+                bit[2 + _STATE.get(bit[0], 2)] += time - bit[1]
+                bit[1] = time
+
+    def write_saif(self, path, timescale):
+        '''
+        Writes the counts as a SAIF 2.0 file.
+        '''
+        tree = {}
+        for net, (width, bits) in self.nets.items():
+            *instances, name = net.split('.')
+            node = tree
+            for instance in instances:
+                node = node.setdefault(instance, {})
+            for i, bit in enumerate(bits):
+                bit_name = f'{name}\\[{width - 1 - i}\\]' if width > 1 else name
+                node.setdefault(None, []).append((bit_name, bit[2:]))
+
+        with open(path, 'w') as f:
+            f.write('(SAIFILE\n(SAIFVERSION "2.0")\n(DIRECTION "backward")\n')
+            f.write(f'(DATE "{datetime.datetime.now().ctime()}")\n')
+            f.write('(PROGRAM_NAME "vcd.py")\n(DIVIDER / )\n')
+            f.write(f'(TIMESCALE {timescale})\n')
+            f.write(f'(DURATION {self.end})\n')
+            _write_instances(f, tree, 0)
+            f.write(')\n')
+
+    def report(self):
+        toggles = sum(bit[5] for _, bits in self.nets.values() for bit in bits)
+        count = sum(width for width, _ in self.nets.values())
+        print(f'Toggles: {toggles} over {count} net bits')
+
+
+_STATE = {'0': 0, '1': 1}
+
+
+def _write_instances(f, tree, depth):
+    indent = '  ' * depth
+    for instance, node in sorted((k, v) for k, v in tree.items() if k is not None):
+        f.write(f'{indent}(INSTANCE {instance}\n')
+        if None in node:
+            f.write(f'{indent}  (NET\n')
+            for name, (t0, t1, tx, tc) in node[None]:
+                f.write(f'{indent}    ({name} (T0 {t0}) (T1 {t1}) (TX {tx}) (TC {tc}) (IG 0))\n')
+            f.write(f'{indent}  )\n')
+        _write_instances(f, node, depth + 1)
+        f.write(f'{indent})\n')
+
+
+def analyze(path, analyzers):
+    '''
+    Streams the VCD file at path through analyzers. Returns the timescale of
+    the file.
+    '''
+    with VcdReader(path) as reader:
+        listeners = {}
+        for analyzer in analyzers:
+            for signal in analyzer.select(reader.signals):
+                code = reader.signals[signal][0]
+                listeners.setdefault(code, []).append((analyzer, signal))
+
+        for time, code, value in reader.changes(listeners):
+            for analyzer, signal in listeners[code]:
+                analyzer.change(time, signal, value)
+
+        for analyzer in analyzers:
+            analyzer.finish(reader.time)
+        return reader.timescale
+
+
+def _main():
+    parser = argparse.ArgumentParser(description='Analyze a ZeroSoC VCD file')
+    parser.add_argument('vcd', help='VCD file to read.')
+    parser.add_argument('--uart', action='store_true', help='Decode the UART output.')
+    parser.add_argument('--uart-signal', default='uart_tx_o',
+                        help='UART output signal, or the end of its path.')
+    parser.add_argument('--bit-time', type=int, default=UART_BIT_TIME,
+                        help=f'UART bit time in VCD time units (default: {UART_BIT_TIME}).')
+    parser.add_argument('--gpio', action='store_true', help='Summarize the GPIO activity.')
+    parser.add_argument('--saif', metavar='FILE', help='Write the net switching activity.')
+    parser.add_argument('--scope', help='Only count the activity of nets under this scope.')
+    options = parser.parse_args()
+
+    analyzers = []
+    if options.uart or not (options.gpio or options.saif):
+        analyzers.append(UartDecoder(options.uart_signal, bit_time=options.bit_time))
+    if options.gpio or not (options.uart or options.saif):
+        analyzers.append(GpioActivity())
+    toggles = None
+    if options.saif:
+        toggles = ToggleCounter(options.scope)
+        analyzers.append(toggles)
+
+    try:
+        timescale = analyze(options.vcd, analyzers)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    for analyzer in analyzers:
+        analyzer.report()
+    if toggles:
+        toggles.write_saif(options.saif, timescale)
+
+
+if __name__ == '__main__':
+    _main()
@@ -2,38 +2,69 @@ import os
 from siliconcompiler import Library
 from siliconcompiler.package import path as sc_path
 import opentitan
+import profiles
+import ram
+import sources
 from lambdalib import ramlib
 
+ROOT = os.path.abspath(os.path.dirname(__file__))
 
-def setup():
-    lib = Library("zerosoc_core", package='zerosoc', auto_enable=True)
-    lib.register_source(
-        name='zerosoc',
-        path=os.path.abspath(os.path.dirname(__file__)))
+IDIRS = ['hw']
 
-    lib.add('option', 'idir', 'hw')
-    lib.add('option', 'ydir', 'hw/prim')
-    # lib.input('hw/asic_top.v')
-    lib.input('hw/xbar_pkg.sv')
-    lib.input('hw/prim/prim_pkg.sv')
+YDIRS = ['hw/prim']
 
-    lib.input('hw/uart_core.sv')
+INPUTS = [
+    # 'hw/asic_top.v',
+    'hw/xbar_pkg.sv',
+    'hw/prim/prim_pkg.sv',
 
-    lib.input('hw/zerosoc.sv')
-    lib.input('hw/xbar.sv')
-    lib.input('hw/tl_dbg.sv')
+    'hw/uart_core.sv',
 
-    lib.input('hw/asic_core.v')
+    'hw/zerosoc.sv',
+    'hw/ram_tiled.sv',
+    'hw/xbar.sv',
+    'hw/tl_dbg.sv',
+
+    'hw/asic_core.v',
 
     # TODO: break into separate lib
-    lib.input('hw/prim/lambdalib/prim_lambdalib_ram_1p.v')
-    lib.input('hw/prim/lambdalib/prim_lambdalib_clock_gating.v')
+    'hw/prim/lambdalib/prim_lambdalib_ram_1p.v',
+    'hw/prim/lambdalib/prim_lambdalib_clock_gating.v'
+]
+
+
+def defines():
+    '''
+    Returns the defines the sources are read with, other than MEM_ROOT.
+    '''
+    return ['PRIM_DEFAULT_IMPL="prim_pkg::ImplLambdalib"', *ram.defines(), *profiles.defines()]
+
+
+def setup():
+    lib = Library("zerosoc_core", package='zerosoc', auto_enable=True)
+    lib.register_source(
+        name='zerosoc',
+        path=ROOT)
+
+    for idir in IDIRS:
+        lib.add('option', 'idir', idir)
+
+    locked = sources.locked_files('zerosoc')
+    if locked is not None:
+        # Exact, ordered file list resolved ahead of time, see sources.py
+        for path in locked:
+            lib.input(path)
+    else:
+        for ydir in YDIRS:
+            lib.add('option', 'ydir', ydir)
+        for path in INPUTS:
+            lib.input(path)
 
     # hack to work around fact that $readmemh now runs in context of build
     # directory and can't load .mem files using relative paths
     lib.add('option', 'define', f'MEM_ROOT={sc_path(lib, "zerosoc")}')
-    lib.add('option', 'define', 'PRIM_DEFAULT_IMPL="prim_pkg::ImplLambdalib"')
-    lib.add('option', 'define', 'RAM_DEPTH=512')
+    for define in defines():
+        lib.add('option', 'define', define)
 
     lib.use(opentitan)
     lib.use(ramlib)